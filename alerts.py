@@ -0,0 +1,371 @@
+"""Edge-triggered trend and price alerts evaluated against ingestion snapshots.
+
+    python alerts.py --rule bitcoin:4H:bullish_cross --rule bitcoin:1D:price_above_ema21
+    python alerts.py --rule ethereum:1D:price_above:4000 --sink webhook:http://localhost:8080/hook
+    python alerts.py --rules-file rules.json --sink stdout --sink file:alerts.jsonl
+
+A rule fires when its condition turns true for a coin and timeframe, not
+while it stays true, and at most once per candle, so a price wobbling around
+a threshold inside one candle alerts once. Rules are indexed by (coin,
+timeframe), and only keys whose latest candle changed since the previous
+snapshot are evaluated. Each state condition is computed once per key however
+many rules share it, and price thresholds are kept sorted so the crossed ones
+are found by bisection.
+"""
+from __future__ import annotations
+
+import abc
+import argparse
+import json
+import sys
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import requests
+
+from metrics import METRICS, serve_metrics
+
+if TYPE_CHECKING:
+    from ingestion import Snapshot, SnapshotKey
+
+# State conditions: name -> (description, test on a trend analysis dict)
+STATE_CONDITIONS: Dict[str, Tuple[str, Callable[[Dict], bool]]] = {
+    'bullish_cross': ('bullish EMA 12/21 cross', lambda analysis: analysis['ema_12_above_21']),
+    'bearish_cross': ('bearish EMA 12/21 cross', lambda analysis: not analysis['ema_12_above_21']),
+    'price_above_ema12': ('price above EMA 12', lambda analysis: analysis['price_above_ema12']),
+    'price_below_ema12': ('price below EMA 12', lambda analysis: not analysis['price_above_ema12']),
+    'price_above_ema21': ('price above EMA 21', lambda analysis: analysis['price_above_ema21']),
+    'price_below_ema21': ('price below EMA 21', lambda analysis: not analysis['price_above_ema21']),
+    'price_above_vwap': ('price above VWAP', lambda analysis: analysis.get('price_above_vwap') is True),
+    'price_below_vwap': ('price below VWAP', lambda analysis: analysis.get('price_above_vwap') is False),
+    'volume_confirmed': ('volume-confirmed crossover', lambda analysis: bool(analysis.get('volume_confirmed')))
+}
+
+# Threshold conditions compare the latest close with the rule's value
+THRESHOLD_CONDITIONS = {'price_above': 'price above', 'price_below': 'price below'}
+
+
+@dataclass(frozen=True)
+class AlertRule:
+    """A condition on one coin and timeframe, e.g. AlertRule('bitcoin', '4H', 'price_above', 70000)"""
+    coin_id: str
+    timeframe: str
+    condition: str
+    value: Optional[float] = None
+
+    def __post_init__(self):
+        if self.condition in THRESHOLD_CONDITIONS:
+            if self.value is None:
+                raise ValueError(f"Condition '{self.condition}' needs a price value")
+        elif self.condition not in STATE_CONDITIONS:
+            conditions = ', '.join(sorted([*STATE_CONDITIONS, *THRESHOLD_CONDITIONS]))
+            raise ValueError(f"Unknown alert condition '{self.condition}'; choose from {conditions}")
+
+    @property
+    def id(self) -> str:
+        parts = [self.coin_id, self.timeframe, self.condition]
+        if self.value is not None:
+            parts.append(f'{self.value:g}')
+        return ':'.join(parts)
+
+    @property
+    def description(self) -> str:
+        if self.condition in THRESHOLD_CONDITIONS:
+            return f'{THRESHOLD_CONDITIONS[self.condition]} {self.value:,.2f}'
+        return STATE_CONDITIONS[self.condition][0]
+
+
+@dataclass(frozen=True)
+class AlertEvent:
+    """A rule that fired on a snapshot"""
+    rule: AlertRule
+    candle_time: int  # ms timestamp of the candle the rule fired on
+    price: float
+    triggered_at: float = field(default_factory=time.time)
+
+    @property
+    def message(self) -> str:
+        return f'{self.rule.coin_id} {self.rule.timeframe}: {self.rule.description} (close {self.price:,.2f})'
+
+    def to_dict(self) -> Dict:
+        return {
+            'rule': self.rule.id,
+            'coin_id': self.rule.coin_id,
+            'timeframe': self.rule.timeframe,
+            'condition': self.rule.condition,
+            'value': self.rule.value,
+            'price': self.price,
+            'candle_time': datetime.fromtimestamp(self.candle_time / 1000, timezone.utc).isoformat(),
+            'triggered_at': datetime.fromtimestamp(self.triggered_at, timezone.utc).isoformat(),
+            'message': self.message
+        }
+
+
+def parse_rule(text: str) -> AlertRule:
+    """Parse 'coin:timeframe:condition[:value]', e.g. 'bitcoin:1D:price_above:70000'"""
+    parts = text.strip().split(':')
+    if len(parts) not in (3, 4):
+        raise ValueError(f"Invalid alert rule '{text}'; expected coin:timeframe:condition[:value]")
+    return AlertRule(parts[0], parts[1], parts[2], float(parts[3]) if len(parts) == 4 else None)
+
+
+def load_rules(path: str) -> List[AlertRule]:
+    """Load rules from a JSON list of rule strings or {coin_id, timeframe, condition, value} objects"""
+    with open(path) as f:
+        entries = json.load(f)
+    return [parse_rule(entry) if isinstance(entry, str) else AlertRule(**entry) for entry in entries]
+
+
+class AlertSink(abc.ABC):
+    """Delivers fired alerts somewhere; subclasses implement send"""
+
+    @abc.abstractmethod
+    def send(self, events: Sequence[AlertEvent]):
+        """Deliver one batch of alerts"""
+
+
+class StdoutSink(AlertSink):
+    def send(self, events: Sequence[AlertEvent]):
+        for event in events:
+            print(f"[{event.to_dict()['candle_time']}] ALERT {event.message}", flush=True)
+
+
+class FileSink(AlertSink):
+    """Appends one JSON object per alert to a file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def send(self, events: Sequence[AlertEvent]):
+        lines = ''.join(json.dumps(event.to_dict()) + '\n' for event in events)
+        with self._lock, open(self.path, 'a') as f:
+            f.write(lines)
+
+
+class WebhookSink(AlertSink):
+    """POSTs each batch of alerts as {"alerts": [...]} JSON to a URL"""
+
+    def __init__(self, url: str, timeout: float = 10, session: Optional[requests.Session] = None):
+        self.url = url
+        self.timeout = timeout
+        self.session = session or requests.Session()
+
+    def send(self, events: Sequence[AlertEvent]):
+        response = self.session.post(self.url, json={'alerts': [event.to_dict() for event in events]},
+                                     timeout=self.timeout)
+        response.raise_for_status()
+
+
+def create_sink(spec: str) -> AlertSink:
+    """Build a sink from 'stdout', 'file:PATH' or 'webhook:URL' (a bare http(s) URL also works)"""
+    if spec == 'stdout':
+        return StdoutSink()
+    if spec.startswith('file:'):
+        return FileSink(spec[len('file:'):])
+    if spec.startswith('webhook:'):
+        return WebhookSink(spec[len('webhook:'):])
+    if spec.startswith(('http://', 'https://')):
+        return WebhookSink(spec)
+    raise ValueError(f"Unknown alert sink '{spec}'; use stdout, file:PATH or webhook:URL")
+
+
+class _Thresholds:
+    """Threshold rules sorted by value, so the ones a price move crossed are found by bisection"""
+
+    def __init__(self):
+        self.values: List[float] = []
+        self.rules: List[AlertRule] = []
+
+    def add(self, rule: AlertRule):
+        position = bisect_right(self.values, rule.value)
+        self.values.insert(position, rule.value)
+        self.rules.insert(position, rule)
+
+    def between(self, low: float, high: float, closed_low: bool) -> List[AlertRule]:
+        """Rules with low <= value < high when closed_low, else low < value <= high"""
+        if closed_low:
+            return self.rules[bisect_left(self.values, low):bisect_left(self.values, high)]
+        return self.rules[bisect_right(self.values, low):bisect_right(self.values, high)]
+
+
+@dataclass
+class _KeyRules:
+    """Rules of one (coin, timeframe), grouped by state condition"""
+    state: Dict[str, List[AlertRule]] = field(default_factory=dict)
+    above: _Thresholds = field(default_factory=_Thresholds)
+    below: _Thresholds = field(default_factory=_Thresholds)
+
+
+@dataclass
+class _KeyState:
+    """What a key looked like when it was last evaluated"""
+    fingerprint: tuple
+    price: float
+    conditions: Dict[str, bool]
+
+
+class AlertEngine:
+    """Evaluates alert rules against each new snapshot and delivers fired alerts to the sinks
+
+    Attach it to an IngestionWorker with worker.add_listener(engine.on_snapshot).
+    The first snapshot containing a key only records its state, so alerts fire
+    on changes seen while the engine is running rather than on startup.
+    """
+
+    def __init__(self, rules: Iterable[AlertRule] = (), sinks: Iterable[AlertSink] = ()):
+        self.sinks = list(sinks)
+        self._rules: Dict[SnapshotKey, _KeyRules] = {}
+        self._rule_ids = set()
+        self._state: Dict[SnapshotKey, _KeyState] = {}
+        self._fired: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for rule in rules:
+            self.add_rule(rule)
+
+    @property
+    def timeframes(self) -> List[str]:
+        return list(dict.fromkeys(timeframe for _, timeframe in self._rules))
+
+    @property
+    def coin_ids(self) -> List[str]:
+        return list(dict.fromkeys(coin_id for coin_id, _ in self._rules))
+
+    def add_rule(self, rule: AlertRule):
+        """Add a rule; adding an identical rule again has no effect"""
+        with self._lock:
+            if rule.id in self._rule_ids:
+                return
+            self._rule_ids.add(rule.id)
+
+            rules = self._rules.setdefault((rule.coin_id, rule.timeframe), _KeyRules())
+            if rule.condition == 'price_above':
+                rules.above.add(rule)
+            elif rule.condition == 'price_below':
+                rules.below.add(rule)
+            else:
+                rules.state.setdefault(rule.condition, []).append(rule)
+
+    def evaluate(self, snapshot: Snapshot) -> List[AlertEvent]:
+        """Find the rules that fired between the previous snapshot and this one"""
+        events = []
+        with self._lock:
+            for key, rules in self._rules.items():
+                candles = snapshot.data.get(key)
+                analysis = snapshot.analysis.get(key)
+                if candles is None or analysis is None:
+                    continue
+
+                candle_time = int(candles.timestamps[-1])
+                price = float(candles['close'][-1])
+                fingerprint = (len(candles), candle_time, price)
+                previous = self._state.get(key)
+                if previous is not None and previous.fingerprint == fingerprint:
+                    continue
+
+                conditions = {name: bool(STATE_CONDITIONS[name][1](analysis)) for name in rules.state}
+                self._state[key] = _KeyState(fingerprint, price, conditions)
+                if previous is None:
+                    continue
+
+                fired = [rule for name, now in conditions.items()
+                         if now and not previous.conditions.get(name, now) for rule in rules.state[name]]
+
+                # price_above X fires when previous <= X < price; price_below X when price < X <= previous
+                if price > previous.price:
+                    fired.extend(rules.above.between(previous.price, price, closed_low=True))
+                elif price < previous.price:
+                    fired.extend(rules.below.between(price, previous.price, closed_low=False))
+
+                for rule in fired:
+                    if self._fired.get(rule.id) != candle_time:
+                        self._fired[rule.id] = candle_time
+                        events.append(AlertEvent(rule, candle_time, price))
+        return events
+
+    def deliver(self, events: Sequence[AlertEvent]):
+        """Send events to every sink; a failing sink doesn't stop the others"""
+        if not events:
+            return
+        METRICS.count('alerts_fired_total', len(events))
+        for sink in self.sinks:
+            try:
+                sink.send(events)
+            except Exception as e:
+                METRICS.count('alert_delivery_errors_total', sink=type(sink).__name__)
+                print(f"Error delivering alerts to {type(sink).__name__}: {e}")
+
+    def on_snapshot(self, snapshot: Snapshot) -> List[AlertEvent]:
+        """Evaluate a snapshot and deliver what fired; suitable as an IngestionWorker listener"""
+        with METRICS.timer('alerts'):
+            events = self.evaluate(snapshot)
+        self.deliver(events)
+        return events
+
+
+def parse_args(argv=None):
+    from coingecko_api import TIMEFRAMES
+
+    parser = argparse.ArgumentParser(description='Watch trend snapshots and send edge-triggered alerts')
+    parser.add_argument('--rule', action='append', default=[], type=parse_rule,
+                        help="Alert rule coin:timeframe:condition[:value], e.g. 'bitcoin:4H:bullish_cross' "
+                             "(repeatable)")
+    parser.add_argument('--rules-file', help='JSON file with a list of rules')
+    parser.add_argument('--sink', action='append', default=[], type=create_sink,
+                        help="Where to send alerts: stdout, file:PATH or webhook:URL (repeatable, default: stdout)")
+    parser.add_argument('--vs-currency', default='usd', help='Quote currency (default: %(default)s)')
+    parser.add_argument('--interval', type=float, default=60, help='Seconds between refreshes; with --live-interval, between retries of series that failed '
+                             'to load (default: %(default)s)')
+    parser.add_argument('--live-interval', type=float,
+                        help='Seconds between batched /simple/price polls updating forming bars; history is then '
+                             'only re-fetched when a bar closes')
+    parser.add_argument('--history-days', type=int,
+                        help='Resample every timeframe from N days of hourly /market_chart/range history')
+    parser.add_argument('--volume', action='store_true',
+                        help='Estimate /ohlc volume from /market_chart, needed by the VWAP and volume rules')
+    parser.add_argument('--metrics-port', type=int, help='Serve Prometheus metrics on this port at /metrics')
+    args = parser.parse_args(argv)
+
+    if args.rules_file:
+        args.rule.extend(load_rules(args.rules_file))
+    if not args.rule:
+        parser.error('at least one --rule or --rules-file is required')
+    unknown = sorted({rule.timeframe for rule in args.rule} - set(TIMEFRAMES))
+    if unknown:
+        parser.error(f"unknown timeframe(s) {', '.join(unknown)}; choose from {', '.join(TIMEFRAMES)}")
+    return args
+
+
+def main(argv=None) -> int:
+    from coingecko_api import CoinGeckoAPI
+    from ingestion import IngestionWorker
+    from trend_analyzer import TrendAnalyzer
+
+    args = parse_args(argv)
+    engine = AlertEngine(args.rule, args.sink or [StdoutSink()])
+    if args.metrics_port:
+        METRICS.enable()
+        serve_metrics(args.metrics_port)
+
+    worker = IngestionWorker(CoinGeckoAPI(fetch_volume=args.volume or None), TrendAnalyzer(), engine.coin_ids, engine.timeframes,
+                             interval=args.interval, vs_currency=args.vs_currency,
+                             history_days=args.history_days, live_interval=args.live_interval)
+    worker.add_listener(engine.on_snapshot)
+    print(f"Watching {len(args.rule)} rule(s) on {', '.join(engine.coin_ids)}", file=sys.stderr)
+
+    worker.start()
+    try:
+        version = 0
+        while True:
+            version = worker.wait_for_update(version).version
+    except KeyboardInterrupt:
+        worker.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
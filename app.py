@@ -1,17 +1,21 @@
+import os
+import time
+
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import time
 from datetime import datetime, timedelta
 
-from coingecko_api import CoinGeckoAPI
+from coingecko_api import CoinGeckoAPI, TIMEFRAMES
 from trend_analyzer import TrendAnalyzer
-from chart_visualizer import ChartVisualizer
+from screener import build_screener_table, filter_screener
+from ingestion import IngestionWorker
+from metrics import METRICS, serve_metrics
+from quotes import QUOTE_CURRENCIES, format_price
+
+page_started = time.perf_counter()
 
 # For Streamlit Cloud secrets
 if hasattr(st, 'secrets') and 'COINGECKO_API_KEY' in st.secrets:
-    import os
     os.environ['COINGECKO_API_KEY'] = st.secrets['COINGECKO_API_KEY']
 
 # Page configuration
@@ -22,16 +26,6 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# Initialize API and analyzer
-@st.cache_resource
-def initialize_components():
-    api = CoinGeckoAPI()
-    analyzer = TrendAnalyzer()
-    visualizer = ChartVisualizer()
-    return api, analyzer, visualizer
-
-api, analyzer, visualizer = initialize_components()
-
 # Cryptocurrency configuration
 CRYPTOS = {
     'Bitcoin': 'bitcoin',
@@ -39,7 +33,54 @@ CRYPTOS = {
     'Solana': 'solana'
 }
 
-TIMEFRAMES = ['4H', '6H', '12H', '1D', '2D', '3D', '1W']
+# Initialize API and analyzer. Series are fetched in USD only; other quote
+# currencies are derived from them (see quotes.py)
+@st.cache_resource
+def initialize_components():
+    api = CoinGeckoAPI(base_currency='usd')
+    analyzer = TrendAnalyzer()
+
+    # METRICS_PORT exposes /metrics for Prometheus scraping
+    if os.getenv('METRICS_PORT'):
+        METRICS.enable()
+        serve_metrics(int(os.getenv('METRICS_PORT')))
+    return api, analyzer
+
+api, analyzer = initialize_components()
+
+# A key entered in the sidebar gets its own client (and rate limiter), shared only
+# by sessions using the same key; the process-wide client keeps the server's key
+@st.cache_resource(max_entries=8)
+def get_keyed_api(api_key):
+    keyed_api = CoinGeckoAPI(base_currency='usd')
+    keyed_api.set_api_key(api_key)
+    return keyed_api
+
+# Process-wide background poller per quote currency; it refreshes every coin and
+# timeframe and sessions only read its snapshots. Non-USD workers share the USD
+# series and price polls through api, and a worker no session has read for 10
+# minutes stops until a session selects its quote again
+@st.cache_resource
+def get_worker(quote):
+    # Forming bars follow /simple/price every 15s; full history is only re-fetched when a bar
+    # closes, with interval pacing retries while a series fails to load
+    return IngestionWorker(api, analyzer, list(CRYPTOS.values()), TIMEFRAMES, interval=300, live_interval=15,
+                           vs_currency=quote, idle_timeout=600)
+
+# The chart module (and Plotly) only loads once a chart is actually drawn
+@st.cache_resource
+def get_visualizer():
+    from chart_visualizer import ChartVisualizer
+    return ChartVisualizer()
+
+# Price charts are built once per coin, timeframe and snapshot version and shared
+# between sessions; Plotly only reads the figure when serializing it
+@st.cache_resource(max_entries=64)
+def get_price_chart(crypto_id, timeframe, quote, version, crypto_name, _df, _analysis):
+    # Snapshot frames are shared between sessions, so chart a copy
+    with METRICS.timer('render', chart='price', timeframe=timeframe):
+        df = analyzer.add_ema_columns(_df.copy())
+        return get_visualizer().create_price_chart(df, crypto_name, _analysis, timeframe, quote=quote)
 
 # Title and description
 st.title("📈 Crypto Bull/Bear Status Dashboard")
@@ -53,16 +94,18 @@ if not api.api_key:  # Only show if no API key is set
     api_key_input = st.sidebar.text_input(
         "CoinGecko API Key (Optional - Pro features)",
         type="password",
-        help="Enter your CoinGecko Pro API key for enhanced features"
+        help="Enter your CoinGecko Pro API key for enhanced features. It is used for this "
+             "session's screener requests; dashboard cards come from the shared background worker."
     )
 
-    if api_key_input:
-        api.api_key = api_key_input
-        api.session.headers.update({'X-Cg-Pro-Api-Key': api_key_input})
-        api.base_url = api.pro_url
+    session_api = get_keyed_api(api_key_input) if api_key_input else api
 else:
+    session_api = api
     st.sidebar.success("🔑 API Key Connected!")
 
+# View selection
+view = st.sidebar.radio("View", ["Dashboard", "Screener"], horizontal=True)
+
 # Timeframe selection
 selected_timeframe = st.sidebar.selectbox(
     "Select Timeframe",
@@ -70,55 +113,150 @@ selected_timeframe = st.sidebar.selectbox(
     index=3  # Default to 1D
 )
 
+# Quote currency for prices and EMAs
+selected_quote = st.sidebar.selectbox(
+    "Quote Currency",
+    list(QUOTE_CURRENCIES),
+    format_func=str.upper
+)
+worker = get_worker(selected_quote)
+worker.start()
+
+# Cross-timeframe heatmap of every coin
+show_heatmap = st.sidebar.checkbox("Show Trend Heatmap", value=False)
+
 # Data refresh interval
 auto_refresh = st.sidebar.checkbox("Auto Refresh (30s)", value=False)
 
-# Manual refresh button
+# Manual refresh button; it only expires this process's in-memory series, so
+# replicas sharing CACHE_BACKEND keep their entries
 if st.sidebar.button("🔄 Refresh Data"):
     st.cache_data.clear()
-
-# Days of historical data based on timeframe
-# CoinGecko API: ≤30 days = hourly data, >30 days = daily data
-timeframe_days = {
-    '4H': 30,    # 30 days = ~180 hourly periods → 4H resampling
-    '6H': 30,    # 30 days = ~180 hourly periods → 6H resampling
-    '12H': 30,   # 30 days = ~180 hourly periods → 12H resampling
-    '1D': 30,    # 30 days = ~180 hourly periods → 1D resampling
-    '2D': 365,   # 365 days = ~365 daily periods → 2D resampling (~180 periods)
-    '3D': 365,   # 365 days = ~365 daily periods → 3D resampling (~120 periods)
-    '1W': 365    # 365 days = ~365 daily periods → 1W resampling (~52 periods)
-}
-
-days = timeframe_days.get(selected_timeframe, 30)
-
-@st.cache_data(ttl=300)  # Cache for 5 minutes
-def fetch_crypto_data(crypto_id, days, timeframe):
-    """Fetch and process cryptocurrency data"""
-    try:
-        df = api.get_historical_data(crypto_id, days=days)
-        if df.empty:
-            st.warning(f"No historical data available for {crypto_id}")
-            return None, None
-
-        # Resample data to selected timeframe
-        resampled_df = api.resample_data(df, timeframe)
-
-        if resampled_df.empty:
-            st.warning(f"No data available for {crypto_id} at {timeframe} timeframe. Try a different timeframe.")
-            return None, None
-
-        # Check if we have enough data for EMA calculation
-        if len(resampled_df) < 25:
-            st.warning(f"Insufficient data for {crypto_id} at {timeframe} timeframe ({len(resampled_df)} periods). Need at least 25 periods for reliable EMA analysis.")
-            return None, None
-
-        # Analyze trends
-        trend_analysis = analyzer.get_overall_trend(resampled_df)
-
-        return resampled_df, trend_analysis
-    except Exception as e:
-        st.error(f"Error fetching data for {crypto_id}: {e}")
-        return None, None
+    api.expire_store()
+    if session_api is not api:
+        session_api.expire_store()
+    worker.request_refresh()
+
+# Stage timings and counters, shared by every session of this process. Collection is
+# process-wide, so only METRICS_ENABLED or METRICS_PORT turn it on; the checkbox just
+# shows or hides this session's panel
+debug_metrics = st.sidebar.checkbox("🐞 Debug Metrics", value=False, key='debug_metrics',
+                                    help="Show fetch/resample/analyze/render timings (needs METRICS_ENABLED=1 "
+                                         "or METRICS_PORT)")
+
+def show_metrics_panel():
+    """Record this run's page time and show collected timings and counters in the sidebar"""
+    METRICS.observe('stage_seconds', time.perf_counter() - page_started, stage='page', view=view)
+    if not debug_metrics:
+        return
+
+    metrics = METRICS.to_dict()
+    with st.sidebar.expander("📟 Metrics", expanded=True):
+        if not METRICS.enabled:
+            st.info("Metrics collection is off. Start the app with METRICS_ENABLED=1 or METRICS_PORT set.")
+            return
+        if metrics['timings']:
+            st.dataframe(pd.DataFrame([{
+                'Stage': timing['labels'].get('stage', timing['name']),
+                'Labels': ', '.join(f"{k}={v}" for k, v in timing['labels'].items() if k != 'stage'),
+                'Count': timing['count'],
+                'Mean ms': round(timing['mean'] * 1000, 2),
+                'Max ms': round(timing['max'] * 1000, 2),
+                'Total ms': round(timing['sum'] * 1000, 1)
+            } for timing in metrics['timings']]), hide_index=True)
+        if metrics['counters']:
+            st.dataframe(pd.DataFrame([{
+                'Counter': counter['name'],
+                'Labels': ', '.join(f"{k}={v}" for k, v in counter['labels'].items()),
+                'Value': counter['value']
+            } for counter in metrics['counters']]), hide_index=True)
+
+        col_prometheus, col_json = st.columns(2)
+        with col_prometheus:
+            st.download_button("Prometheus", METRICS.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+        with col_json:
+            st.download_button("JSON", METRICS.to_json(), file_name="metrics.json", mime="application/json")
+        if st.button("Reset Metrics"):
+            METRICS.reset()
+
+# Screener mode: rank the whole market by trend state
+@st.cache_data(ttl=300)
+def fetch_screener_table(limit, timeframes, quote, _client):
+    """Build the screener table for the top coins by market cap"""
+    return build_screener_table(_client, analyzer, limit, list(timeframes), vs_currency=quote)
+
+if view == "Screener":
+    st.subheader("🔎 Market Screener")
+
+    col_limit, col_timeframes = st.columns([1, 3])
+    with col_limit:
+        screener_limit = st.number_input("Top N by market cap", min_value=10, max_value=500, value=100, step=10)
+    with col_timeframes:
+        screener_timeframes = st.multiselect("Timeframes", TIMEFRAMES, default=['4H', '1D'])
+
+    if not screener_timeframes:
+        st.info("Select at least one timeframe")
+        st.stop()
+
+    # Trend filters per timeframe
+    trend_filters = {}
+    for column, timeframe in zip(st.columns(len(screener_timeframes)), screener_timeframes):
+        with column:
+            choice = st.selectbox(f"{timeframe} Trend", ['Any', 'BULLISH', 'BEARISH'], key=f"screener_trend_{timeframe}")
+        if choice != 'Any':
+            trend_filters[timeframe] = choice
+
+    # Crossover recency filter
+    col_direction, col_cross_timeframe, col_within = st.columns(3)
+    with col_direction:
+        cross_direction = st.selectbox("Recent Crossover", ['Any', 'Bullish', 'Bearish'])
+    with col_cross_timeframe:
+        cross_timeframe = st.selectbox("Crossover Timeframe", screener_timeframes)
+    with col_within:
+        cross_within = st.slider("Within Periods", min_value=1, max_value=5, value=2)
+    cross_filter = None if cross_direction == 'Any' else (cross_timeframe, cross_direction, cross_within)
+
+    with st.spinner(f"Analyzing top {screener_limit} coins..."):
+        screener_table = fetch_screener_table(int(screener_limit), tuple(screener_timeframes), selected_quote,
+                                               session_api)
+
+    if screener_table.empty:
+        st.error("Failed to load market data")
+        st.markdown("Please check your internet connection or API key.")
+    else:
+        filtered_table = filter_screener(screener_table, trend_filters, cross_filter)
+        st.caption(f"{len(filtered_table)} of {len(screener_table)} coins match")
+        st.dataframe(filtered_table, use_container_width=True, hide_index=True)
+
+    show_metrics_panel()
+    st.stop()
+
+# Read the latest background snapshot, waiting for the first one on a cold start
+snapshot = worker.latest()
+if snapshot.version == 0:
+    with st.spinner("Loading market data..."):
+        snapshot = worker.wait_for_update(0, timeout=120)
+
+# Cards, the summary and the heatmap are fragments: a chart click or an auto
+# refresh tick reruns only the fragment involved, each reading the latest snapshot
+refresh_every = 30 if auto_refresh else None
+
+def card_data(snapshot, crypto_id, timeframe):
+    """(version, df, analysis) for a coin, kept per session until its own data changes
+
+    The summary reuses what the cards computed, and reruns for unchanged data
+    don't rebuild frames.
+    """
+    results = st.session_state.setdefault('card_data', {})
+    key = (crypto_id, timeframe, selected_quote)
+    version = snapshot.key_version(crypto_id, timeframe)
+    cached = results.get(key)
+    if cached is None or cached[0] != version:
+        df, analysis = snapshot.get(crypto_id, timeframe)
+        if df is None or analysis is None:
+            df = analysis = None
+        cached = results[key] = (version, df, analysis)
+    return cached
 
 # Main dashboard
 col1, col2, col3 = st.columns(3)
@@ -137,100 +275,146 @@ def get_trend_display(trend, strength):
 
     return color, emoji
 
+def toggle_state(key):
+    st.session_state[key] = not st.session_state.get(key, False)
+
+@st.fragment(run_every=refresh_every)
+def show_coin_card(crypto_name, crypto_id):
+    """One coin's card; its chart button and auto refresh rerun only this card"""
+    snapshot = worker.latest()
+    version, df, analysis = card_data(snapshot, crypto_id, selected_timeframe)
+
+    with METRICS.timer('render', fragment='card', timeframe=selected_timeframe):
+        st.subheader(f"{crypto_name}")
+
+        if df is not None and analysis is not None:
+            # Current price
+            current_price = df['close'].iloc[-1]
+            price_change = ((df['close'].iloc[-1] - df['close'].iloc[-2]) / df['close'].iloc[-2]) * 100
+
+            # Trend display
+            color, emoji = get_trend_display(analysis['trend'], analysis['strength'])
+
+            # Display metrics
+            st.metric(
+                label=f"Current Price",
+                value=format_price(current_price, selected_quote),
+                delta=f"{price_change:+.2f}%"
+            )
+
+            st.markdown(f"""
+            **{emoji} Trend Status: {color} {analysis['trend']}**
+
+            **Strength:** {analysis['strength']:.2f}{f" · **Score:** {analysis['score']:+.2f}" if analysis.get('score') is not None else ''}
+
+            **EMA Analysis:**
+            - 📈 EMA 12: {format_price(analysis['ema_12_value'], selected_quote)}
+            - 📊 EMA 21: {format_price(analysis['ema_21_value'], selected_quote)}
+            - 🔄 Position: {'EMA 12 > EMA 21' if analysis['ema_12_above_21'] else 'EMA 12 < EMA 21'}
+            - ⚡ Recent Cross: {'🟢 Bullish' if analysis['recent_bullish_cross'] else '🔴 Bearish' if analysis['recent_bearish_cross'] else '⚪ None'}
+            {f"- 📅 Crossover: {analysis['crossover_periods_ago']} periods ago" if analysis['crossover_periods_ago'] else ''}
+            {f"- 📦 VWAP: {format_price(analysis['vwap'], selected_quote)} ({'price above' if analysis['price_above_vwap'] else 'price below'})" if analysis.get('vwap') is not None else ''}
+            {f"- 🔊 Cross Volume: {analysis['cross_volume_ratio']:.1f}x average{' ✅' if analysis['volume_confirmed'] else ''}" if analysis.get('cross_volume_ratio') is not None else ''}
+            """)
+
+            # Signal strength visualization
+            strength_bars = int(analysis['strength'] * 5)  # Convert to 0-5 scale
+            signal_color = "🟢" if analysis['trend'] == 'BULLISH' else "🔴" if analysis['trend'] == 'BEARISH' else "🟡"
+            signal_text = signal_color * strength_bars + "⚪" * (5 - strength_bars)
+            st.markdown(f"**Signal Strength:** {signal_text}")
+
+            # Chart toggle; stays open across this card's auto refreshes
+            show_chart_key = f"show_chart_{crypto_name}"
+            st.button("📉 Hide Chart" if st.session_state.get(show_chart_key) else "📊 Show Chart",
+                      key=f"chart_{crypto_name}", on_click=toggle_state, args=(show_chart_key,))
+            if st.session_state.get(show_chart_key):
+                chart = get_price_chart(crypto_id, selected_timeframe, selected_quote, version, crypto_name, df, analysis)
+                st.plotly_chart(chart, use_container_width=True, key=f"price_chart_{crypto_id}")
+
+        else:
+            message = snapshot.errors.get((crypto_id, selected_timeframe))
+            if message:
+                st.warning(message)
+            st.error(f"Failed to load data for {crypto_name}")
+            st.markdown("Please check your internet connection or API key.")
+
 # Display data for each cryptocurrency
 columns = [col1, col2, col3]
 crypto_names = list(CRYPTOS.keys())
 
 for i, (crypto_name, crypto_id) in enumerate(CRYPTOS.items()):
     with columns[i]:
-        st.subheader(f"{crypto_name}")
+        show_coin_card(crypto_name, crypto_id)
+
+@st.fragment(run_every=refresh_every)
+def show_summary():
+    """Summary table built from the results the cards already computed"""
+    snapshot = worker.latest()
+
+    st.markdown("---")
+    st.subheader(f"📊 Summary - {selected_timeframe} Timeframe")
+
+    summary_data = []
+    for crypto_name, crypto_id in CRYPTOS.items():
+        _, _, analysis = card_data(snapshot, crypto_id, selected_timeframe)
+        if analysis:
+            summary_data.append({
+                'Crypto': crypto_name,
+                'Trend': analysis['trend'],
+                'Strength': f"{analysis['strength']:.2f}",
+                'EMA 12': format_price(analysis['ema_12_value'], selected_quote),
+                'EMA 21': format_price(analysis['ema_21_value'], selected_quote),
+                'Recent Cross': 'Bullish' if analysis['recent_bullish_cross'] else 'Bearish' if analysis['recent_bearish_cross'] else 'None',
+                'Score': f"{analysis['score']:+.2f}" if analysis.get('score') is not None else '-'
+            })
+
+    if summary_data:
+        summary_df = pd.DataFrame(summary_data)
+
+        # Add trend emojis
+        trend_emojis = {'BULLISH': '🐂', 'BEARISH': '🐻', 'NEUTRAL': '⚖️'}
+        summary_df['Status'] = summary_df['Trend'].map(trend_emojis) + ' ' + summary_df['Trend']
+
+        # Display summary table
+        st.dataframe(
+            summary_df[['Crypto', 'Status', 'Strength', 'Score', 'EMA 12', 'EMA 21', 'Recent Cross']],
+            use_container_width=True,
+            hide_index=True
+        )
+
+show_summary()
+
+# The heatmap figure is rebuilt only when one of its coins and timeframes changed
+@st.cache_resource(max_entries=16)
+def get_trend_heatmap(quote, versions, _trend_data):
+    with METRICS.timer('render', chart='heatmap'):
+        return get_visualizer().create_trend_heatmap(_trend_data, TIMEFRAMES)
+
+@st.fragment(run_every=refresh_every)
+def show_trend_heatmap():
+    snapshot = worker.latest()
+
+    st.markdown("---")
+    st.subheader("🗺️ Trend Heatmap")
+
+    trend_data = {}
+    versions = []
+    for crypto_name, crypto_id in CRYPTOS.items():
+        for timeframe in TIMEFRAMES:
+            analysis = snapshot.analysis.get((crypto_id, timeframe))
+            versions.append(snapshot.key_version(crypto_id, timeframe))
+            if analysis:
+                trend_data.setdefault(crypto_name, {})[timeframe] = analysis
+
+    if trend_data:
+        st.plotly_chart(get_trend_heatmap(selected_quote, tuple(versions), trend_data), use_container_width=True)
+    else:
+        st.warning("No data available for the heatmap")
 
-        # Create placeholder for loading
-        placeholder = st.empty()
-
-        with placeholder.container():
-            with st.spinner(f"Loading {crypto_name} data..."):
-                df, analysis = fetch_crypto_data(crypto_id, days, selected_timeframe)
-
-            if df is not None and analysis is not None:
-                # Current price
-                current_price = df['close'].iloc[-1]
-                price_change = ((df['close'].iloc[-1] - df['close'].iloc[-2]) / df['close'].iloc[-2]) * 100
-
-                # Trend display
-                color, emoji = get_trend_display(analysis['trend'], analysis['strength'])
-
-                # Display metrics
-                st.metric(
-                    label=f"Current Price",
-                    value=f"${current_price:,.2f}",
-                    delta=f"{price_change:+.2f}%"
-                )
-
-                st.markdown(f"""
-                **{emoji} Trend Status: {color} {analysis['trend']}**
-
-                **Strength:** {analysis['strength']:.2f}
-
-                **EMA Analysis:**
-                - 📈 EMA 12: ${analysis['ema_12_value']:.2f}
-                - 📊 EMA 21: ${analysis['ema_21_value']:.2f}
-                - 🔄 Position: {'EMA 12 > EMA 21' if analysis['ema_12_above_21'] else 'EMA 12 < EMA 21'}
-                - ⚡ Recent Cross: {'🟢 Bullish' if analysis['recent_bullish_cross'] else '🔴 Bearish' if analysis['recent_bearish_cross'] else '⚪ None'}
-                {f"- 📅 Crossover: {analysis['crossover_periods_ago']} periods ago" if analysis['crossover_periods_ago'] else ''}
-                """)
-
-                # Signal strength visualization
-                strength_bars = int(analysis['strength'] * 5)  # Convert to 0-5 scale
-                signal_color = "🟢" if analysis['trend'] == 'BULLISH' else "🔴" if analysis['trend'] == 'BEARISH' else "🟡"
-                signal_text = signal_color * strength_bars + "⚪" * (5 - strength_bars)
-                st.markdown(f"**Signal Strength:** {signal_text}")
-
-                # Add chart toggle
-                if st.button(f"📊 Show Chart", key=f"chart_{crypto_name}"):
-                    chart = visualizer.create_price_chart(df, crypto_name, analysis, selected_timeframe)
-                    st.plotly_chart(chart, use_container_width=True)
-
-            else:
-                st.error(f"Failed to load data for {crypto_name}")
-                st.markdown("Please check your internet connection or API key.")
-
-# Summary section
-st.markdown("---")
-st.subheader(f"📊 Summary - {selected_timeframe} Timeframe")
-
-# Fetch all data for summary
-summary_data = []
-for crypto_name, crypto_id in CRYPTOS.items():
-    df, analysis = fetch_crypto_data(crypto_id, days, selected_timeframe)
-    if analysis:
-        summary_data.append({
-            'Crypto': crypto_name,
-            'Trend': analysis['trend'],
-            'Strength': f"{analysis['strength']:.2f}",
-            'EMA 12': f"${analysis['ema_12_value']:.2f}",
-            'EMA 21': f"${analysis['ema_21_value']:.2f}",
-            'Recent Cross': 'Bullish' if analysis['recent_bullish_cross'] else 'Bearish' if analysis['recent_bearish_cross'] else 'None'
-        })
-
-if summary_data:
-    summary_df = pd.DataFrame(summary_data)
-
-    # Add trend emojis
-    trend_emojis = {'BULLISH': '🐂', 'BEARISH': '🐻', 'NEUTRAL': '⚖️'}
-    summary_df['Status'] = summary_df['Trend'].map(trend_emojis) + ' ' + summary_df['Trend']
-
-    # Display summary table
-    st.dataframe(
-        summary_df[['Crypto', 'Status', 'Strength', 'EMA 12', 'EMA 21', 'Recent Cross']],
-        use_container_width=True,
-        hide_index=True
-    )
+if show_heatmap:
+    show_trend_heatmap()
 
-# Auto refresh functionality
-if auto_refresh:
-    time.sleep(30)
-    st.rerun()
+show_metrics_panel()
 
 # Footer
 st.markdown("---")
@@ -246,4 +430,5 @@ st.markdown("""
 """)
 
 # Display last update time
-st.markdown(f"*Last updated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*")
+last_updated = datetime.fromtimestamp(snapshot.created_at) if snapshot.created_at else datetime.now()
+st.markdown(f"*Last updated: {last_updated.strftime('%Y-%m-%d %H:%M:%S')}*")
@@ -0,0 +1,137 @@
+"""Chunked /market_chart/range backfill into OHLC + volume candles.
+
+/ohlc only serves fixed day windows and drops to 4-day candles past 30 days.
+/market_chart/range returns hourly price and 24h volume samples for any
+range of up to 90 days, so longer histories are split into aligned chunks,
+fetched in parallel and folded into candles of a fixed width as they arrive.
+"""
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Iterator, List, Tuple
+
+from candle_cache import DAY_MS
+from candles import Candles, OHLCV_COLUMNS
+from lazy_imports import lazy_import
+
+if TYPE_CHECKING:
+    from coingecko_api import CoinGeckoAPI
+
+np = lazy_import('numpy')
+
+# Longest range CoinGecko still answers with hourly samples; longer ones come back daily
+MARKET_CHART_CHUNK_DAYS = 90
+
+
+def chunk_ranges(start_ms: int, end_ms: int, width_ms: int,
+                 chunk_days: int = MARKET_CHART_CHUNK_DAYS) -> List[Tuple[int, int]]:
+    """Split [start_ms, end_ms) into half-open chunks aligned to the candle width
+
+    Chunk edges fall on candle boundaries, so no candle is split across two
+    requests and the chunks stitch together without duplicates.
+    """
+    start_ms = start_ms // width_ms * width_ms
+    chunk_ms = max(chunk_days * DAY_MS // width_ms, 1) * width_ms
+
+    ranges = []
+    for chunk_start in range(start_ms, end_ms, chunk_ms):
+        ranges.append((chunk_start, min(chunk_start + chunk_ms, end_ms)))
+    return ranges
+
+
+def candles_from_market_chart(data, width_ms: int, start_ms: int, end_ms: int) -> Candles:
+    """Fold /market_chart price and volume samples into candles of width_ms
+
+    Open, high, low and close come from the price samples in each bucket.
+    CoinGecko reports a rolling 24h volume with every sample, so the volume of
+    a candle is estimated as the bucket's mean 24h volume scaled to its width.
+    Samples outside [start_ms, end_ms) belong to a neighbouring chunk and are
+    dropped.
+    """
+    prices = np.array((data or {}).get('prices') or [], dtype=np.float64).reshape(-1, 2)
+    prices = prices[(prices[:, 0] >= start_ms) & (prices[:, 0] < end_ms)]
+    if len(prices) == 0:
+        return Candles.empty(OHLCV_COLUMNS)
+
+    prices = prices[np.argsort(prices[:, 0], kind='stable')]
+    labels = prices[:, 0].astype(np.int64) // width_ms * width_ms
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)] - 1
+    series = prices[:, 1]
+
+    values = np.empty((len(OHLCV_COLUMNS), len(starts)), dtype=np.float64)
+    values[0] = series[starts]
+    values[1] = np.maximum.reduceat(series, starts)
+    values[2] = np.minimum.reduceat(series, starts)
+    values[3] = series[ends]
+    values[4] = candle_volume(data.get('total_volumes'), labels[starts], width_ms)
+
+    return Candles(labels[starts], values, OHLCV_COLUMNS)
+
+
+def candle_volume(samples, timestamps, width_ms: int, label: str = 'left'):
+    """Estimate per-candle volume from /market_chart rolling 24h volume samples
+
+    Each candle gets the mean of the samples inside it, scaled from 24 hours
+    down to the candle width. label says whether timestamps mark the start of
+    each candle ('left', as built here) or its close ('right', as /ohlc does).
+    Candles without any sample get NaN.
+    """
+    volumes = np.array(samples or [], dtype=np.float64).reshape(-1, 2)
+    volumes = volumes[~np.isnan(volumes[:, 1])]
+    timestamps = np.asarray(timestamps)
+    if len(volumes) == 0:
+        return np.full(len(timestamps), np.nan)
+
+    volumes = volumes[np.argsort(volumes[:, 0], kind='stable')]
+    sample_times = volumes[:, 0]
+    if label == 'left':
+        lo = np.searchsorted(sample_times, timestamps, side='left')
+        hi = np.searchsorted(sample_times, timestamps + width_ms, side='left')
+    else:
+        lo = np.searchsorted(sample_times, timestamps - width_ms, side='right')
+        hi = np.searchsorted(sample_times, timestamps, side='right')
+
+    totals = np.r_[0.0, np.cumsum(volumes[:, 1])]
+    counts = hi - lo
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = (totals[hi] - totals[lo]) / counts
+    return np.where(counts > 0, mean * width_ms / DAY_MS, np.nan)
+
+
+def stream_range_candles(api: CoinGeckoAPI, coin_id: str, vs_currency: str, start_ms: int, end_ms: int,
+                         width_ms: int) -> Iterator[Tuple[int, Candles]]:
+    """Fetch [start_ms, end_ms) chunk by chunk, yielding (chunk_end_ms, candles) in time order
+
+    At most api.max_workers chunks are in flight, and each response is folded
+    into compact candles before the next one is requested, so only a bounded
+    number of raw JSON payloads are ever held regardless of history length.
+    A failed chunk ends the stream, so what was yielded is always gap-free.
+    """
+    ranges = chunk_ranges(start_ms, end_ms, width_ms)
+    if not ranges:
+        return
+
+    def fetch(chunk):
+        data = api.get_market_chart_range(coin_id, vs_currency, *chunk)
+        if data is None:
+            return None
+        return candles_from_market_chart(data, width_ms, *chunk)
+
+    window = max(1, min(api.max_workers, len(ranges)))
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        pending = [executor.submit(fetch, chunk) for chunk in ranges[:window]]
+        submitted = len(pending)
+
+        for chunk in ranges:
+            candles = pending.pop(0).result()
+            if candles is None:
+                for future in pending:
+                    future.cancel()
+                return
+
+            if submitted < len(ranges):
+                pending.append(executor.submit(fetch, ranges[submitted]))
+                submitted += 1
+
+            yield chunk[1], candles
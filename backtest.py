@@ -0,0 +1,350 @@
+"""Vectorized backtest of the EMA crossover signal, plus a parallel period sweep.
+
+    python backtest.py --coins bitcoin,ethereum --timeframes 4H,1D
+    python backtest.py --top 50 --timeframes 1D --history-days 1095 --shorts 5:30 --longs 10:120:2
+
+Every series of a (periods, symbols) close matrix is replayed at once with
+array operations only: positions follow the EMA short/long state decided at
+each close, trades are the runs between crossovers, and per-trade results are
+aggregated with bincount instead of looping over bars.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from lazy_imports import lazy_import
+from trend_analyzer import CROSSOVER_LOOKBACK
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+STRENGTH_LEVELS = (0.6, 0.8, 1.0)
+
+
+def _wide(closes) -> Tuple[np.ndarray, List]:
+    """Closes as a (periods, symbols) array with each column's missing values moved to the top"""
+    if isinstance(closes, pd.DataFrame):
+        symbols = list(closes.columns)
+        values = closes.to_numpy(dtype=np.float64)
+    else:
+        values = np.asarray(closes, dtype=np.float64)
+        if values.ndim == 1:
+            values = values[:, None]
+        symbols = list(range(values.shape[1]))
+
+    missing = np.isnan(values)
+    if missing.any():
+        order = np.argsort(~missing, axis=0, kind='stable')
+        values = np.take_along_axis(values, order, axis=0)
+    return values, symbols
+
+
+def _ema(values: np.ndarray, span: int) -> np.ndarray:
+    return pd.DataFrame(values, copy=False).ewm(span=span, adjust=False).mean().to_numpy()
+
+
+def backtest_matrix(values: np.ndarray, ema_short: np.ndarray, ema_long: np.ndarray, long_period: int,
+                    allow_short: bool = False, fee: float = 0.0, strength: bool = True) -> Dict[str, np.ndarray]:
+    """Backtest every column of a top-aligned close matrix given its EMAs
+
+    The position decided at the close of bar t (long while EMA short > EMA long,
+    short or flat otherwise) earns bar t + 1's return, so there is no look-ahead.
+    Trading starts once long_period valid closes are available. fee is charged
+    per unit of position change. Returns per-symbol statistics as arrays,
+    including next-bar returns per strength level unless strength is False.
+    """
+    periods, symbols = values.shape
+    rows = np.arange(periods)[:, None]
+
+    valid = ~np.isnan(values)
+    first = valid.argmax(axis=0)
+    count = valid.sum(axis=0)
+    warm = valid & (rows >= first + long_period - 1)
+
+    bullish = ema_short > ema_long
+    position = np.where(bullish, 1.0, -1.0 if allow_short else 0.0)
+    position = np.where(warm, position, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = np.zeros_like(values)
+        returns[1:] = np.where(valid[:-1] & valid[1:], values[1:] / values[:-1] - 1, 0.0)
+
+    held = np.zeros_like(values)
+    held[1:] = position[:-1]
+    turnover = np.abs(np.diff(position, axis=0, prepend=0.0))
+    strategy = held * returns - fee * turnover
+
+    equity = np.cumprod(1 + strategy, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1
+
+    last_close = values[-1]
+    first_close = values[first, np.arange(symbols)]
+
+    # Trades are the runs of one non-zero position. Walking the position changes in
+    # column-major order, each entry's exit is the next change in the same column
+    # (or the last bar while still open), and its gross log return is the
+    # difference of the cumulative log return between the two.
+    changed = position != np.vstack([np.zeros((1, symbols)), position[:-1]])
+    change_at = np.flatnonzero(changed.T)
+    change_column, change_row = np.divmod(change_at, periods)
+    next_row = np.r_[change_row[1:], periods - 1]
+    next_row = np.where(np.r_[change_column[1:] == change_column[:-1], False], next_row, periods - 1)
+
+    entry = position.T.ravel()[change_at] != 0
+    trade_column, entry_row, exit_row = change_column[entry], change_row[entry], next_row[entry]
+    cum_log = np.cumsum(np.log1p(held * returns), axis=0)
+    trade_log = cum_log[exit_row, trade_column] - cum_log[entry_row, trade_column]
+
+    trades = np.bincount(trade_column, minlength=symbols)
+    wins = np.bincount(trade_column, weights=trade_log > 0, minlength=symbols)
+    bars = np.bincount(trade_column, weights=exit_row - entry_row, minlength=symbols)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        stats = {
+            'periods': count,
+            'total_return': equity[-1] - 1,
+            'buy_hold_return': last_close / first_close - 1,
+            'max_drawdown': drawdown.min(axis=0),
+            'trades': trades,
+            'hit_rate': np.where(trades > 0, wins / trades, np.nan),
+            'avg_hold': np.where(trades > 0, bars / trades, np.nan),
+            'exposure': np.where(count > 0, (held != 0).sum(axis=0) / count, np.nan)
+        }
+
+    if strength:
+        stats.update(_strength_stats(ema_short, ema_long, returns, warm))
+    return stats
+
+
+def _strength_stats(ema_short: np.ndarray, ema_long: np.ndarray, returns: np.ndarray,
+                    warm: np.ndarray) -> Dict[str, np.ndarray]:
+    """Next-bar return in the trend's direction for each TrendAnalyzer strength level
+
+    Rebuilds the per-bar strength of _summarize_crossover (0.6 base, 0.8 after a
+    crossover in the trend's direction within CROSSOVER_LOOKBACK periods, +0.2
+    when that crossover is at most 2 periods old) for every bar at once.
+    """
+    periods, symbols = ema_short.shape
+    rows = np.arange(periods)[:, None]
+
+    diff = ema_short - ema_long
+    previous = np.vstack([np.full((1, symbols), np.nan), diff[:-1]])
+    bull_cross = (previous <= 0) & (diff > 0)
+    bear_cross = (previous >= 0) & (diff < 0)
+
+    last_cross = np.maximum.accumulate(np.where(bull_cross | bear_cross, rows, -1), axis=0)
+    last_bull = np.take_along_axis(bull_cross, np.maximum(last_cross, 0), axis=0) & (last_cross >= 0)
+    periods_ago = np.where(last_cross >= 0, rows - last_cross + 1, 0)
+    recent = (periods_ago > 0) & (periods_ago <= CROSSOVER_LOOKBACK)
+
+    bullish = diff > 0
+    in_direction = recent & (last_bull == bullish)
+    strength = np.where(in_direction, 0.8, 0.6)
+    strength = np.where(recent & (periods_ago <= 2), np.minimum(1.0, strength + 0.2), strength)
+
+    # Return of the following bar, signed by the trend the strength was reported for
+    forward = np.zeros_like(returns)
+    forward[:-1] = np.where(bullish[:-1], returns[1:], -returns[1:])
+    usable = warm.copy()
+    usable[-1] = False
+
+    stats = {}
+    for level in STRENGTH_LEVELS:
+        mask = usable & np.isclose(strength, level)
+        bars = mask.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            stats[f'strength_{level:.1f}_bars'] = bars
+            stats[f'strength_{level:.1f}_return'] = np.where(bars > 0, np.where(mask, forward, 0).sum(axis=0) / bars, np.nan)
+            stats[f'strength_{level:.1f}_hit_rate'] = np.where(bars > 0, (mask & (forward > 0)).sum(axis=0) / bars, np.nan)
+    return stats
+
+
+def backtest_crossover(closes, short: int = 12, long: int = 21, allow_short: bool = False,
+                       fee: float = 0.0) -> pd.DataFrame:
+    """Backtest the EMA short/long crossover for every column of a wide close matrix
+
+    closes follows TrendAnalyzer.analyze_batch: a wide DataFrame or a
+    (periods, symbols) array; missing values are treated as not-yet-listed
+    periods. Returns one row of statistics per symbol.
+    """
+    values, symbols = _wide(closes)
+    stats = backtest_matrix(values, _ema(values, short), _ema(values, long), long, allow_short, fee)
+    return pd.DataFrame(stats, index=pd.Index(symbols, name='symbol'))
+
+
+# Close matrix and its EMA per period, shared with sweep worker processes through the pool initializer
+_sweep_values: Optional[np.ndarray] = None
+_sweep_emas: Dict[int, np.ndarray] = {}
+
+
+def _init_sweep_worker(values: np.ndarray, emas: Dict[int, np.ndarray]):
+    global _sweep_values, _sweep_emas
+    _sweep_values = values
+    _sweep_emas = emas
+
+
+def _sweep_short(short: int, longs: Sequence[int], allow_short: bool, fee: float) -> List[Dict]:
+    """Evaluate one short period against every long period from the precomputed EMAs"""
+    values = _sweep_values
+    ema_short = _sweep_emas[short]
+
+    rows = []
+    for long in longs:
+        stats = backtest_matrix(values, ema_short, _sweep_emas[long], long, allow_short, fee, strength=False)
+        traded = stats['trades'] > 0
+        rows.append({
+            'short': short,
+            'long': long,
+            'symbols': int(traded.sum()),
+            'mean_return': float(np.nanmean(stats['total_return'])),
+            'median_return': float(np.nanmedian(stats['total_return'])),
+            'mean_excess_return': float(np.nanmean(stats['total_return'] - stats['buy_hold_return'])),
+            'mean_max_drawdown': float(np.nanmean(stats['max_drawdown'])),
+            'hit_rate': float(stats['hit_rate'][traded].mean()) if traded.any() else np.nan,
+            'avg_hold': float(stats['avg_hold'][traded].mean()) if traded.any() else np.nan,
+            'trades': int(stats['trades'].sum())
+        })
+    return rows
+
+
+def sweep_ema_periods(closes, shorts: Iterable[int], longs: Iterable[int], allow_short: bool = False,
+                      fee: float = 0.0, processes: Optional[int] = None) -> pd.DataFrame:
+    """Backtest every short < long EMA period pair across all symbols in parallel
+
+    Every distinct period's EMA is computed once, up front, and the pairs reuse
+    them. Each worker process receives the close matrix and the EMAs once and
+    evaluates one short period against all longer periods per task. Returns one
+    row per pair with metrics averaged over symbols, best mean return first.
+    """
+    values, _ = _wide(closes)
+    longs = sorted(set(longs))
+    tasks = [(short, [long for long in longs if long > short]) for short in sorted(set(shorts))]
+    tasks = [(short, task_longs) for short, task_longs in tasks if task_longs]
+
+    spans = sorted({span for short, task_longs in tasks for span in (short, *task_longs)})
+    emas = {span: _ema(values, span) for span in spans}
+
+    rows: List[Dict] = []
+    if processes == 1:
+        _init_sweep_worker(values, emas)
+        for short, task_longs in tasks:
+            rows.extend(_sweep_short(short, task_longs, allow_short, fee))
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_sweep_worker,
+                                 initargs=(values, emas)) as executor:
+            futures = [executor.submit(_sweep_short, short, task_longs, allow_short, fee)
+                       for short, task_longs in tasks]
+            for future in futures:
+                rows.extend(future.result())
+
+    table = pd.DataFrame(rows)
+    if table.empty:
+        return table
+    return table.sort_values('mean_return', ascending=False, ignore_index=True)
+
+
+def parse_range(text: str) -> List[int]:
+    """Parse 'start:stop[:step]' (inclusive) or a comma-separated list of periods"""
+    if ':' in text:
+        parts = [int(part) for part in text.split(':')]
+        start, stop, step = parts[0], parts[1], parts[2] if len(parts) > 2 else 1
+        return list(range(start, stop + 1, step))
+    return [int(part) for part in text.split(',') if part.strip()]
+
+
+def parse_args(argv=None):
+    from coingecko_api import TIMEFRAMES
+    from cli import FORMATS
+
+    parser = argparse.ArgumentParser(description='Backtest the EMA crossover signal and sweep its periods')
+    coins = parser.add_mutually_exclusive_group()
+    coins.add_argument('--coins', default='bitcoin,ethereum,solana',
+                       help='Comma-separated CoinGecko coin ids (default: %(default)s)')
+    coins.add_argument('--top', type=int, help='Use the top N coins by market cap instead of --coins')
+    parser.add_argument('--timeframes', default='1D', help='Comma-separated timeframes (default: %(default)s)')
+    parser.add_argument('--history-days', type=int,
+                        help='Backfill this many days of hourly history instead of the /ohlc windows')
+    parser.add_argument('--short', type=int, default=12, help='EMA short period (default: %(default)s)')
+    parser.add_argument('--long', type=int, default=21, help='EMA long period (default: %(default)s)')
+    parser.add_argument('--shorts', type=parse_range, help="Sweep short periods, e.g. '5:30' or '5,8,12'")
+    parser.add_argument('--longs', type=parse_range, help="Sweep long periods, e.g. '10:120:2'")
+    parser.add_argument('--allow-short', action='store_true', help='Go short on bearish signals instead of flat')
+    parser.add_argument('--fee', type=float, default=0.0, help='Fee per unit of position change, e.g. 0.001')
+    parser.add_argument('--processes', type=int, help='Sweep worker processes (default: CPU count)')
+    parser.add_argument('--format', dest='output_format', choices=FORMATS, default='csv')
+    parser.add_argument('--output', '-o', default='-', help="Output path, '-' for stdout (default)")
+    parser.add_argument('--vs-currency', default='usd')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent requests (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    args.timeframes = [tf.strip().upper() for tf in args.timeframes.split(',') if tf.strip()]
+    unknown = [tf for tf in args.timeframes if tf not in TIMEFRAMES]
+    if unknown:
+        parser.error(f"unknown timeframe(s) {', '.join(unknown)}; choose from {', '.join(TIMEFRAMES)}")
+    if (args.shorts is None) != (args.longs is None):
+        parser.error('--shorts and --longs must be given together')
+
+    return args
+
+
+def load_closes(api, coin_ids: Sequence[str], timeframes: Sequence[str], vs_currency: str = 'usd',
+                history_days: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """Fetch and resample every coin into one wide close matrix per timeframe"""
+    from coingecko_api import TIMEFRAME_DAYS
+
+    if history_days:
+        groups = [(list(timeframes), api.get_range_candles_many(coin_ids, vs_currency=vs_currency, days=history_days))]
+    else:
+        groups = [
+            ([tf for tf in timeframes if TIMEFRAME_DAYS[tf] == days],
+             api.get_ohlc_candles_many(coin_ids, vs_currency=vs_currency, days=days))
+            for days in sorted({TIMEFRAME_DAYS[tf] for tf in timeframes})
+        ]
+
+    series: Dict[str, Dict[str, pd.Series]] = {tf: {} for tf in timeframes}
+    for group_timeframes, raw in groups:
+        for coin_id, candles in zip(coin_ids, raw):
+            if candles.is_empty:
+                continue
+            for timeframe, resampled in api.resample_all(candles, group_timeframes).items():
+                if not resampled.is_empty:
+                    series[timeframe][coin_id] = pd.Series(resampled['close'], index=resampled.index, copy=False)
+
+    return {tf: pd.concat(closes, axis=1, sort=True) for tf, closes in series.items() if closes}
+
+
+def main(argv=None) -> int:
+    from cli import write_table
+    from coingecko_api import CoinGeckoAPI
+
+    args = parse_args(argv)
+    api = CoinGeckoAPI(max_workers=args.workers)
+
+    if args.top:
+        coin_ids = [coin['id'] for coin in api.get_top_coins(args.top, vs_currency=args.vs_currency)]
+    else:
+        coin_ids = [coin_id.strip() for coin_id in args.coins.split(',') if coin_id.strip()]
+
+    closes_by_timeframe = load_closes(api, coin_ids, args.timeframes, args.vs_currency, args.history_days)
+    if not closes_by_timeframe:
+        print('No data to backtest', file=sys.stderr)
+        return 1
+
+    tables = []
+    for timeframe, closes in closes_by_timeframe.items():
+        if args.shorts is not None:
+            table = sweep_ema_periods(closes, args.shorts, args.longs, args.allow_short, args.fee, args.processes)
+        else:
+            table = backtest_crossover(closes, args.short, args.long, args.allow_short, args.fee).reset_index()
+        table.insert(0, 'timeframe', timeframe)
+        tables.append(table)
+
+    write_table(pd.concat(tables, ignore_index=True), args.output_format, args.output)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
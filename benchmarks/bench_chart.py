@@ -0,0 +1,66 @@
+"""Compare price chart payload size and build time with and without downsampling.
+
+    python benchmarks/bench_chart.py --sizes 1000 10000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.io as pio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chart_visualizer import CHART_MAX_POINTS, ChartVisualizer  # noqa: E402
+from trend_analyzer import TrendAnalyzer  # noqa: E402
+
+
+def synthetic_frame(size: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+    open_ = np.r_[close[0], close[:-1]]
+    return pd.DataFrame({
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + rng.random(size) * 0.005),
+        'low': np.minimum(open_, close) * (1 - rng.random(size) * 0.005),
+        'close': close,
+        'volume': rng.random(size) * 1e6
+    }, index=pd.date_range('2020-01-01', periods=size, freq='h'))
+
+
+def build(visualizer, df, analysis, max_points):
+    start = time.perf_counter()
+    figure = visualizer.create_price_chart(df, 'Synthetic', analysis, '1H', max_points=max_points)
+    payload = pio.to_json(figure, validate=False)
+    return figure, len(payload), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    args = parser.parse_args()
+
+    analyzer = TrendAnalyzer()
+    visualizer = ChartVisualizer()
+
+    for size in args.sizes:
+        df = analyzer.add_ema_columns(synthetic_frame(size, seed=size))
+        analysis = analyzer.analyze_ema_crossover(df)
+
+        _, full_bytes, full_time = build(visualizer, df, analysis, None)
+        figure, bytes_, seconds = build(visualizer, df, analysis, CHART_MAX_POINTS)
+
+        # Downsampling must keep every extreme of the full series
+        candles = figure.data[0]
+        assert max(candles.high) == df['high'].max() and min(candles.low) == df['low'].min()
+
+        print(f'{size} candles')
+        print(f'  full:        {full_bytes / 1024:9.0f} KB {full_time * 1000:8.1f} ms')
+        print(f'  downsampled: {bytes_ / 1024:9.0f} KB {seconds * 1000:8.1f} ms '
+              f'({len(candles.x)} candles, {full_bytes / bytes_:.0f}x smaller)')
+
+
+if __name__ == '__main__':
+    main()
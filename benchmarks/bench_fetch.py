@@ -0,0 +1,64 @@
+"""Compare sequential and concurrent OHLC fetching against the local stub, and check derived quotes.
+
+    python benchmarks/bench_fetch.py --coins 50 --latency 0.2
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candles import Candles  # noqa: E402
+from coingecko_api import CoinGeckoAPI  # noqa: E402
+from coingecko_stub import CoinGeckoStub  # noqa: E402
+
+
+def check_quotes(base_url: str, days: int):
+    """Derived quotes match the base series divided by the rate, and a failed rate series only empties them"""
+    api = CoinGeckoAPI(base_url=base_url, rate_limit=0, cache_dir='', shared_cache='', base_currency='usd')
+    usd, bitcoin = api.get_ohlc_candles_many(['solana', 'bitcoin'], days=days)
+    btc = api.get_ohlc_candles_many(['solana'], vs_currency='btc', days=days)[0]
+    assert (btc['close'] == usd['close'] / bitcoin['close']).all(), 'btc quote differs from usd / bitcoin'
+
+    load_ohlc = api._load_ohlc
+    api._load_ohlc = lambda coin_id, vs_currency, api_days: (
+        Candles.empty() if vs_currency == 'eur' else load_ohlc(coin_id, vs_currency, api_days))
+    eur = api.get_ohlc_candles_many(['solana', 'ethereum'], vs_currency='eur', days=days)
+    assert all(candles.is_empty for candles in eur), 'quote without a rate series is not empty'
+    print('  quotes ok')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--coins', type=int, default=50)
+    parser.add_argument('--days', type=int, default=30)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, default=16)
+    args = parser.parse_args()
+
+    coin_ids = [f'coin-{i}' for i in range(args.coins)]
+
+    with CoinGeckoStub(latency=args.latency) as stub:
+        api = CoinGeckoAPI(max_workers=args.workers, base_url=stub.base_url, rate_limit=0)
+
+        start = time.perf_counter()
+        sequential = [api.get_historical_data(coin_id, days=args.days) for coin_id in coin_ids]
+        sequential_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        concurrent = api.get_historical_data_many(coin_ids, days=args.days)
+        concurrent_time = time.perf_counter() - start
+
+    assert all(a.equals(b) for a, b in zip(sequential, concurrent)), 'batch results differ from sequential'
+
+    print(f'{args.coins} coins, {args.latency * 1000:.0f} ms latency, {args.workers} workers')
+    print(f'  sequential: {sequential_time:.2f}s')
+    print(f'  concurrent: {concurrent_time:.2f}s ({sequential_time / concurrent_time:.1f}x)')
+
+    with CoinGeckoStub() as stub:
+        check_quotes(stub.base_url, args.days)
+
+
+if __name__ == '__main__':
+    main()
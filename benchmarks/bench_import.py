@@ -0,0 +1,78 @@
+"""Check cold import times of the core modules against a budget.
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --scale 2   # looser budgets on slow machines
+
+Each module is imported in a fresh interpreter with `python -X importtime`.
+The run fails if a module exceeds its budget or pulls in a UI dependency.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cumulative import time budgets in milliseconds
+BUDGETS_MS = {
+    'trend_analyzer': 50,
+    'chart_visualizer': 50,
+    'coingecko_api': 250,
+    'ingestion': 250,
+    'screener': 250,
+    'cli': 250
+}
+
+# Modules the fetch and analysis core must never import
+FORBIDDEN = ('streamlit', 'plotly', 'pandas', 'numpy')
+
+
+def measure(module: str):
+    """Return the cumulative import time in ms and the names of all imported modules"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+
+    total_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or '|' not in line:
+            continue
+        _, cumulative, name = line.split('|')
+        name = name.strip()
+        imported.add(name)
+        if name == module:
+            total_us = int(cumulative)
+
+    return total_us / 1000, imported
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply every budget by this factor')
+    parser.add_argument('--runs', type=int, default=3, help='Best of N runs per module')
+    args = parser.parse_args()
+
+    failures = []
+    for module, budget in BUDGETS_MS.items():
+        budget *= args.scale
+        timings = []
+        for _ in range(args.runs):
+            elapsed, imported = measure(module)
+            timings.append(elapsed)
+        elapsed = min(timings)
+
+        leaked = sorted(name for name in FORBIDDEN if name in imported)
+        status = 'ok' if elapsed <= budget and not leaked else 'FAIL'
+        print(f'{module:<18} {elapsed:8.1f} ms  (budget {budget:.0f} ms)  {status}'
+              + (f"  imports {', '.join(leaked)}" if leaked else ''))
+
+        if status != 'ok':
+            failures.append(module)
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Count upstream requests when several dashboard replicas fetch the same coins at once.
+
+    python benchmarks/bench_replicas.py --replicas 1 2 4 8 --coins 20
+
+Every replica is a separate process with its own CoinGeckoAPI, started
+together against the local CoinGecko stub. Each one loads the /ohlc series
+and a /simple/price batch for the same coins, with no shared cache, a shared
+SQLite file and the local Redis-protocol stand-in. With a shared backend the
+upstream request count should not grow with the number of replicas.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coingecko_api import CoinGeckoAPI  # noqa: E402
+from coingecko_stub import CoinGeckoStub  # noqa: E402
+from resp_stub import RespStub  # noqa: E402
+
+
+def replica(base_url: str, shared_cache: str, coin_ids, barrier):
+    api = CoinGeckoAPI(base_url=base_url, cache_dir='', rate_limit=0, shared_cache=shared_cache)
+    barrier.wait()
+    api.get_ohlc_candles_many(coin_ids, days=30)
+    api.get_market_data(coin_ids)
+
+
+def run(replicas: int, shared_cache: str, coin_ids, latency: float):
+    with CoinGeckoStub(latency=latency) as stub:
+        barrier = multiprocessing.Barrier(replicas)
+        processes = [
+            multiprocessing.Process(target=replica, args=(stub.base_url, shared_cache, coin_ids, barrier))
+            for _ in range(replicas)
+        ]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+        return stub.request_count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--replicas', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--coins', type=int, default=20)
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub latency per request in seconds')
+    args = parser.parse_args()
+
+    coin_ids = [f'coin-{i}' for i in range(args.coins)]
+    with tempfile.TemporaryDirectory() as tmp, RespStub() as resp:
+        backends = {'none': '', 'sqlite': f"sqlite:{os.path.join(tmp, 'shared.sqlite3')}", 'redis': resp.url}
+        print(f"{'backend':8s} {'replicas':>8s} {'requests':>9s} {'seconds':>8s}")
+        for name, spec in backends.items():
+            for replicas in args.replicas:
+                # Start every run from an empty shared cache
+                if spec:
+                    CoinGeckoAPI(cache_dir='', shared_cache=spec).shared_cache.clear()
+                requests, seconds = run(replicas, spec, coin_ids, args.latency)
+                print(f'{name:8s} {replicas:8d} {requests:9d} {seconds:8.2f}', flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Check the NumPy resampler against pandas resample and compare their speed.
+
+    python benchmarks/bench_resample.py --sizes 1000 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candles import Candles  # noqa: E402
+from resampler import TIMEFRAME_BUCKETS, resample_all, resample_candles  # noqa: E402
+
+PANDAS_RULES = {'4H': '4h', '6H': '6h', '12H': '12h', '1D': '1D', '2D': '2D', '3D': '3D', '1W': '1W'}
+STEP_MS = {'30m': 30 * 60 * 1000, '4h': 4 * 60 * 60 * 1000}
+
+
+def synthetic_candles(size: int, step_ms: int, seed: int) -> Candles:
+    """Random-walk candles starting mid-week at an odd minute, with a few missing values"""
+    rng = np.random.default_rng(seed)
+    start = int(pd.Timestamp('2023-03-08 05:30').value // 1_000_000) + int(rng.integers(0, 86_400_000))
+    timestamps = start + np.arange(size, dtype=np.int64) * step_ms
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, size)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.random(size) * 0.005)
+    low = np.minimum(open_, close) * (1 - rng.random(size) * 0.005)
+    values = np.vstack([open_, high, low, close, rng.random(size) * 1e6])
+    values[:, rng.choice(size, size // 200, replace=False)] = np.nan
+    values[3, rng.choice(size, size // 500, replace=False)] = np.nan
+    values[4, rng.choice(size, size // 100, replace=False)] = np.nan
+
+    return Candles(timestamps, np.ascontiguousarray(values), ('open', 'high', 'low', 'close', 'volume'))
+
+
+def pandas_resample(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    return df.resample(PANDAS_RULES[timeframe]).agg({
+        'open': 'first',
+        'high': 'max',
+        'low': 'min',
+        'close': 'last'
+    }).dropna().join(df['volume'].resample(PANDAS_RULES[timeframe]).sum(min_count=1))
+
+
+def check_parity(candles: Candles, label: str):
+    df = candles.to_frame()
+    one_pass = resample_all(candles)
+
+    for timeframe in TIMEFRAME_BUCKETS:
+        expected = pandas_resample(df, timeframe)
+
+        for name, actual in (('single', resample_candles(candles, timeframe)), ('one-pass', one_pass[timeframe])):
+            frame = actual.to_frame()
+            pd.testing.assert_index_equal(frame.index, expected.index.as_unit('ms'), check_names=False)
+            np.testing.assert_allclose(frame.to_numpy(), expected.to_numpy(), rtol=1e-12,
+                                       err_msg=f'{label} {timeframe} {name}')
+
+    print(f'  parity ok: {label}')
+
+
+def best_of(fn, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        for granularity, step_ms in STEP_MS.items():
+            check_parity(synthetic_candles(size, step_ms, seed=size), f'{size} x {granularity}')
+
+    print()
+    for size in args.sizes:
+        candles = synthetic_candles(size, STEP_MS['30m'], seed=size)
+        df = candles.to_frame()
+
+        pandas_time = best_of(lambda: [pandas_resample(df, tf) for tf in TIMEFRAME_BUCKETS])
+        numpy_time = best_of(lambda: [resample_candles(candles, tf) for tf in TIMEFRAME_BUCKETS])
+        one_pass_time = best_of(lambda: resample_all(candles))
+
+        print(f'{size} candles, all {len(TIMEFRAME_BUCKETS)} timeframes')
+        print(f'  pandas:          {pandas_time * 1000:8.2f} ms')
+        print(f'  numpy:           {numpy_time * 1000:8.2f} ms ({pandas_time / numpy_time:.1f}x)')
+        print(f'  numpy one-pass:  {one_pass_time * 1000:8.2f} ms ({pandas_time / one_pass_time:.1f}x)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,222 @@
+"""Time the main pipeline stages across series lengths and symbol counts, and flag regressions.
+
+    python benchmarks/bench_suite.py --output results.json
+    python benchmarks/bench_suite.py --output new.json --baseline results.json
+    python benchmarks/bench_suite.py --sizes 1000 100000 --symbols 1 50 --throttle-rate 0.05
+
+Each stage is timed over every combination of candles per symbol (--sizes)
+and symbol count (--symbols):
+
+- get_historical_data: get_historical_data_many against the local stub, whose
+  /ohlc responses have the requested length (optionally with injected 429s)
+- resample_data: 4H and 1D resampling of hourly candles
+- analyze_ema_crossover, _find_crossovers and create_price_chart on each series
+
+Series are synthetic random walks in the /ohlc [timestamp, open, high, low,
+close] row shape. Combinations above --max-candles total candles
+(--max-fetch-candles for the HTTP stage) are recorded as skipped. Results are
+saved as JSON. With --baseline, every case slower than the baseline by more
+than --tolerance (and --min-delta seconds) is reported, and the exit status
+is 1.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from candles import Candles  # noqa: E402
+from chart_visualizer import ChartVisualizer  # noqa: E402
+from coingecko_api import CoinGeckoAPI  # noqa: E402
+from coingecko_stub import CoinGeckoStub  # noqa: E402
+from trend_analyzer import TrendAnalyzer  # noqa: E402
+
+HOUR_MS = 60 * 60 * 1000
+STAGES = ('get_historical_data', 'resample_data', 'analyze_ema_crossover', '_find_crossovers', 'create_price_chart')
+RESAMPLE_TIMEFRAMES = ('4H', '1D')
+
+
+def synthetic_ohlc_rows(length: int, seed: int, interval_ms: int = HOUR_MS) -> np.ndarray:
+    """Random-walk candles as a (length, 5) array of /ohlc rows; .tolist() gives the JSON body"""
+    rng = np.random.default_rng(seed)
+    end_ms = 1_700_000_000_000 // interval_ms * interval_ms
+    timestamps = end_ms - (length - 1 - np.arange(length)) * interval_ms
+
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, length)))
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) * (1 + rng.random(length) * 0.005)
+    low = np.minimum(open_, close) * (1 - rng.random(length) * 0.005)
+    return np.column_stack([timestamps, open_, high, low, close])
+
+
+def best_of(fn, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def time_fetch(length: int, symbols: int, repeat: int, args) -> float:
+    coin_ids = [f'coin-{i}' for i in range(symbols)]
+    with CoinGeckoStub(latency=args.latency, ohlc_length=length, throttle_rate=args.throttle_rate,
+                       retry_after=0) as stub:
+        api = CoinGeckoAPI(base_url=stub.base_url, cache_dir='', rate_limit=0, max_workers=args.workers,
+                           fetch_volume=False)
+        # Warm the stub's payload cache for every coin so series generation isn't timed
+        api.get_historical_data_many(coin_ids)
+        return best_of(lambda: api.get_historical_data_many(coin_ids), repeat)
+
+
+def time_offline(stage: str, length: int, symbols: int, repeat: int) -> float:
+    """Total time of one stage over every symbol; inputs are built outside the timed region"""
+    api = CoinGeckoAPI(cache_dir='')
+    analyzer = TrendAnalyzer()
+    visualizer = ChartVisualizer()
+
+    total = 0.0
+    for symbol in range(symbols):
+        rows = synthetic_ohlc_rows(length, seed=symbol)
+        candles = Candles(rows[:, 0].astype(np.int64), np.ascontiguousarray(rows[:, 1:].T))
+
+        if stage == 'resample_data':
+            def run():
+                for timeframe in RESAMPLE_TIMEFRAMES:
+                    api.resample_data(candles, timeframe)
+        elif stage == 'analyze_ema_crossover':
+            df = candles.to_frame()
+
+            def run():
+                analyzer.analyze_ema_crossover(df)
+        elif stage == '_find_crossovers':
+            df = analyzer.add_ema_columns(candles.to_frame())
+
+            def run():
+                visualizer._find_crossovers(df['EMA_12'], df['EMA_21'])
+        else:
+            df = analyzer.add_ema_columns(candles.to_frame())
+            analysis = analyzer.analyze_ema_crossover(df)
+
+            def run():
+                visualizer.create_price_chart(df, f'coin-{symbol}', analysis, '1H')
+
+        total += best_of(run, repeat)
+    return total
+
+
+def run_suite(args) -> dict:
+    results = {}
+    for stage in args.stages:
+        for length in args.sizes:
+            for symbols in args.symbols:
+                key = f'{stage}/{length}x{symbols}'
+                total_candles = length * symbols
+                limit = args.max_fetch_candles if stage == 'get_historical_data' else args.max_candles
+                if total_candles > limit:
+                    results[key] = {'stage': stage, 'candles': length, 'symbols': symbols,
+                                    'skipped': f'{total_candles} candles > {limit}'}
+                    continue
+
+                repeat = args.repeat if total_candles <= 1_000_000 else 1
+                # resample_data warns about short series on stdout; keep the report readable
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if stage == 'get_historical_data':
+                        seconds = time_fetch(length, symbols, repeat, args)
+                    else:
+                        seconds = time_offline(stage, length, symbols, repeat)
+
+                results[key] = {'stage': stage, 'candles': length, 'symbols': symbols, 'seconds': seconds,
+                                'per_symbol_ms': seconds / symbols * 1000, 'repeat': repeat}
+                print(f'  {key:45s} {seconds * 1000:10.1f} ms  ({seconds / symbols * 1000:.2f} ms/symbol)',
+                      flush=True)
+    return results
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'commit': commit,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count()
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_delta: float) -> list:
+    """Cases slower than the baseline by more than tolerance (relative) and min_delta seconds"""
+    regressions = []
+    for key, result in results.items():
+        before = baseline.get(key, {})
+        if 'seconds' not in result or 'seconds' not in before:
+            continue
+        ratio = result['seconds'] / before['seconds'] if before['seconds'] > 0 else float('inf')
+        if ratio > 1 + tolerance and result['seconds'] - before['seconds'] > min_delta:
+            regressions.append((key, before['seconds'], result['seconds'], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--symbols', type=int, nargs='+', default=[1, 50, 500])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help='Best of N runs for cases up to 1M total candles')
+    parser.add_argument('--max-candles', type=int, default=5_000_000,
+                        help='Skip offline cases above this many total candles (default: %(default)s)')
+    parser.add_argument('--max-fetch-candles', type=int, default=1_000_000,
+                        help='Skip fetch cases above this many total candles (default: %(default)s)')
+    parser.add_argument('--latency', type=float, default=0.0, help='Stub latency per request in seconds')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of stub requests answered with 429')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent fetch requests')
+    parser.add_argument('--output', '-o', help='Write results JSON to this path')
+    parser.add_argument('--baseline', help='Results JSON of an earlier run to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Relative slowdown flagged as a regression (default: %(default)s)')
+    parser.add_argument('--min-delta', type=float, default=0.005,
+                        help='Ignore slowdowns smaller than this many seconds (default: %(default)s)')
+    args = parser.parse_args()
+
+    print(f'{len(args.stages)} stages x {len(args.sizes)} sizes x {len(args.symbols)} symbol counts')
+    report = {'environment': environment(), 'settings': {
+        'latency': args.latency, 'throttle_rate': args.throttle_rate, 'workers': args.workers,
+        'resample_timeframes': list(RESAMPLE_TIMEFRAMES)
+    }, 'results': run_suite(args)}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'Results written to {args.output}')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report['results'], baseline['results'], args.tolerance, args.min_delta)
+        if regressions:
+            print(f'\n{len(regressions)} regression(s) against {args.baseline} '
+                  f"({baseline['environment'].get('commit') or 'unknown commit'}):")
+            for key, before, after, ratio in regressions:
+                print(f'  {key:45s} {before * 1000:10.1f} ms -> {after * 1000:10.1f} ms ({ratio:.2f}x)')
+            sys.exit(1)
+        print(f'\nNo regressions against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""Local stand-in for the CoinGecko REST endpoints used by the dashboard.
+
+Serves deterministic synthetic data with the same JSON shape as the real API,
+so fetch code can be exercised and benchmarked without network access:
+
+    python benchmarks/coingecko_stub.py --port 8765 --latency 0.2
+    python benchmarks/coingecko_stub.py --ohlc-length 100000 --throttle-rate 0.1
+
+--ohlc-length makes /ohlc return that many candles whatever the days value,
+and --throttle-rate answers that fraction of requests with 429 Too Many
+Requests (with --retry-after seconds in the Retry-After header).
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def ohlc_interval_ms(days: int) -> int:
+    """Candle width CoinGecko uses for a given /ohlc days value"""
+    if days <= 2:
+        return 30 * 60 * 1000
+    if days <= 30:
+        return 4 * 60 * 60 * 1000
+    return 4 * 24 * 60 * 60 * 1000
+
+
+def synthetic_price(coin_id: str, timestamp_ms: int) -> float:
+    """Deterministic price for a coin at a point in time
+
+    Prices depend only on the timestamp, so overlapping windows fetched with
+    different days values agree with each other, just like the real API.
+    """
+    seed = zlib.crc32(coin_id.encode())
+    base = 1 + seed % 50000
+    hours = timestamp_ms / 3_600_000
+    phase = seed % 1000
+    trend = 0.25 * math.sin((hours + phase) / 500) + 0.1 * math.sin((hours + phase) / 37)
+    noise = (zlib.crc32(f'{coin_id}:{timestamp_ms}'.encode()) / 0xFFFFFFFF - 0.5) * 0.01
+    return base * (1 + trend + noise)
+
+
+def synthetic_ohlc(coin_id: str, days: int, end_ms: Optional[int] = None, count: Optional[int] = None) -> List[list]:
+    """Generate an OHLC series in the /ohlc list-of-lists shape
+
+    count overrides the number of candles the days value would give, keeping
+    that window's candle width.
+    """
+    interval = ohlc_interval_ms(days)
+    end_ms = end_ms if end_ms is not None else int(time.time() * 1000)
+    end_ms -= end_ms % interval
+    if count is None:
+        count = days * 24 * 60 * 60 * 1000 // interval
+
+    rows = []
+    for i in range(count):
+        timestamp = end_ms - (count - 1 - i) * interval
+        open_ = synthetic_price(coin_id, timestamp - interval)
+        close = synthetic_price(coin_id, timestamp)
+        wick = 1 + (zlib.crc32(f'{coin_id}:{timestamp}:wick'.encode()) / 0xFFFFFFFF) * 0.004
+        rows.append([timestamp, round(open_, 8), round(max(open_, close) * wick, 8),
+                     round(min(open_, close) / wick, 8), round(close, 8)])
+    return rows
+
+
+def market_chart_interval_ms(range_ms: int) -> int:
+    """Sample spacing /market_chart/range picks automatically for a range length"""
+    if range_ms <= 24 * 60 * 60 * 1000:
+        return 5 * 60 * 1000
+    if range_ms <= 90 * 24 * 60 * 60 * 1000:
+        return 60 * 60 * 1000
+    return 24 * 60 * 60 * 1000
+
+
+def synthetic_volume(coin_id: str, timestamp_ms: int) -> float:
+    """Deterministic rolling 24h volume for a coin at a point in time"""
+    return synthetic_price(coin_id, timestamp_ms) * (1e6 + zlib.crc32(f'{coin_id}:{timestamp_ms}:vol'.encode()) % 10 ** 6)
+
+
+def synthetic_market_chart(coin_id: str, from_s: int, to_s: int) -> dict:
+    """Generate price, market cap and volume samples in the /market_chart/range shape"""
+    start_ms, end_ms = from_s * 1000, min(to_s * 1000, int(time.time() * 1000))
+    interval = market_chart_interval_ms(end_ms - start_ms)
+    first = -(-start_ms // interval) * interval
+
+    prices, market_caps, total_volumes = [], [], []
+    for timestamp in range(first, end_ms + 1, interval):
+        price = synthetic_price(coin_id, timestamp)
+        prices.append([timestamp, round(price, 8)])
+        market_caps.append([timestamp, round(price * 1e7, 2)])
+        total_volumes.append([timestamp, round(synthetic_volume(coin_id, timestamp), 2)])
+    return {'prices': prices, 'market_caps': market_caps, 'total_volumes': total_volumes}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        parts = [p for p in url.path.split('/') if p]
+
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+        with self.server.lock:
+            self.server.request_count += 1
+            throttled = self.server.throttle_rate and self.server.random.random() < self.server.throttle_rate
+            if throttled:
+                self.server.throttled_count += 1
+
+        if throttled:
+            headers = {} if self.server.retry_after is None else {'Retry-After': f'{self.server.retry_after:g}'}
+            self._send(429, {'status': {'error_code': 429, 'error_message': 'Too Many Requests'}}, headers)
+            return
+
+        if len(parts) >= 3 and parts[-3] == 'coins' and parts[-1] == 'ohlc':
+            days = int(params.get('days', 30))
+            if self.server.ohlc_length:
+                interval = ohlc_interval_ms(days)
+                end_ms = int(time.time() * 1000) // interval * interval
+                self._send_payload(200, self.server.ohlc_payload(parts[-2], days, end_ms))
+                return
+            body = synthetic_ohlc(parts[-2], days)
+        elif len(parts) >= 3 and parts[-3] == 'coins' and parts[-1] == 'market_chart':
+            now_s = int(time.time())
+            body = synthetic_market_chart(parts[-2], now_s - int(float(params.get('days', 30)) * 86400), now_s)
+        elif len(parts) >= 4 and parts[-4] == 'coins' and parts[-2:] == ['market_chart', 'range']:
+            body = synthetic_market_chart(parts[-3], int(float(params['from'])), int(float(params['to'])))
+        elif parts[-2:] == ['simple', 'price']:
+            vs = params.get('vs_currencies', 'usd')
+            body = {}
+            for coin_id in params.get('ids', '').split(','):
+                if coin_id:
+                    close = synthetic_ohlc(coin_id, 1)[-1][4]
+                    body[coin_id] = {vs: close, f'{vs}_24h_change': 0.0, f'{vs}_24h_vol': 0.0}
+        elif parts[-2:] == ['coins', 'markets']:
+            per_page = int(params.get('per_page', 100))
+            start = (int(params.get('page', 1)) - 1) * per_page
+            count = max(0, min(per_page, self.server.coin_count - start))
+            body = [
+                {
+                    'id': f'coin-{rank}',
+                    'symbol': f'c{rank}',
+                    'name': f'Coin {rank}',
+                    'current_price': synthetic_ohlc(f'coin-{rank}', 1)[-1][4],
+                    'market_cap': 10 ** 12 // rank,
+                    'market_cap_rank': rank,
+                    'price_change_percentage_24h': 0.0
+                }
+                for rank in range(start + 1, start + count + 1)
+            ]
+        else:
+            self._send(404, {'error': 'not found'})
+            return
+
+        self._send(200, body)
+
+    def _send(self, status: int, body, headers: Optional[dict] = None):
+        self._send_payload(status, json.dumps(body).encode(), headers)
+
+    def _send_payload(self, status: int, payload: bytes, headers: Optional[dict] = None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CoinGeckoStub(ThreadingHTTPServer):
+    """Threaded stub server; use as a context manager to run it in the background"""
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0, coin_count: int = 1000,
+                 ohlc_length: Optional[int] = None, throttle_rate: float = 0.0, retry_after: Optional[float] = None,
+                 seed: int = 0):
+        super().__init__((host, port), StubHandler)
+        self.latency = latency
+        self.coin_count = coin_count
+        self.ohlc_length = ohlc_length
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.request_count = 0
+        self.throttled_count = 0
+        self._thread = None
+        # Fixed-length /ohlc responses of the current candle, by (coin, days)
+        self._payloads = {}
+        self._payloads_end_ms = None
+
+    def ohlc_payload(self, coin_id: str, days: int, end_ms: int) -> bytes:
+        """Encoded fixed-length /ohlc response, kept for every coin until the series moves to a new candle
+
+        Large series are slow to build, so benchmarks warm this up for all their
+        coins before timing the client.
+        """
+        with self.lock:
+            if end_ms != self._payloads_end_ms:
+                self._payloads.clear()
+                self._payloads_end_ms = end_ms
+            payload = self._payloads.get((coin_id, days))
+
+        if payload is None:
+            payload = json.dumps(synthetic_ohlc(coin_id, days, end_ms, self.ohlc_length)).encode()
+            with self.lock:
+                if end_ms == self._payloads_end_ms:
+                    self._payloads[(coin_id, days)] = payload
+        return payload
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/v3'
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve synthetic CoinGecko data locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds of delay per request')
+    parser.add_argument('--ohlc-length', type=int, help='Candles per /ohlc response, whatever the days value')
+    parser.add_argument('--throttle-rate', type=float, default=0.0, help='Fraction of requests answered with 429')
+    parser.add_argument('--retry-after', type=float, help='Retry-After seconds sent with 429 responses')
+    args = parser.parse_args()
+
+    server = CoinGeckoStub(args.host, args.port, args.latency, ohlc_length=args.ohlc_length,
+                           throttle_rate=args.throttle_rate, retry_after=args.retry_after)
+    print(f'Serving stub CoinGecko API at {server.base_url}')
+    server.serve_forever()
@@ -0,0 +1,141 @@
+"""Local stand-in for a Redis server, for trying the redis:// cache backend without one.
+
+Speaks enough of the RESP protocol for RedisBackend: PING, AUTH, SELECT, GET,
+SET (with EX/PX/NX), DEL, EXISTS, KEYS, SCAN (with MATCH/COUNT) and FLUSHDB,
+with key expiry. Data lives in memory and is shared by every client:
+
+    python benchmarks/resp_stub.py --port 6380
+    CACHE_BACKEND=redis://127.0.0.1:6380/0 streamlit run app.py
+"""
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class RespHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                command = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if command is None:
+                return
+            self.wfile.write(self.server.execute(command))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b'*'):
+            # Inline command, e.g. from telnet
+            return line.split()
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            args.append(self.rfile.read(length + 2)[:-2])
+        return args
+
+
+def _bulk(value) -> bytes:
+    return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+
+
+class RespStub(socketserver.ThreadingTCPServer):
+    """Threaded in-memory key-value server; use as a context manager to run it in the background"""
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0):
+        super().__init__((host, port), RespHandler)
+        self.data = {}  # key -> (value, expires_at or None)
+        self.lock = threading.Lock()
+        self.commands = 0
+        self._scans = {}  # SCAN cursor -> keys not returned yet
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'redis://{host}:{port}/0'
+
+    def _live(self, key):
+        entry = self.data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return entry
+
+    def execute(self, command) -> bytes:
+        name, args = command[0].upper(), command[1:]
+        with self.lock:
+            self.commands += 1
+            if name in (b'PING', b'AUTH', b'SELECT'):
+                return b'+PONG\r\n' if name == b'PING' else b'+OK\r\n'
+            if name == b'GET':
+                entry = self._live(args[0])
+                return _bulk(entry[0] if entry else None)
+            if name == b'SET':
+                key, value, options = args[0], args[1], [arg.upper() for arg in args[2:]]
+                expires_at = None
+                if b'PX' in options:
+                    expires_at = time.monotonic() + int(options[options.index(b'PX') + 1]) / 1000
+                elif b'EX' in options:
+                    expires_at = time.monotonic() + int(options[options.index(b'EX') + 1])
+                if b'NX' in options and self._live(key) is not None:
+                    return _bulk(None)
+                self.data[key] = (value, expires_at)
+                return b'+OK\r\n'
+            if name in (b'DEL', b'EXISTS'):
+                found = [key for key in args if self._live(key) is not None]
+                if name == b'DEL':
+                    for key in found:
+                        del self.data[key]
+                return b':%d\r\n' % len(found)
+            if name == b'KEYS':
+                pattern = args[0].decode()
+                keys = [key for key in list(self.data) if self._live(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+                return b'*%d\r\n' % len(keys) + b''.join(_bulk(key) for key in keys)
+            if name == b'SCAN':
+                # Each scan walks a snapshot of the keys, so deleting returned keys skips nothing
+                options = [arg.upper() for arg in args[1:]]
+                pattern = args[options.index(b'MATCH') + 2].decode() if b'MATCH' in options else '*'
+                count = int(args[options.index(b'COUNT') + 2]) if b'COUNT' in options else 10
+                cursor = int(args[0])
+                pending = self._scans.pop(cursor, None) if cursor else list(self.data)
+                batch, pending = (pending or [])[:count], (pending or [])[count:]
+                if pending:
+                    cursor = max(self._scans, default=0) + 1
+                    self._scans[cursor] = pending
+                else:
+                    cursor = 0
+                keys = [key for key in batch if self._live(key) and fnmatch.fnmatchcase(key.decode(), pattern)]
+                return (b'*2\r\n' + _bulk(str(cursor).encode()) + b'*%d\r\n' % len(keys)
+                        + b''.join(_bulk(key) for key in keys))
+            if name == b'FLUSHDB':
+                self.data.clear()
+                return b'+OK\r\n'
+            return b'-ERR unknown command %s\r\n' % name
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve an in-memory Redis-protocol cache locally')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6380)
+    args = parser.parse_args()
+
+    server = RespStub(args.host, args.port)
+    print(f'Serving {server.url}')
+    server.serve_forever()
@@ -0,0 +1,73 @@
+"""Local webhook receiver for exercising alert delivery without a real endpoint.
+
+Records the JSON body of every POST; optionally fails the first requests to
+check how senders handle errors:
+
+    python benchmarks/webhook_stub.py --port 8766
+"""
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+
+        with self.server.lock:
+            if self.server.fail_next > 0:
+                self.server.fail_next -= 1
+                status = 503
+            else:
+                self.server.received.append(json.loads(body or b'null'))
+                status = 200
+                if self.server.echo:
+                    print(json.dumps(self.server.received[-1], indent=2), flush=True)
+
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookStub(ThreadingHTTPServer):
+    """Threaded webhook receiver; use as a context manager to run it in the background"""
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, fail_next: int = 0, echo: bool = False):
+        super().__init__((host, port), WebhookHandler)
+        self.fail_next = fail_next
+        self.echo = echo
+        self.received = []
+        self.lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/hook'
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+        self.server_close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Receive alert webhooks locally and print them')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8766)
+    args = parser.parse_args()
+
+    server = WebhookStub(args.host, args.port, echo=True)
+    print(f'Receiving webhooks at {server.url}')
+    server.serve_forever()
@@ -0,0 +1,365 @@
+"""Pluggable caches for fetched series: per-process LRU, SQLite file or a Redis-protocol server.
+
+    cache = create_backend('sqlite:/var/cache/crypto-dashboard/shared.sqlite3')
+    cache = create_backend('redis://cache-host:6379/0')
+    value = cache.get_or_load('ohlc:bitcoin:usd:30', fetch_bytes, ttl=300)
+
+Every backend stores bytes (MemoryBackend also holds plain objects) with a
+TTL, and offers a short lease lock per key. get_or_load takes the lease
+before loading, so when several processes miss the same key at once only the
+lease holder calls the loader; the others wait for its result to appear. The
+SQLite and Redis backends are shared by every process pointed at the same
+file or server, so the number of upstream fetches stays the same however many
+dashboard replicas run.
+"""
+from __future__ import annotations
+
+import abc
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from urllib.parse import urlparse
+
+from metrics import METRICS
+
+
+class CacheBackendError(Exception):
+    """A cache server replied with an error"""
+
+
+class CacheBackend(abc.ABC):
+    """Key-value store with per-entry TTL and cross-process lease locks"""
+
+    name = 'backend'
+
+    # How long a waiter polls for another process's load before loading itself
+    lock_timeout = 60.0
+    poll_interval = 0.05
+
+    @abc.abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        """Stored value for key, or None when it is missing or expired"""
+
+    @abc.abstractmethod
+    def set(self, key: str, value: Any, ttl: float):
+        """Store value under key for ttl seconds"""
+
+    @abc.abstractmethod
+    def delete(self, key: str):
+        """Drop key if it is stored"""
+
+    @abc.abstractmethod
+    def clear(self):
+        """Drop every entry of this cache"""
+
+    @abc.abstractmethod
+    def acquire(self, key: str, lease: float) -> Optional[str]:
+        """Take the lock on key for at most lease seconds without blocking; returns a token or None"""
+
+    @abc.abstractmethod
+    def release(self, key: str, token: str):
+        """Release the lock on key if token still holds it"""
+
+    def get_or_load(self, key: str, load: Callable[[], Optional[Any]], ttl: float,
+                    lease: Optional[float] = None, accept: Optional[Callable[[Any], bool]] = None) -> Optional[Any]:
+        """Cached value for key, calling load() in at most one process at a time when it is missing
+
+        A None result from load() isn't stored, so the next caller retries.
+        Waiters that don't see a value within the lease load it themselves.
+        Stored values failing accept(value) count as missing.
+        """
+        def lookup():
+            value = self.get(key)
+            return value if value is None or accept is None or accept(value) else None
+
+        value = lookup()
+        METRICS.count('cache_requests_total', cache=self.name, result='miss' if value is None else 'hit')
+        if value is not None:
+            return value
+
+        lease = lease or self.lock_timeout
+        deadline = time.monotonic() + lease
+        while True:
+            token = self.acquire(key, lease)
+            if token is not None:
+                try:
+                    # Another process may have stored it between our miss and the lock
+                    value = lookup()
+                    if value is None:
+                        value = load()
+                        if value is not None:
+                            self.set(key, value, ttl)
+                    return value
+                finally:
+                    self.release(key, token)
+
+            METRICS.count('cache_lock_waits_total', cache=self.name)
+            time.sleep(self.poll_interval)
+            value = lookup()
+            if value is not None:
+                return value
+            if time.monotonic() >= deadline:
+                return load()
+
+
+class MemoryBackend(CacheBackend):
+    """In-process LRU bounded by total size; values are bytes or objects with an nbytes attribute"""
+
+    name = 'memory'
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self._entries: OrderedDict[Hashable, tuple] = OrderedDict()  # key -> (expires_at, size, value)
+        self._locks: Dict[Hashable, tuple] = {}  # key -> (token, expires_at)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def keys(self) -> List[Hashable]:
+        """Snapshot of the stored keys, least recently used first"""
+        with self._lock:
+            return list(self._entries)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[2]
+
+    def set(self, key: Hashable, value: Any, ttl: float):
+        size = len(value) if isinstance(value, (bytes, bytearray)) else getattr(value, 'nbytes', sys.getsizeof(value))
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (time.monotonic() + ttl, size, value)
+            self.size += size
+            while self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                METRICS.count('cache_evictions_total', cache=self.name)
+
+    def _remove(self, key: Hashable):
+        self.size -= self._entries.pop(key)[1]
+
+    def delete(self, key: Hashable):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def acquire(self, key: Hashable, lease: float) -> Optional[str]:
+        with self._lock:
+            held = self._locks.get(key)
+            if held is not None and held[1] > time.monotonic():
+                return None
+            token = uuid.uuid4().hex
+            self._locks[key] = (token, time.monotonic() + lease)
+            return token
+
+    def release(self, key: Hashable, token: str):
+        with self._lock:
+            if self._locks.get(key, (None,))[0] == token:
+                del self._locks[key]
+
+
+class SQLiteBackend(CacheBackend):
+    """Cache file shared by every process on the host; locks are lease rows in the same file"""
+
+    name = 'sqlite'
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('CREATE TABLE IF NOT EXISTS entries '
+                         '(key TEXT PRIMARY KEY, value BLOB NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID')
+            conn.execute('CREATE TABLE IF NOT EXISTS locks '
+                         '(key TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL) WITHOUT ROWID')
+
+    @contextmanager
+    def _connect(self):
+        # A connection per call, like CandleCache, so one backend can be shared across threads.
+        # Closing it keeps no handle open across a fork, which SQLite doesn't support.
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._connect() as conn:
+            row = conn.execute('SELECT value FROM entries WHERE key = ? AND expires_at > ?',
+                               (key, time.time())).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float):
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('INSERT OR REPLACE INTO entries VALUES (?, ?, ?)', (key, value, now + ttl))
+            conn.execute('DELETE FROM entries WHERE expires_at <= ?', (now,))
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries WHERE key = ?', (key,))
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM entries')
+
+    def acquire(self, key: str, lease: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute('DELETE FROM locks WHERE key = ? AND expires_at <= ?', (key, now))
+            acquired = conn.execute('INSERT OR IGNORE INTO locks VALUES (?, ?, ?)',
+                                    (key, token, now + lease)).rowcount == 1
+        return token if acquired else None
+
+    def release(self, key: str, token: str):
+        with self._connect() as conn:
+            conn.execute('DELETE FROM locks WHERE key = ? AND token = ?', (key, token))
+
+
+class RedisBackend(CacheBackend):
+    """Minimal RESP client for Redis or any server speaking its protocol (GET/SET/DEL/SCAN)
+
+    Keys are namespaced with prefix so clear() only drops this app's entries.
+    Locks are SET NX PX leases.
+    """
+
+    name = 'redis'
+
+    def __init__(self, url: str = 'redis://127.0.0.1:6379/0', prefix: str = 'crypto_dashboard:',
+                 timeout: float = 5.0):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or '127.0.0.1'
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.strip('/') or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        """Per-thread socket and reader, opened (and authenticated) on first use"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            conn = self._local.conn = (sock, sock.makefile('rb'))
+            try:
+                if self.password:
+                    self._command('AUTH', self.password)
+                if self.db:
+                    self._command('SELECT', self.db)
+            except (OSError, CacheBackendError):
+                self._close()
+                raise
+        return conn
+
+    def _close(self):
+        sock, reader = self._local.conn
+        self._local.conn = None
+        reader.close()
+        sock.close()
+
+    def _command(self, *args) -> Any:
+        sock, reader = self._connection()
+        parts = [arg if isinstance(arg, bytes) else str(arg).encode() for arg in args]
+        request = b''.join([b'*%d\r\n' % len(parts)] + [b'$%d\r\n%s\r\n' % (len(part), part) for part in parts])
+        try:
+            sock.sendall(request)
+            return self._read_reply(reader)
+        except OSError:
+            # Drop the socket so the next command reconnects
+            self._close()
+            raise
+
+    def _read_reply(self, reader) -> Any:
+        line = reader.readline()
+        if not line:
+            raise ConnectionError('Cache server closed the connection')
+        kind, body = line[:1], line[1:-2]
+        if kind == b'+':
+            return body.decode()
+        if kind == b'-':
+            raise CacheBackendError(body.decode())
+        if kind == b':':
+            return int(body)
+        if kind == b'$':
+            length = int(body)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            count = int(body)
+            return None if count < 0 else [self._read_reply(reader) for _ in range(count)]
+        raise CacheBackendError(f"Unexpected reply {line!r}")
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self._command('GET', self.prefix + key)
+
+    def set(self, key: str, value: bytes, ttl: float):
+        self._command('SET', self.prefix + key, value, 'PX', max(int(ttl * 1000), 1))
+
+    def delete(self, key: str):
+        self._command('DEL', self.prefix + key)
+
+    def clear(self):
+        # SCAN walks the keyspace in batches instead of blocking the server like KEYS
+        cursor = b'0'
+        while True:
+            cursor, keys = self._command('SCAN', cursor, 'MATCH', self.prefix + '*', 'COUNT', 1000)
+            if keys:
+                self._command('DEL', *keys)
+            if cursor == b'0':
+                break
+
+    def acquire(self, key: str, lease: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        reply = self._command('SET', f'{self.prefix}lock:{key}', token, 'NX', 'PX', max(int(lease * 1000), 1))
+        return token if reply == 'OK' else None
+
+    def release(self, key: str, token: str):
+        # Only delete our own lease; one that expired may already belong to someone else
+        lock_key = f'{self.prefix}lock:{key}'
+        if self._command('GET', lock_key) == token.encode():
+            self._command('DEL', lock_key)
+
+
+def create_backend(spec: str) -> Optional[CacheBackend]:
+    """Parse a backend spec: memory[:MAX_MB], sqlite:PATH or redis://HOST:PORT/DB; empty means none"""
+    if not spec:
+        return None
+    if spec == 'memory' or spec.startswith('memory:'):
+        max_mb = spec.partition(':')[2]
+        return MemoryBackend(int(float(max_mb) * 1024 * 1024)) if max_mb else MemoryBackend()
+    if spec.startswith('sqlite:'):
+        return SQLiteBackend(spec[len('sqlite:'):])
+    if spec.startswith(('redis://', 'resp://')):
+        return RedisBackend(spec)
+    raise ValueError(f"Unknown cache backend {spec!r}; use memory[:MB], sqlite:PATH or redis://HOST:PORT/DB")
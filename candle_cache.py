@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import os
+import sqlite3
+from typing import Optional, Sequence
+
+from candles import Candles, OHLC_COLUMNS
+
+# /ohlc candle width depends only on the requested days, so series fetched with
+# different days values in the same class can be merged into one history.
+OHLC_GRANULARITY = {
+    1: '30m',
+    7: '4h',
+    14: '4h',
+    30: '4h',
+    90: '4d',
+    180: '4d',
+    365: '4d'
+}
+
+GRANULARITY_MS = {
+    '30m': 30 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '4d': 4 * 24 * 60 * 60 * 1000
+}
+
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Candles built from /market_chart/range samples carry volume and never expire
+RANGE_GRANULARITY = {
+    '1h': 60 * 60 * 1000,
+    '4h': 4 * 60 * 60 * 1000,
+    '1d': DAY_MS
+}
+
+
+class CandleCache:
+    """Persistent SQLite store of OHLC candles keyed by coin, quote currency and granularity"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'candles.sqlite3')
+
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS candles (
+                    coin_id TEXT NOT NULL,
+                    vs_currency TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    open REAL,
+                    high REAL,
+                    low REAL,
+                    close REAL,
+                    volume REAL,
+                    PRIMARY KEY (coin_id, vs_currency, granularity, timestamp)
+                ) WITHOUT ROWID
+            """)
+            # Caches created before volume was stored
+            if 'volume' not in [row[1] for row in conn.execute('PRAGMA table_info(candles)')]:
+                conn.execute('ALTER TABLE candles ADD COLUMN volume REAL')
+            # Earliest start each backfilled series has been fetched from
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS backfills (
+                    coin_id TEXT NOT NULL,
+                    vs_currency TEXT NOT NULL,
+                    granularity TEXT NOT NULL,
+                    start_ms INTEGER NOT NULL,
+                    PRIMARY KEY (coin_id, vs_currency, granularity)
+                ) WITHOUT ROWID
+            """)
+
+    def _connect(self) -> sqlite3.Connection:
+        # A connection per call keeps the cache safe to share across threads and processes
+        return sqlite3.connect(self.path, timeout=30)
+
+    def load(self, coin_id: str, vs_currency: str, granularity: str, since_ms: int = 0,
+             columns: Sequence[str] = OHLC_COLUMNS) -> Candles:
+        """Load stored candles newer than since_ms"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f'SELECT timestamp, {", ".join(columns)} FROM candles '
+                'WHERE coin_id = ? AND vs_currency = ? AND granularity = ? AND timestamp >= ? '
+                'ORDER BY timestamp',
+                (coin_id, vs_currency, granularity, since_ms)
+            ).fetchall()
+
+        return Candles.from_rows(rows, columns)
+
+    def save(self, coin_id: str, vs_currency: str, granularity: str, candles: Candles,
+             retention_days: Optional[int] = None):
+        """Upsert candles, replacing any stored candle with the same timestamp"""
+        if candles.is_empty:
+            return
+
+        volume = candles['volume'].tolist() if 'volume' in candles.columns else [None] * len(candles)
+        rows = zip(
+            [coin_id] * len(candles), [vs_currency] * len(candles), [granularity] * len(candles),
+            candles.timestamps.tolist(), *(candles[column].tolist() for column in OHLC_COLUMNS), volume
+        )
+
+        with self._connect() as conn:
+            conn.executemany(
+                'INSERT OR REPLACE INTO candles '
+                '(coin_id, vs_currency, granularity, timestamp, open, high, low, close, volume) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                rows
+            )
+            if retention_days:
+                conn.execute(
+                    'DELETE FROM candles WHERE coin_id = ? AND vs_currency = ? AND granularity = ? '
+                    'AND timestamp < ?',
+                    (coin_id, vs_currency, granularity, int(candles.timestamps[-1]) - retention_days * DAY_MS)
+                )
+
+    def backfill_start(self, coin_id: str, vs_currency: str, granularity: str) -> Optional[int]:
+        """Earliest time a backfilled series is known to be complete from, if any"""
+        with self._connect() as conn:
+            row = conn.execute(
+                'SELECT start_ms FROM backfills WHERE coin_id = ? AND vs_currency = ? AND granularity = ?',
+                (coin_id, vs_currency, granularity)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    def set_backfill_start(self, coin_id: str, vs_currency: str, granularity: str, start_ms: int):
+        """Record that a series has been fetched from start_ms onwards"""
+        with self._connect() as conn:
+            conn.execute(
+                'INSERT INTO backfills VALUES (?, ?, ?, ?) '
+                'ON CONFLICT (coin_id, vs_currency, granularity) DO UPDATE SET start_ms = MIN(start_ms, excluded.start_ms)',
+                (coin_id, vs_currency, granularity, start_ms)
+            )
+
+    def clear(self):
+        """Delete every stored candle"""
+        with self._connect() as conn:
+            conn.execute('DELETE FROM candles')
+            conn.execute('DELETE FROM backfills')
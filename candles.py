@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import struct
+from typing import Sequence
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+OHLC_COLUMNS = ('open', 'high', 'low', 'close')
+OHLCV_COLUMNS = OHLC_COLUMNS + ('volume',)
+
+# to_bytes() header: magic, format version, column count, period count, column names length
+_HEADER = struct.Struct('<4sBHIH')
+_MAGIC = b'CNDL'
+_VERSION = 1
+
+
+class Candles:
+    """Compact columnar OHLC candles
+
+    Timestamps are epoch milliseconds in a contiguous int64 array and prices live
+    in a single C-contiguous (columns, periods) float64 block, so each column is
+    a contiguous view and to_frame() can wrap the block without copying it.
+    Instances are treated as immutable; slicing returns views.
+    """
+    __slots__ = ('timestamps', 'values', 'columns')
+
+    def __init__(self, timestamps, values, columns: Sequence[str] = OHLC_COLUMNS):
+        self.timestamps = timestamps
+        self.values = values
+        self.columns = tuple(columns)
+
+    @classmethod
+    def empty(cls, columns: Sequence[str] = OHLC_COLUMNS) -> Candles:
+        return cls(np.empty(0, dtype=np.int64), np.empty((len(columns), 0), dtype=np.float64), columns)
+
+    @classmethod
+    def from_ohlc_json(cls, data) -> Candles:
+        """Build candles from the /ohlc list of [timestamp, open, high, low, close] rows"""
+        return cls.from_rows(data)
+
+    @classmethod
+    def from_rows(cls, data, columns: Sequence[str] = OHLC_COLUMNS) -> Candles:
+        """Build candles from [timestamp, *columns] rows; None values become NaN"""
+        if not data:
+            return cls.empty(columns)
+
+        # One parse pass into a (periods, 1 + columns) array, then a single transpose into the column block
+        rows = np.array(data, dtype=np.float64)
+        return cls(rows[:, 0].astype(np.int64), np.ascontiguousarray(rows[:, 1:].T), columns)
+
+    @classmethod
+    def concat(cls, parts: Sequence[Candles], columns: Sequence[str] = OHLC_COLUMNS) -> Candles:
+        """Join consecutive, non-overlapping series in a single copy"""
+        parts = [part for part in parts if not part.is_empty]
+        if not parts:
+            return cls.empty(columns)
+        if len(parts) == 1:
+            return parts[0]
+
+        return cls(
+            np.concatenate([part.timestamps for part in parts]),
+            np.concatenate([part.values for part in parts], axis=1),
+            parts[0].columns
+        )
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> Candles:
+        """Build candles from a DatetimeIndex-ed OHLC DataFrame"""
+        if df.empty:
+            return cls.empty()
+
+        columns = [c for c in df.columns if c in OHLC_COLUMNS or c == 'volume']
+        timestamps = df.index.as_unit('ms').asi8
+        values = np.ascontiguousarray(df[columns].to_numpy(dtype=np.float64).T)
+        return cls(np.ascontiguousarray(timestamps), values, columns)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def is_empty(self) -> bool:
+        return len(self.timestamps) == 0
+
+    @property
+    def nbytes(self) -> int:
+        return self.timestamps.nbytes + self.values.nbytes
+
+    def __getitem__(self, column: str):
+        """Get a column as a contiguous float64 array view"""
+        return self.values[self.columns.index(column)]
+
+    def with_column(self, column: str, values) -> Candles:
+        """Copy with a column added, or replaced when it already exists"""
+        values = np.asarray(values, dtype=np.float64)
+        if column in self.columns:
+            block = self.values.copy()
+            block[self.columns.index(column)] = values
+            return Candles(self.timestamps, block, self.columns)
+        return Candles(self.timestamps, np.vstack([self.values, values]), self.columns + (column,))
+
+    def slice(self, start: int = 0, stop=None) -> Candles:
+        """Positional slice sharing memory with this instance"""
+        return Candles(self.timestamps[start:stop], self.values[:, start:stop], self.columns)
+
+    def since(self, timestamp_ms: int) -> Candles:
+        """Candles at or after timestamp_ms"""
+        return self.slice(int(np.searchsorted(self.timestamps, timestamp_ms)))
+
+    def merge(self, newer: Candles) -> Candles:
+        """Combine with a more recent series; newer candles replace any overlap"""
+        if newer.is_empty:
+            return self
+        if self.is_empty:
+            return newer
+
+        keep = int(np.searchsorted(self.timestamps, newer.timestamps[0]))
+        return Candles(
+            np.concatenate([self.timestamps[:keep], newer.timestamps]),
+            np.concatenate([self.values[:, :keep], newer.values], axis=1),
+            self.columns
+        )
+
+    def to_bytes(self) -> bytes:
+        """Serialize as a short header, comma-separated column names and the raw little-endian arrays"""
+        names = ','.join(self.columns).encode()
+        return b''.join((
+            _HEADER.pack(_MAGIC, _VERSION, len(self.columns), len(self.timestamps), len(names)),
+            names,
+            np.ascontiguousarray(self.timestamps, dtype='<i8').tobytes(),
+            np.ascontiguousarray(self.values, dtype='<f8').tobytes()
+        ))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> Candles:
+        """Inverse of to_bytes; the arrays are read-only views of data"""
+        magic, version, column_count, periods, names_length = _HEADER.unpack_from(data)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"Not a serialized candle series (magic {magic!r}, version {version})")
+
+        offset = _HEADER.size + names_length
+        columns = data[_HEADER.size:offset].decode().split(',') if column_count else []
+        timestamps = np.frombuffer(data, dtype='<i8', count=periods, offset=offset)
+        values = np.frombuffer(data, dtype='<f8', count=column_count * periods, offset=offset + 8 * periods)
+        return cls(timestamps, values.reshape(column_count, periods), columns)
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Timestamps as a DatetimeIndex view"""
+        return pd.DatetimeIndex(self.timestamps.view('datetime64[ms]'), name='timestamp', copy=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Wrap the candles in a DataFrame without copying the price block"""
+        if self.is_empty:
+            return pd.DataFrame()
+
+        return pd.DataFrame(self.values.T, columns=list(self.columns), index=self.index, copy=False)
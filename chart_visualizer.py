@@ -1,7 +1,17 @@
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import pandas as pd
-import streamlit as st
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Optional
+
+from downsample import bucket_starts, downsample_candles, downsample_line
+from trend_analyzer import find_crossovers
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+# Candles drawn per price chart; longer series are merged into this many buckets
+CHART_MAX_POINTS = 1000
+
+# Plotly is imported inside the drawing methods so it only loads when a chart is drawn
 
 class ChartVisualizer:
     def __init__(self):
@@ -13,16 +23,29 @@ class ChartVisualizer:
             'candle_down': '#FF6B6B',
             'ema_12': '#2196F3',
             'ema_21': '#FF9800',
+            'vwap': '#9C27B0',
             'volume': 'rgba(158,158,158,0.3)'
         }
 
-    def create_price_chart(self, df: pd.DataFrame, crypto_name: str, analysis: dict, timeframe: str):
-        """Create an interactive price chart with trend analysis"""
+    def create_price_chart(self, df: pd.DataFrame, crypto_name: str, analysis: dict, timeframe: str,
+                           max_points: Optional[int] = CHART_MAX_POINTS, quote: str = 'usd'):
+        """Create an interactive price chart with trend analysis
+
+        Series longer than max_points are downsampled (see downsample.py) while
+        crossovers are still located on the full series; pass None to draw every
+        candle. The x range always spans the full series, and zoom and pan
+        survive redraws of the same coin, timeframe and quote currency.
+        """
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
+        starts = bucket_starts(len(df), max_points)
+        candles = downsample_candles(df, starts)
 
         # Create subplots
         fig = make_subplots(
             rows=2, cols=1,
-            shared_xaxis=True,
+            shared_xaxes=True,
             vertical_spacing=0.05,
             row_heights=[0.8, 0.2],
             subplot_titles=(f'{crypto_name} - {timeframe}', 'Volume')
@@ -31,11 +54,11 @@ class ChartVisualizer:
         # Candlestick chart
         fig.add_trace(
             go.Candlestick(
-                x=df.index,
-                open=df['open'],
-                high=df['high'],
-                low=df['low'],
-                close=df['close'],
+                x=candles.index,
+                open=candles['open'],
+                high=candles['high'],
+                low=candles['low'],
+                close=candles['close'],
                 name='Price',
                 increasing_line_color=self.colors['candle_up'],
                 decreasing_line_color=self.colors['candle_down'],
@@ -46,10 +69,11 @@ class ChartVisualizer:
 
         # Add EMAs if available
         if 'EMA_12' in df.columns:
+            ema_12 = downsample_line(df['EMA_12'], starts)
             fig.add_trace(
                 go.Scatter(
-                    x=df.index,
-                    y=df['EMA_12'],
+                    x=ema_12.index,
+                    y=ema_12,
                     mode='lines',
                     name='EMA 12',
                     line=dict(color=self.colors['ema_12'], width=2),
@@ -59,10 +83,11 @@ class ChartVisualizer:
             )
 
         if 'EMA_21' in df.columns:
+            ema_21 = downsample_line(df['EMA_21'], starts)
             fig.add_trace(
                 go.Scatter(
-                    x=df.index,
-                    y=df['EMA_21'],
+                    x=ema_21.index,
+                    y=ema_21,
                     mode='lines',
                     name='EMA 21',
                     line=dict(color=self.colors['ema_21'], width=2),
@@ -71,6 +96,20 @@ class ChartVisualizer:
                 row=1, col=1
             )
 
+        if 'VWAP' in df.columns:
+            vwap = downsample_line(df['VWAP'], starts)
+            fig.add_trace(
+                go.Scatter(
+                    x=vwap.index,
+                    y=vwap,
+                    mode='lines',
+                    name='VWAP',
+                    line=dict(color=self.colors['vwap'], width=1.5, dash='dot'),
+                    opacity=0.8
+                ),
+                row=1, col=1
+            )
+
         # Add trend annotations
         self._add_trend_annotations(fig, df, analysis)
 
@@ -78,8 +117,8 @@ class ChartVisualizer:
         if 'volume' in df.columns:
             fig.add_trace(
                 go.Bar(
-                    x=df.index,
-                    y=df['volume'],
+                    x=candles.index,
+                    y=candles['volume'],
                     name='Volume',
                     marker_color=self.colors['volume'],
                     showlegend=False
@@ -97,9 +136,16 @@ class ChartVisualizer:
             xaxis_rangeslider_visible=False,
             height=700,
             template='plotly_white',
-            hovermode='x unified'
+            hovermode='x unified',
+            # Keep the viewer's zoom when the chart is redrawn with newer data
+            uirevision=f'{crypto_name}-{timeframe}-{quote}'
         )
 
+        # Merged candles are labeled with their first timestamp, so pin the x
+        # range to the full series
+        if starts is not None:
+            fig.update_xaxes(range=[df.index[0], df.index[-1]])
+
         # Update axes
         fig.update_xaxes(
             title_text="Date",
@@ -109,7 +155,7 @@ class ChartVisualizer:
         )
 
         fig.update_yaxes(
-            title_text="Price (USD)",
+            title_text=f"Price ({quote.upper()})",
             showgrid=True,
             gridwidth=1,
             gridcolor='rgba(128,128,128,0.2)',
@@ -151,39 +197,45 @@ class ChartVisualizer:
             # Find recent crossovers
             crossovers = self._find_crossovers(ema_12, ema_21)
 
-            for i, (cross_type, cross_date) in enumerate(crossovers[-5:]):  # Last 5 crossovers
-                if cross_date in df.index:
-                    price_at_cross = df.loc[cross_date, 'close']
-                    color = self.colors['bullish'] if cross_type == 'bullish' else self.colors['bearish']
-                    symbol = '▲' if cross_type == 'bullish' else '▼'
-
-                    fig.add_annotation(
-                        x=cross_date,
-                        y=price_at_cross,
-                        text=symbol,
-                        showarrow=False,
-                        font=dict(color=color, size=20),
-                        bgcolor='white',
-                        bordercolor=color,
-                        borderwidth=2
-                    )
+            # Last 5 crossovers, drawn as one marker trace rather than an annotation each
+            recent = [(cross_type, cross_date) for cross_type, cross_date in crossovers[-5:] if cross_date in df.index]
+            if recent:
+                import plotly.graph_objects as go
+
+                cross_types, cross_dates = zip(*recent)
+                bullish = [cross_type == 'bullish' for cross_type in cross_types]
+                fig.add_trace(
+                    go.Scatter(
+                        x=list(cross_dates),
+                        y=df.loc[list(cross_dates), 'close'],
+                        mode='markers',
+                        name='Crossovers',
+                        text=['Bullish cross' if bull else 'Bearish cross' for bull in bullish],
+                        hoverinfo='text+x',
+                        marker=dict(
+                            symbol=['triangle-up' if bull else 'triangle-down' for bull in bullish],
+                            color=[self.colors['bullish'] if bull else self.colors['bearish'] for bull in bullish],
+                            size=14,
+                            line=dict(color='white', width=2)
+                        ),
+                        showlegend=False
+                    ),
+                    row=1, col=1
+                )
 
     def _find_crossovers(self, ema_short, ema_long):
         """Find EMA crossover points"""
-        crossovers = []
-
-        for i in range(1, len(ema_short)):
-            if (ema_short.iloc[i-1] <= ema_long.iloc[i-1] and
-                ema_short.iloc[i] > ema_long.iloc[i]):
-                crossovers.append(('bullish', ema_short.index[i]))
-            elif (ema_short.iloc[i-1] >= ema_long.iloc[i-1] and
-                  ema_short.iloc[i] < ema_long.iloc[i]):
-                crossovers.append(('bearish', ema_short.index[i]))
+        indices, directions = find_crossovers(ema_short, ema_long)
+        dates = ema_short.index[indices]
 
-        return crossovers
+        return [
+            ('bullish' if direction > 0 else 'bearish', date)
+            for direction, date in zip(directions, dates)
+        ]
 
     def create_trend_heatmap(self, trend_data: dict, timeframes: list):
         """Create a trend heatmap showing all cryptocurrencies across timeframes"""
+        import plotly.graph_objects as go
 
         cryptos = list(trend_data.keys())
 
@@ -236,8 +288,7 @@ class ChartVisualizer:
             hoverongaps=False,
             showscale=True,
             colorbar=dict(
-                title="Trend Strength",
-                titleside="right",
+                title=dict(text="Trend Strength", side="right"),
                 tickvals=[-1, 0, 1],
                 ticktext=["Bearish", "Neutral", "Bullish"]
             )
@@ -0,0 +1,154 @@
+"""Headless trend snapshots for cron jobs, alerting and backfills.
+
+    python cli.py --coins bitcoin,ethereum --timeframes 4H,1D --format json
+    python cli.py --top 200 --format parquet --output trends.parquet
+    python cli.py --coins bitcoin --history-days 1095 --timeframes 1D,1W
+    python cli.py --top 100 --metrics metrics.prom
+
+Reuses CoinGeckoAPI, resample_data and TrendAnalyzer.get_overall_trend without
+importing streamlit or plotly.
+"""
+from __future__ import annotations
+
+import argparse
+import sys
+from datetime import datetime, timezone
+from typing import Optional
+
+from coingecko_api import CoinGeckoAPI, TIMEFRAMES
+from ingestion import IngestionWorker
+from lazy_imports import lazy_import
+from metrics import METRICS
+from trend_analyzer import TrendAnalyzer
+
+pd = lazy_import('pandas')
+
+FORMATS = ['json', 'csv', 'parquet']
+
+
+def build_snapshot_table(api: CoinGeckoAPI, analyzer: TrendAnalyzer, coin_ids, timeframes,
+                         vs_currency: str = 'usd', history_days: Optional[int] = None) -> pd.DataFrame:
+    """Fetch, resample and analyze every coin and timeframe into one row per pair"""
+    snapshot = IngestionWorker(api, analyzer, coin_ids, timeframes, vs_currency=vs_currency,
+                               history_days=history_days).refresh()
+    generated_at = datetime.fromtimestamp(snapshot.created_at, timezone.utc).isoformat()
+
+    rows = []
+    for coin_id in coin_ids:
+        for timeframe in timeframes:
+            df, analysis = snapshot.get(coin_id, timeframe)
+            row = {'coin_id': coin_id, 'vs_currency': vs_currency, 'timeframe': timeframe,
+                   'generated_at': generated_at}
+
+            if analysis is None:
+                row['error'] = snapshot.errors.get((coin_id, timeframe), 'No data')
+            else:
+                row.update({
+                    'candle_time': df.index[-1].isoformat(),
+                    'close': float(df['close'].iloc[-1]),
+                    'trend': analysis['trend'],
+                    'strength': float(analysis['strength']),
+                    'ema_12': float(analysis['ema_12_value']),
+                    'ema_21': float(analysis['ema_21_value']),
+                    'ema_12_above_21': bool(analysis['ema_12_above_21']),
+                    'recent_bullish_cross': bool(analysis['recent_bullish_cross']),
+                    'recent_bearish_cross': bool(analysis['recent_bearish_cross']),
+                    'crossover_periods_ago': analysis['crossover_periods_ago'],
+                    'price_above_ema12': bool(analysis['price_above_ema12']),
+                    'price_above_ema21': bool(analysis['price_above_ema21']),
+                    'vwap': analysis['vwap'],
+                    'cross_volume_ratio': analysis['cross_volume_ratio'],
+                    'volume_confirmed': bool(analysis['volume_confirmed']),
+                    'score': analysis['score'],
+                    **{f'signal_{name}': value for name, value in analysis['signals'].items()}
+                })
+            rows.append(row)
+
+    table = pd.DataFrame(rows)
+    if 'crossover_periods_ago' in table:
+        table['crossover_periods_ago'] = table['crossover_periods_ago'].astype('Int64')
+    return table
+
+
+def write_table(table: pd.DataFrame, output_format: str, output: str):
+    """Write the table to a file, or to stdout for text formats when output is '-'"""
+    if output_format == 'parquet':
+        if output == '-':
+            raise ValueError('Parquet output needs a file path (--output)')
+        table.to_parquet(output, index=False)
+    elif output_format == 'csv':
+        table.to_csv(sys.stdout if output == '-' else output, index=False)
+    else:
+        text = table.to_json(orient='records', indent=2)
+        if output == '-':
+            print(text)
+        else:
+            with open(output, 'w') as f:
+                f.write(text + '\n')
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Write EMA 12/21 trend snapshots for many coins')
+    coins = parser.add_mutually_exclusive_group()
+    coins.add_argument('--coins', default='bitcoin,ethereum,solana',
+                       help='Comma-separated CoinGecko coin ids (default: %(default)s)')
+    coins.add_argument('--top', type=int, help='Use the top N coins by market cap instead of --coins')
+    parser.add_argument('--timeframes', default=','.join(TIMEFRAMES),
+                        help='Comma-separated timeframes (default: %(default)s)')
+    parser.add_argument('--format', dest='output_format', choices=FORMATS, default='json')
+    parser.add_argument('--output', '-o', default='-', help="Output path, '-' for stdout (default)")
+    parser.add_argument('--vs-currency', default='usd')
+    parser.add_argument('--workers', type=int, default=16, help='Concurrent requests (default: %(default)s)')
+    parser.add_argument('--history-days', type=int,
+                        help='Backfill this many days of hourly history from /market_chart/range '
+                             'instead of the fixed /ohlc windows')
+    parser.add_argument('--volume', action='store_true',
+                        help='Estimate /ohlc volume from /market_chart for VWAP and volume confirmation '
+                             '(one extra request per series)')
+    parser.add_argument('--clear-cache', action='store_true',
+                        help='Drop every entry in the shared cache (CACHE_BACKEND) before fetching; every '
+                             'replica using it fetches upstream again')
+    parser.add_argument('--metrics', metavar='PATH',
+                        help='Write stage timings and request counters to PATH (Prometheus text for .prom, '
+                             'JSON otherwise)')
+    args = parser.parse_args(argv)
+
+    args.timeframes = [tf.strip().upper() for tf in args.timeframes.split(',') if tf.strip()]
+    unknown = [tf for tf in args.timeframes if tf not in TIMEFRAMES]
+    if unknown:
+        parser.error(f"unknown timeframe(s) {', '.join(unknown)}; choose from {', '.join(TIMEFRAMES)}")
+
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.metrics:
+        METRICS.enable()
+
+    api = CoinGeckoAPI(max_workers=args.workers, fetch_volume=args.volume or None)
+    analyzer = TrendAnalyzer()
+    if args.clear_cache:
+        api.clear_cache()
+
+    if args.top:
+        coin_ids = [coin['id'] for coin in api.get_top_coins(args.top, vs_currency=args.vs_currency)]
+    else:
+        coin_ids = [coin_id.strip() for coin_id in args.coins.split(',') if coin_id.strip()]
+
+    if not coin_ids:
+        print('No coins to analyze', file=sys.stderr)
+        return 1
+
+    table = build_snapshot_table(api, analyzer, coin_ids, args.timeframes, vs_currency=args.vs_currency,
+                                 history_days=args.history_days)
+    write_table(table, args.output_format, args.output)
+    if args.metrics:
+        METRICS.write(args.metrics)
+
+    # Fail the cron job when nothing could be analyzed
+    return 0 if 'trend' in table and table['trend'].notna().any() else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,31 +1,225 @@
+from __future__ import annotations
+
 import requests
-import pandas as pd
+import json
 import os
-from dotenv import load_dotenv
-from typing import Dict, List, Optional
+import sqlite3
+import struct
+from concurrent.futures import ThreadPoolExecutor
+from candles import Candles, OHLCV_COLUMNS
+from backfill import candle_volume, stream_range_candles
+from cache_backends import CacheBackend, CacheBackendError, MemoryBackend, create_backend
+from candle_cache import CandleCache, OHLC_GRANULARITY, GRANULARITY_MS, DAY_MS, RANGE_GRANULARITY
+from resampler import TIMEFRAME_BUCKETS, resample_all, resample_candles
+from request_scheduler import RATE_LIMITS, SingleFlight, TokenBucket, backoff_delay, parse_retry_after
+from requests.adapters import HTTPAdapter
+from typing import Any, Dict, List, Optional, Tuple, Union
 import time
 
-load_dotenv()
+from lazy_imports import lazy_import
+from metrics import METRICS, endpoint_label
+from quotes import CRYPTO_QUOTES, FX_REFERENCE_COIN, QUOTE_CURRENCIES, convert_candles, fx_rates
+
+# pandas is only loaded once data is actually fetched or resampled
+pd = lazy_import('pandas')
+
+_env_loaded = False
+
+
+def _load_env():
+    """Load .env on first use rather than at import time"""
+    global _env_loaded
+    if not _env_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _env_loaded = True
+
+# CoinGecko OHLC API limits: 1, 7, 14, 30, 90, 180, 365
+VALID_OHLC_DAYS = [1, 7, 14, 30, 90, 180, 365]
+
+TIMEFRAMES = ['4H', '6H', '12H', '1D', '2D', '3D', '1W']
+
+# Days of historical data based on timeframe
+# CoinGecko API: ≤30 days = hourly data, >30 days = daily data
+TIMEFRAME_DAYS = {
+    '4H': 30,    # 30 days = ~180 hourly periods → 4H resampling
+    '6H': 30,    # 30 days = ~180 hourly periods → 6H resampling
+    '12H': 30,   # 30 days = ~180 hourly periods → 12H resampling
+    '1D': 30,    # 30 days = ~180 hourly periods → 1D resampling
+    '2D': 365,   # 365 days = ~365 daily periods → 2D resampling (~180 periods)
+    '3D': 365,   # 365 days = ~365 daily periods → 3D resampling (~120 periods)
+    '1W': 365    # 365 days = ~365 daily periods → 1W resampling (~52 periods)
+}
+
+# Status codes worth retrying after a backoff
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _encode_json(data) -> Optional[bytes]:
+    """Shared cache encoding of a JSON response; empty (failed) responses aren't cached"""
+    return json.dumps(data).encode() if data else None
+
+
+def _rebase_change(change: Optional[float], rate_change: Optional[float]) -> Optional[float]:
+    """24h % change of a price re-quoted in a currency whose own base price changed by rate_change %"""
+    if change is None or rate_change is None:
+        return None
+    return ((1 + change / 100) / (1 + rate_change / 100) - 1) * 100
+
 
 class CoinGeckoAPI:
-    def __init__(self):
-        self.api_key = os.getenv('COINGECKO_API_KEY')
-        self.base_url = 'https://api.coingecko.com/api/v3'
+    def __init__(self, ohlc_ttl: int = 300, max_workers: int = 8, base_url: Optional[str] = None,
+                 cache_dir: Optional[str] = None, rate_limit: Optional[float] = None,
+                 connect_timeout: float = 5, read_timeout: float = 30, max_retries: int = 4,
+                 shared_cache: Union[str, CacheBackend, None] = None, store_bytes: int = 256 * 1024 * 1024,
+                 market_ttl: float = 10, base_currency: Optional[str] = None,
+                 fetch_volume: Optional[bool] = None):
+        _load_env()
+        self.api_key = None
+        self.public_url = 'https://api.coingecko.com/api/v3'
         self.pro_url = 'https://pro-api.coingecko.com/api/v3'
+        self.base_url = self.public_url
         self.session = requests.Session()
 
+        # Request scheduling: per-plan throttling, timeouts, retries and coalescing
+        # of identical in-flight requests. rate_limit is in requests per minute and
+        # overrides the plan default (COINGECKO_RATE_LIMIT); 0 disables throttling.
+        if rate_limit is None and os.getenv('COINGECKO_RATE_LIMIT'):
+            rate_limit = float(os.getenv('COINGECKO_RATE_LIMIT'))
+        self.rate_limit = rate_limit
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self._inflight = SingleFlight()
+
+        # Size the connection pool so concurrent batch fetches reuse keep-alive sockets
+        self.max_workers = max_workers
+        adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Raw OHLC store shared by every timeframe, keyed by (coin, vs_currency, api_days),
+        # and backfilled series keyed by (coin, vs_currency, days, granularity); each is
+        # an LRU of at most store_bytes of candles
+        self.ohlc_ttl = ohlc_ttl
+        self._ohlc_store = MemoryBackend(store_bytes)
+        self._range_store = MemoryBackend(store_bytes)
+
+        # Optional cache shared with other processes (CACHE_BACKEND, e.g. sqlite:PATH or
+        # redis://HOST:PORT/DB), consulted before fetching so only one replica fetches a
+        # series. Candle entries fetched before _stale_before[(source, days)] (epoch
+        # seconds; days None covers every window of the source) are fetched again.
+        if shared_cache is None:
+            shared_cache = os.getenv('CACHE_BACKEND', '')
+        self.shared_cache = create_backend(shared_cache) if isinstance(shared_cache, str) else shared_cache
+        self.market_ttl = market_ttl
+        self._stale_before: Dict[Tuple[str, Optional[int]], float] = {}
+        # /simple/price responses, so workers ticking for several quotes share one request
+        self._market_store = MemoryBackend(16 * 1024 * 1024)
+
+        # With a base currency, the other QUOTE_CURRENCIES are derived from base series
+        # (see quotes.py) instead of being fetched per quote
+        self.base_currency = base_currency
+
+        # /ohlc has no volume; estimating it takes a /market_chart request per /ohlc
+        # request, so it is opt-in (OHLC_VOLUME=1). Without it volume is NaN.
+        if fetch_volume is None:
+            fetch_volume = os.getenv('OHLC_VOLUME', '').lower() in ('1', 'true', 'yes')
+        self.fetch_volume = fetch_volume
+
+        # Persistent candle history so restarts and TTL expiry only fetch a recent delta.
+        # An empty OHLC_CACHE_DIR disables the on-disk cache.
+        if cache_dir is None:
+            cache_dir = os.getenv('OHLC_CACHE_DIR', '.ohlc_cache')
+        self.candle_cache = CandleCache(cache_dir) if cache_dir else None
+
+        self.set_api_key(os.getenv('COINGECKO_API_KEY'))
+
+        # Explicit override, e.g. a local stub server for offline benchmarks, kept with or without a key
+        if base_url:
+            self.base_url = self.public_url = self.pro_url = base_url.rstrip('/')
+
+    def set_api_key(self, api_key: Optional[str]):
+        """Switch to the Pro API when a key is given and configure the rate limiter for the plan
+
+        Clearing the key switches back to the public API. Setting the current key
+        again is a no-op, so the limiter keeps its tokens.
+        """
+        api_key = api_key or None
+        if api_key == self.api_key and hasattr(self, 'rate_limiter'):
+            return
+        self.api_key = api_key
         if self.api_key:
             self.session.headers.update({'X-Cg-Pro-Api-Key': self.api_key})
             self.base_url = self.pro_url
+        else:
+            self.session.headers.pop('X-Cg-Pro-Api-Key', None)
+            self.base_url = self.public_url
+
+        limits = RATE_LIMITS['pro' if self.api_key else 'public']
+        per_minute = limits['per_minute'] if self.rate_limit is None else self.rate_limit
+        self.rate_limiter = TokenBucket(per_minute / 60, limits['burst'])
+
+    def _request(self, endpoint: str, params: Dict[str, Any]) -> Any:
+        """GET an endpoint and return the decoded JSON
+
+        Identical concurrent requests share one in-flight call. Each attempt waits
+        for a rate-limit token; 429 and 5xx responses, timeouts and connection
+        errors are retried with jittered exponential backoff, honoring Retry-After.
+        """
+        key = (endpoint, tuple(sorted(params.items())))
+        return self._inflight.do(key, lambda: self._request_with_retry(endpoint, params))
+
+    def _request_with_retry(self, endpoint: str, params: Dict[str, Any]) -> Any:
+        label = endpoint_label(endpoint) if METRICS.enabled else None
+
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            last_attempt = attempt == self.max_retries
+
+            try:
+                with METRICS.timer('http', endpoint=label):
+                    response = self.session.get(endpoint, params=params, timeout=self.timeout)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                METRICS.count('upstream_errors_total', endpoint=label, error=type(e).__name__)
+                if last_attempt:
+                    raise
+                METRICS.count('upstream_retries_total', endpoint=label)
+                time.sleep(backoff_delay(attempt))
+                continue
+
+            METRICS.count('upstream_responses_total', endpoint=label, status=response.status_code)
+            if response.status_code in RETRY_STATUS_CODES and not last_attempt:
+                METRICS.count('upstream_retries_total', endpoint=label)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                delay = retry_after if retry_after is not None else backoff_delay(attempt)
+                if response.status_code == 429:
+                    # Hold back every other request too, not just this one
+                    self.rate_limiter.pause(delay)
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            with METRICS.timer('json_parse', endpoint=label):
+                return response.json()
+
+    @staticmethod
+    def get_api_days(days: int) -> int:
+        """Map requested days to the smallest valid OHLC API value covering them"""
+        return min([d for d in VALID_OHLC_DAYS if d >= days], default=365)
 
     def get_historical_data(self, coin_id: str, vs_currency: str = 'usd', days: int = 30) -> pd.DataFrame:
         """Get historical OHLC data for a cryptocurrency"""
-        endpoint = f"{self.base_url}/coins/{coin_id}/ohlc"
+        return self.get_historical_candles(coin_id, vs_currency=vs_currency, days=days).to_frame()
 
-        # CoinGecko OHLC API limits: 1, 7, 14, 30, 90, 180, 365
-        # Map requested days to valid API values
-        valid_days = [1, 7, 14, 30, 90, 180, 365]
-        api_days = min([d for d in valid_days if d >= days], default=365)
+    def get_historical_candles(self, coin_id: str, vs_currency: str = 'usd', days: int = 30) -> Candles:
+        """Get historical OHLC + volume data for a cryptocurrency as compact columnar candles
+
+        /ohlc has no volume, so with fetch_volume it is estimated from the
+        /market_chart volume samples for the same window. Volume is NaN otherwise,
+        or when that request fails.
+        """
+        endpoint = f"{self.base_url}/coins/{coin_id}/ohlc"
+        api_days = self.get_api_days(days)
 
         params = {
             'vs_currency': vs_currency,
@@ -33,30 +227,412 @@ class CoinGeckoAPI:
         }
 
         try:
-            response = self.session.get(endpoint, params=params)
-            response.raise_for_status()
-            data = response.json()
+            data = self._request(endpoint, params)
 
             if not data:
                 print(f"No data returned for {coin_id}")
-                return pd.DataFrame()
+                return Candles.empty(OHLCV_COLUMNS)
 
-            df = pd.DataFrame(data, columns=['timestamp', 'open', 'high', 'low', 'close'])
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            df.set_index('timestamp', inplace=True)
+            candles = Candles.from_ohlc_json(data)
 
-            # Convert to numeric types
-            for col in ['open', 'high', 'low', 'close']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
+        except (requests.RequestException, ValueError, TypeError) as e:
+            print(f"Error fetching data for {coin_id}: {e}")
+            return Candles.empty(OHLCV_COLUMNS)
 
-            return df
+        # /ohlc timestamps mark each candle's close
+        chart = (self.get_market_chart(coin_id, vs_currency, api_days) if self.fetch_volume else None) or {}
+        width_ms = GRANULARITY_MS[OHLC_GRANULARITY[api_days]]
+        volume = candle_volume(chart.get('total_volumes'), candles.timestamps, width_ms, label='right')
+        return candles.with_column('volume', volume)
 
-        except requests.RequestException as e:
-            print(f"Error fetching data for {coin_id}: {e}")
-            return pd.DataFrame()
+    def get_market_chart(self, coin_id: str, vs_currency: str, days: int) -> Optional[Dict]:
+        """Get raw price and volume samples for the last days; None on failure"""
+        endpoint = f"{self.base_url}/coins/{coin_id}/market_chart"
+        params = {
+            'vs_currency': vs_currency,
+            'days': days
+        }
+
+        try:
+            return self._request(endpoint, params) or {}
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error fetching market chart for {coin_id}: {e}")
+            return None
+
+    def get_historical_data_many(self, coin_ids: List[str], vs_currency: str = 'usd',
+                                 days: int = 30) -> List[pd.DataFrame]:
+        """Get historical OHLC data for several cryptocurrencies concurrently
+
+        Requests run on a bounded thread pool sharing this session's connection
+        pool. Results are returned in the same order as coin_ids.
+        """
+        return [
+            candles.to_frame()
+            for candles in self._map_concurrent(
+                lambda coin_id: self.get_historical_candles(coin_id, vs_currency=vs_currency, days=days),
+                coin_ids
+            )
+        ]
+
+    def _map_concurrent(self, fn, items: List) -> List:
+        """Apply fn to every item on a bounded thread pool, keeping input order"""
+        if not items:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(items))) as executor:
+            return list(executor.map(fn, items))
+
+    def get_ohlc(self, coin_id: str, vs_currency: str = 'usd', days: int = 30) -> pd.DataFrame:
+        """Get raw OHLC data from the shared store, fetching only when missing or expired
+
+        The store is keyed by coin and API days only, so every timeframe resampled
+        from the same series reuses a single download.
+        """
+        return self.get_ohlc_candles(coin_id, vs_currency=vs_currency, days=days).to_frame()
+
+    def get_ohlc_many(self, coin_ids: List[str], vs_currency: str = 'usd', days: int = 30) -> List[pd.DataFrame]:
+        """Get raw OHLC data for several coins, loading only the missing ones concurrently"""
+        return [candles.to_frame() for candles in self.get_ohlc_candles_many(coin_ids, vs_currency, days)]
+
+    def get_ohlc_candles(self, coin_id: str, vs_currency: str = 'usd', days: int = 30) -> Candles:
+        """Like get_ohlc, but returns the stored candles without building a DataFrame"""
+        return self.get_ohlc_candles_many([coin_id], vs_currency=vs_currency, days=days)[0]
+
+    def get_ohlc_candles_many(self, coin_ids: List[str], vs_currency: str = 'usd', days: int = 30) -> List[Candles]:
+        """Like get_ohlc_many, but returns the stored candles without building DataFrames"""
+        if self.derives_quote(vs_currency):
+            return self._derive_quote(coin_ids, vs_currency,
+                                      lambda ids, vs: self._get_ohlc_candles_many(ids, vs, days))
+        return self._get_ohlc_candles_many(coin_ids, vs_currency, days)
+
+    def _get_ohlc_candles_many(self, coin_ids: List[str], vs_currency: str, days: int) -> List[Candles]:
+        api_days = self.get_api_days(days)
+        results: Dict[str, Candles] = {}
+
+        for coin_id in coin_ids:
+            candles = self._ohlc_store.get((coin_id, vs_currency, api_days))
+            if candles is not None:
+                results[coin_id] = candles
+
+        missing = [coin_id for coin_id in dict.fromkeys(coin_ids) if coin_id not in results]
+        METRICS.count('cache_requests_total', len(results), cache='memory', source='ohlc', result='hit')
+        METRICS.count('cache_requests_total', len(missing), cache='memory', source='ohlc', result='miss')
+
+        def load(coin_id):
+            with METRICS.timer('fetch', source='ohlc'):
+                return self._load_shared_candles(f'ohlc:{vs_currency}:{api_days}:{coin_id}',
+                                                 lambda: self._load_ohlc(coin_id, vs_currency, api_days),
+                                                 scope=('ohlc', api_days))
+
+        loaded = self._map_concurrent(load, missing)
+
+        for coin_id, candles in zip(missing, loaded):
+            results[coin_id] = candles
+            # Don't cache failures so the next render retries the request
+            if not candles.is_empty:
+                self._ohlc_store.set((coin_id, vs_currency, api_days), candles, self.ohlc_ttl)
+
+        return [results[coin_id] for coin_id in coin_ids]
+
+    def _load_ohlc(self, coin_id: str, vs_currency: str, api_days: int) -> Candles:
+        """Load an OHLC series, topping up the on-disk history with a short delta request"""
+        if self.candle_cache is None:
+            return self.get_historical_candles(coin_id, vs_currency=vs_currency, days=api_days)
+
+        granularity = OHLC_GRANULARITY[api_days]
+        now_ms = int(time.time() * 1000)
+        stored = self.candle_cache.load(coin_id, vs_currency, granularity, since_ms=now_ms - api_days * DAY_MS,
+                                        columns=OHLCV_COLUMNS)
+        METRICS.count('cache_requests_total', cache='sqlite', source='ohlc', result='miss' if stored.is_empty else 'hit')
+
+        # Request only the smallest window with the same candle width that reaches back
+        # past the last stored candle; fall back to the full window when the stored
+        # history doesn't already cover the start of the requested range
+        fetch_days = api_days
+        window_start_ms = now_ms - api_days * DAY_MS + 2 * GRANULARITY_MS[granularity]
+        if not stored.is_empty and stored.timestamps[0] <= window_start_ms:
+            gap_days = (now_ms - int(stored.timestamps[-1]) + GRANULARITY_MS[granularity]) / DAY_MS
+            fetch_days = min(
+                [d for d, g in OHLC_GRANULARITY.items() if g == granularity and d >= gap_days and d <= api_days],
+                default=api_days
+            )
+
+        fresh = self.get_historical_candles(coin_id, vs_currency=vs_currency, days=fetch_days)
+        if fresh.is_empty:
+            # Serve stale history rather than nothing when the refresh fails
+            return stored
+
+        retention_days = max(d for d, g in OHLC_GRANULARITY.items() if g == granularity)
+        self.candle_cache.save(coin_id, vs_currency, granularity, fresh, retention_days=retention_days)
+
+        if stored.is_empty or fetch_days == api_days:
+            return fresh
+
+        merged = stored.merge(fresh)
+        return merged.since(int(fresh.timestamps[-1]) - api_days * DAY_MS)
+
+    def get_market_chart_range(self, coin_id: str, vs_currency: str, start_ms: int,
+                               end_ms: int) -> Optional[Dict]:
+        """Get raw price and volume samples between two epoch-ms times; None on failure"""
+        endpoint = f"{self.base_url}/coins/{coin_id}/market_chart/range"
+        params = {
+            'vs_currency': vs_currency,
+            'from': start_ms // 1000,
+            'to': end_ms // 1000
+        }
+
+        try:
+            return self._request(endpoint, params) or {}
+        except (requests.RequestException, ValueError) as e:
+            print(f"Error fetching market chart for {coin_id}: {e}")
+            return None
+
+    def get_range_candles(self, coin_id: str, vs_currency: str = 'usd', days: int = 365,
+                          granularity: str = '1h') -> Candles:
+        """Get a long, fine-grained OHLC + volume history backfilled from /market_chart/range"""
+        return self.get_range_candles_many([coin_id], vs_currency=vs_currency, days=days,
+                                           granularity=granularity)[0]
+
+    def get_range_candles_many(self, coin_ids: List[str], vs_currency: str = 'usd', days: int = 365,
+                               granularity: str = '1h') -> List[Candles]:
+        """Like get_range_candles for several coins, loading only the missing or expired ones
+
+        Unlike /ohlc, any number of days works and the candle width stays fixed
+        (1h, 4h or 1d), so multi-year histories keep hourly resolution.
+        """
+        if self.derives_quote(vs_currency):
+            return self._derive_quote(coin_ids, vs_currency,
+                                      lambda ids, vs: self._get_range_candles_many(ids, vs, days, granularity))
+        return self._get_range_candles_many(coin_ids, vs_currency, days, granularity)
+
+    def _get_range_candles_many(self, coin_ids: List[str], vs_currency: str, days: int,
+                                granularity: str) -> List[Candles]:
+        results: Dict[str, Candles] = {}
+
+        for coin_id in coin_ids:
+            candles = self._range_store.get((coin_id, vs_currency, days, granularity))
+            if candles is not None:
+                results[coin_id] = candles
+
+        # Each coin streams its own chunks on a pool of max_workers, so load coins one by one
+        missing = [coin_id for coin_id in dict.fromkeys(coin_ids) if coin_id not in results]
+        METRICS.count('cache_requests_total', len(results), cache='memory', source='range', result='hit')
+        METRICS.count('cache_requests_total', len(missing), cache='memory', source='range', result='miss')
+        for coin_id in missing:
+            with METRICS.timer('fetch', source='range'):
+                # Multi-year backfills can take minutes, so other replicas wait longer for them
+                candles = self._load_shared_candles(
+                    f'range:{vs_currency}:{days}:{granularity}:{coin_id}',
+                    lambda: self._load_range(coin_id, vs_currency, days, granularity), lease=600,
+                    scope=('range', days)
+                )
+            results[coin_id] = candles
+            if not candles.is_empty:
+                self._range_store.set((coin_id, vs_currency, days, granularity), candles, self.ohlc_ttl)
+
+        return [results[coin_id] for coin_id in coin_ids]
+
+    def _load_range(self, coin_id: str, vs_currency: str, days: int, granularity: str) -> Candles:
+        """Backfill a series, fetching only what the on-disk history is missing
+
+        Chunks are written to the cache as they arrive and the final window is
+        read back from disk, so memory stays bounded on multi-year histories.
+        """
+        width_ms = RANGE_GRANULARITY[granularity]
+        end_ms = int(time.time() * 1000)
+        start_ms = (end_ms - days * DAY_MS) // width_ms * width_ms
+
+        if self.candle_cache is None:
+            return Candles.concat(
+                [candles for _, candles in stream_range_candles(self, coin_id, vs_currency, start_ms, end_ms, width_ms)],
+                OHLCV_COLUMNS
+            )
+
+        key = (coin_id, vs_currency, f'range_{granularity}')
+        stored = self.candle_cache.load(*key, since_ms=start_ms, columns=OHLCV_COLUMNS)
+        complete_from = self.candle_cache.backfill_start(*key)
+        METRICS.count('cache_requests_total', cache='sqlite', source='range',
+                      result='miss' if stored.is_empty or complete_from is None else 'hit')
+
+        if stored.is_empty or complete_from is None:
+            gaps = [(start_ms, end_ms)]
+        else:
+            # Older history the cache never had, plus everything from the last
+            # (possibly still forming) stored candle onwards
+            gaps = [(start_ms, complete_from)] if start_ms < complete_from else []
+            gaps.append((int(stored.timestamps[-1]), end_ms))
+
+        for gap_start, gap_end in gaps:
+            fetched_until = gap_start
+            for fetched_until, candles in stream_range_candles(self, coin_id, vs_currency, gap_start, gap_end, width_ms):
+                self.candle_cache.save(*key, candles)
+
+            if gap_start == start_ms and fetched_until >= gap_end:
+                self.candle_cache.set_backfill_start(*key, start_ms)
+
+        return self.candle_cache.load(*key, since_ms=start_ms, columns=OHLCV_COLUMNS)
+
+    def _load_shared(self, key: str, load, ttl: float, encode, decode, lease: Optional[float] = None,
+                     scope: Optional[Tuple[str, int]] = None):
+        """Call load() through the shared cache, if any, so concurrent replicas fetch key only once
+
+        encode(result) gives the bytes to store, or None for results that shouldn't
+        be cached. Each entry is prefixed with its fetch time so entries older than
+        the _stale_before of their (source, days) scope are fetched again. Cache
+        failures fall back to loading directly.
+        """
+        if self.shared_cache is None:
+            return load()
+
+        loaded = []
+        stale_before = 0.0
+        if scope is not None:
+            stale_before = max(self._stale_before.get(scope, 0.0), self._stale_before.get((scope[0], None), 0.0))
+
+        def load_bytes():
+            loaded.append(load())
+            data = encode(loaded[-1])
+            return None if data is None else struct.pack('<d', time.time()) + data
+
+        try:
+            data = self.shared_cache.get_or_load(
+                key, load_bytes, ttl, lease,
+                accept=lambda data: struct.unpack_from('<d', data)[0] >= stale_before
+            )
+        except (OSError, sqlite3.Error, CacheBackendError) as e:
+            print(f"Error using shared cache for {key}: {e}")
+            return loaded[-1] if loaded else load()
+
+        return loaded[-1] if loaded else decode(data[8:])
+
+    def _load_shared_candles(self, key: str, load, lease: Optional[float] = None,
+                             scope: Optional[Tuple[str, int]] = None) -> Candles:
+        return self._load_shared(key, load, self.ohlc_ttl,
+                                 lambda candles: None if candles.is_empty else candles.to_bytes(),
+                                 Candles.from_bytes, lease, scope)
+
+    def expire_store(self, before: Optional[float] = None, source: Optional[str] = None,
+                     days: Optional[int] = None):
+        """Drop the in-memory OHLC series so the next request re-fetches; the disk cache is kept
+
+        Without a source, the in-memory /simple/price responses are dropped too
+        and the shared cache is left alone, so other replicas keep their hits.
+        With source ('ohlc' or 'range') only that source's series are dropped,
+        and with days only the window covering days. With before (epoch seconds)
+        and a source, shared cache entries of those series fetched earlier are
+        fetched again too, e.g. ones that predate a bar close.
+        """
+        if source is None:
+            self._ohlc_store.clear()
+            self._range_store.clear()
+            self._market_store.clear()
+            return
+
+        if source == 'ohlc':
+            store, days = self._ohlc_store, None if days is None else self.get_api_days(days)
+        else:
+            store = self._range_store
+        # Store keys are (coin_id, vs_currency, days, ...)
+        for key in store.keys():
+            if days is None or key[2] == days:
+                store.delete(key)
+        if before is not None:
+            self._stale_before[(source, days)] = max(self._stale_before.get((source, days), 0.0), before)
+
+    def clear_cache(self):
+        """Drop every stored OHLC series in memory and in the shared cache
+
+        Every replica sharing the cache misses at once afterwards, so this is an
+        operator action (cli.py --clear-cache); use expire_store to refresh one
+        process. The on-disk history is kept, so the next load only fetches the
+        delta since its newest candle.
+        """
+        self.expire_store()
+        if self.shared_cache is not None:
+            try:
+                self.shared_cache.clear()
+            except (OSError, sqlite3.Error, CacheBackendError) as e:
+                print(f"Error clearing shared cache: {e}")
+
+    def derives_quote(self, vs_currency: str) -> bool:
+        """Whether series quoted in vs_currency are derived from base-currency series"""
+        return bool(self.base_currency) and vs_currency != self.base_currency and vs_currency in QUOTE_CURRENCIES
+
+    def _derive_quote(self, coin_ids: List[str], quote: str, fetch) -> List[Candles]:
+        """Re-quote base-currency series with fetch(coin_ids, vs_currency) -> candles for the rate too"""
+        rate_coin = CRYPTO_QUOTES.get(quote, FX_REFERENCE_COIN)
+        ids = list(dict.fromkeys([*coin_ids, rate_coin]))
+        base = dict(zip(ids, fetch(ids, self.base_currency)))
+
+        reference = base[rate_coin]
+        if quote in CRYPTO_QUOTES:
+            rate_timestamps, rates = reference.timestamps, reference['close']
+        else:
+            rate_timestamps, rates = fx_rates(reference, fetch([rate_coin], quote)[0])
+        if len(rates) == 0:
+            # Without a rate series every derived series is missing, like a failed fetch
+            return [Candles.empty(base[coin_id].columns) for coin_id in coin_ids]
+
+        with METRICS.timer('convert', quote=quote):
+            return [convert_candles(base[coin_id], rate_timestamps, rates) for coin_id in coin_ids]
 
     def get_market_data(self, coin_ids: List[str], vs_currency: str = 'usd') -> Dict:
-        """Get current market data for multiple cryptocurrencies"""
+        """Get current market data for multiple cryptocurrencies
+
+        Derived quotes come from the base-currency prices of the coins and of the
+        quote's rate coin; the 24h change is re-based by the rate's own change.
+        """
+        if not self.derives_quote(vs_currency):
+            return self._get_market_data(coin_ids, vs_currency)
+
+        base_currency, quote = self.base_currency, vs_currency
+        # The rate coin rides along in the same request
+        rate_coin = CRYPTO_QUOTES.get(quote, FX_REFERENCE_COIN)
+        base = self._get_market_data(list(dict.fromkeys([*coin_ids, rate_coin])), base_currency)
+        rate, rate_change = self._quote_rate(quote, base)
+        if not rate:
+            return {}
+
+        derived = {}
+        for coin_id in coin_ids:
+            data = base.get(coin_id) or {}
+            price = data.get(base_currency)
+            if price is None:
+                continue
+            volume = data.get(f'{base_currency}_24h_vol')
+            derived[coin_id] = {
+                quote: price / rate,
+                f'{quote}_24h_vol': None if volume is None else volume / rate,
+                f'{quote}_24h_change': _rebase_change(data.get(f'{base_currency}_24h_change'), rate_change)
+            }
+        return derived
+
+    def _quote_rate(self, quote: str, base: Optional[Dict] = None) -> Tuple[Optional[float], Optional[float]]:
+        """Current base-currency price of one unit of a derived quote and its 24h % change
+
+        base is an already fetched base-currency /simple/price response including the rate coin.
+        """
+        base_currency = self.base_currency
+        rate_coin = CRYPTO_QUOTES.get(quote, FX_REFERENCE_COIN)
+        if base is None:
+            base = self._get_market_data([rate_coin], base_currency)
+        reference = base.get(rate_coin) or {}
+        rate, rate_change = reference.get(base_currency), reference.get(f'{base_currency}_24h_change')
+        if quote in CRYPTO_QUOTES or not rate:
+            return rate, rate_change
+
+        quoted = self._get_market_data([rate_coin], quote).get(rate_coin) or {}
+        if not quoted.get(quote):
+            return None, None
+        # rate_coin's price in base over its price in the fiat quote is the exchange rate
+        return rate / quoted[quote], _rebase_change(rate_change, quoted.get(f'{quote}_24h_change'))
+
+    def _get_market_data(self, coin_ids: List[str], vs_currency: str) -> Dict:
+        key = (vs_currency, tuple(sorted(coin_ids)))
+        data = self._market_store.get(key)
+        if data is not None:
+            return data
+
         endpoint = f"{self.base_url}/simple/price"
         params = {
             'ids': ','.join(coin_ids),
@@ -65,50 +641,104 @@ class CoinGeckoAPI:
             'include_24hr_vol': 'true'
         }
 
-        try:
-            response = self.session.get(endpoint, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.RequestException as e:
-            print(f"Error fetching market data: {e}")
-            return {}
+        def fetch():
+            try:
+                return self._request(endpoint, params)
+            except requests.RequestException as e:
+                print(f"Error fetching market data: {e}")
+                return {}
 
-    def resample_data(self, df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
-        """Resample OHLC data to different timeframes"""
-        if df.empty:
-            return pd.DataFrame()
+        # Live ticks from every replica poll the same watchlist, so share one response
+        data = self._load_shared(f"market:{vs_currency}:{','.join(sorted(coin_ids))}", fetch, self.market_ttl,
+                                 _encode_json, json.loads)
+        if data:
+            self._market_store.set(key, data, self.market_ttl)
+        return data
 
-        timeframe_map = {
-            '4H': '4h',
-            '6H': '6h',
-            '12H': '12h',
-            '1D': '1D',
-            '2D': '2D',
-            '3D': '3D',
-            '1W': '1W'
-        }
+    def get_top_coins(self, limit: int = 100, vs_currency: str = 'usd') -> List[Dict]:
+        """Get the top coins by market cap from /coins/markets, paging as needed"""
+        endpoint = f"{self.base_url}/coins/markets"
+        per_page = min(limit, 250)  # API maximum is 250 per page
+
+        def fetch():
+            coins: List[Dict] = []
+            try:
+                page = 1
+                while len(coins) < limit:
+                    params = {
+                        'vs_currency': vs_currency,
+                        'order': 'market_cap_desc',
+                        'per_page': per_page,
+                        'page': page
+                    }
+                    data = self._request(endpoint, params)
+                    coins.extend(data or [])
+                    if not data or len(data) < per_page:
+                        break
+                    page += 1
+            except requests.RequestException as e:
+                print(f"Error fetching top coins: {e}")
+            return coins[:limit]
+
+        if not self.derives_quote(vs_currency):
+            return self._load_shared(f'top:{vs_currency}:{limit}', fetch, self.ohlc_ttl, _encode_json, json.loads)
 
-        if timeframe not in timeframe_map:
+        # Ranked in the base currency, with prices and market caps re-quoted
+        coins = self.get_top_coins(limit, vs_currency=self.base_currency)
+        rate, rate_change = self._quote_rate(vs_currency)
+        if not rate:
+            return []
+        return [{
+            **coin,
+            'current_price': None if coin.get('current_price') is None else coin['current_price'] / rate,
+            'market_cap': None if coin.get('market_cap') is None else coin['market_cap'] / rate,
+            'price_change_percentage_24h': _rebase_change(coin.get('price_change_percentage_24h'), rate_change)
+        } for coin in coins]
+
+    def resample_data(self, df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+        """Resample OHLC data to different timeframes
+
+        Candles in give Candles out, so stored series can be resampled without
+        building intermediate DataFrames. Both paths use the bucketed NumPy
+        resampler, which matches pandas' resample bins for every timeframe.
+        """
+        if timeframe not in TIMEFRAME_BUCKETS:
             return df
 
+        if isinstance(df, Candles):
+            with METRICS.timer('resample', timeframe=timeframe):
+                resampled = resample_candles(df, timeframe)
+            if not df.is_empty:
+                self._check_periods(len(resampled), timeframe)
+            return resampled
+
+        if df.empty:
+            return pd.DataFrame()
+
         try:
             # Check if DataFrame has datetime index
             if not isinstance(df.index, pd.DatetimeIndex):
                 print(f"Error: DataFrame must have DatetimeIndex for resampling")
                 return pd.DataFrame()
 
-            resampled = df.resample(timeframe_map[timeframe]).agg({
-                'open': 'first',
-                'high': 'max',
-                'low': 'min',
-                'close': 'last'
-            }).dropna()
-
-            # Ensure we have enough data for analysis
-            if len(resampled) < 25:  # Need at least 25 periods for EMA calculation
-                print(f"Warning: Only {len(resampled)} periods for {timeframe}, may not be sufficient")
-
+            with METRICS.timer('resample', timeframe=timeframe):
+                resampled = resample_candles(Candles.from_frame(df), timeframe).to_frame()
+            self._check_periods(len(resampled), timeframe)
             return resampled
         except Exception as e:
             print(f"Error resampling {timeframe}: {e}")
             return pd.DataFrame()
+
+    def resample_all(self, candles: Candles, timeframes: Optional[List[str]] = None) -> Dict[str, Candles]:
+        """Resample candles into several timeframes from one pass over the source"""
+        resampled = resample_all(candles, timeframes)
+        if not candles.is_empty:
+            for timeframe, series in resampled.items():
+                self._check_periods(len(series), timeframe)
+        return resampled
+
+    @staticmethod
+    def _check_periods(periods: int, timeframe: str):
+        # Ensure we have enough data for analysis
+        if periods < 25:  # Need at least 25 periods for EMA calculation
+            print(f"Warning: Only {periods} periods for {timeframe}, may not be sufficient")
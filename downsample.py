@@ -0,0 +1,69 @@
+"""Min/max-preserving downsampling of chart series.
+
+A long series is split into at most max_points buckets of consecutive
+candles. Candles in a bucket are merged the way a coarser timeframe would be
+(first open, highest high, lowest low, last close, summed volume; NaN when
+none of the bucket's volume is known), so every high and low of the full
+series is still drawn. Line series keep the positions of each bucket's
+minimum and maximum plus the first and last point, so peaks, troughs and the
+x range are unchanged while the number of points sent to the browser stays
+bounded.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+
+def bucket_starts(length: int, max_points: Optional[int]) -> Optional[np.ndarray]:
+    """Start positions of equal-count buckets, or None when length fits in max_points"""
+    if not max_points or length <= max_points:
+        return None
+    return np.unique(np.linspace(0, length, max_points, endpoint=False).astype(np.int64))
+
+
+def downsample_candles(df: pd.DataFrame, starts: Optional[np.ndarray]) -> pd.DataFrame:
+    """Merge the candles of each bucket, labeled with the bucket's first timestamp"""
+    if starts is None:
+        return df
+
+    merged = {
+        'open': df['open'].to_numpy(dtype=np.float64)[starts],
+        'high': np.fmax.reduceat(df['high'].to_numpy(dtype=np.float64), starts),
+        'low': np.fmin.reduceat(df['low'].to_numpy(dtype=np.float64), starts),
+        'close': df['close'].to_numpy(dtype=np.float64)[np.r_[starts[1:], len(df)] - 1]
+    }
+    if 'volume' in df.columns:
+        # Like the resampler, a bucket without any known volume keeps NaN instead of 0
+        volume = df['volume'].to_numpy(dtype=np.float64)
+        known = np.add.reduceat(~np.isnan(volume), starts)
+        merged['volume'] = np.where(known > 0, np.add.reduceat(np.nan_to_num(volume), starts), np.nan)
+    return pd.DataFrame(merged, index=df.index[starts])
+
+
+def extreme_positions(values, starts: Optional[np.ndarray]) -> np.ndarray:
+    """Sorted positions of each bucket's first minimum and maximum, plus both endpoints"""
+    values = np.asarray(values, dtype=np.float64)
+    if starts is None:
+        return np.arange(len(values))
+
+    lengths = np.diff(np.r_[starts, len(values)])
+    bucket = np.repeat(np.arange(len(starts)), lengths)
+    positions = [np.array([0, len(values) - 1])]
+    for reduce in (np.fmin, np.fmax):
+        # All-NaN buckets compare unequal everywhere and contribute no point
+        hits = np.flatnonzero(values == np.repeat(reduce.reduceat(values, starts), lengths))
+        _, first = np.unique(bucket[hits], return_index=True)
+        positions.append(hits[first])
+    return np.unique(np.concatenate(positions))
+
+
+def downsample_line(series: pd.Series, starts: Optional[np.ndarray]) -> pd.Series:
+    """The points of series at extreme_positions"""
+    if starts is None:
+        return series
+    return series.iloc[extreme_positions(series.to_numpy(), starts)]
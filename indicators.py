@@ -0,0 +1,368 @@
+"""Pluggable vectorized indicators sharing one set of EMA computations.
+
+Every indicator works on wide (periods, symbols) float arrays, so one call
+covers a single series or a whole screener batch. Indicators declare the
+input columns and look-back they need plus the exponential smoothings of
+those inputs they use; IndicatorPipeline computes each distinct smoothing
+once and shares it, e.g. MACD 12/26 reuses the EMA 12 of the crossover and
+ATR's trend distance reuses its EMA 21.
+
+New indicators subclass Indicator and are registered with
+@register_indicator, after which they can be built by name:
+
+    pipeline = IndicatorPipeline([create_indicator('rsi', period=7), EMACross()])
+
+Every smoothing is a recurrence, so a run can be resumed on later candles:
+IndicatorData.resume_point captures the smoothed values at a row, and a run
+over the rows from there on, seeded with them, gives the same values as a
+run over the whole series.
+"""
+from __future__ import annotations
+
+import abc
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple, Type
+
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# (source series, 'span' or 'alpha', value)
+Smoothing = Tuple[str, str, float]
+
+INDICATORS: Dict[str, Type[Indicator]] = {}
+
+
+def register_indicator(cls: Type[Indicator]) -> Type[Indicator]:
+    """Class decorator adding an indicator to the registry under cls.name"""
+    INDICATORS[cls.name] = cls
+    return cls
+
+
+def create_indicator(name: str, **params) -> Indicator:
+    """Build a registered indicator by name"""
+    if name not in INDICATORS:
+        raise ValueError(f"Unknown indicator '{name}'; choose from {', '.join(sorted(INDICATORS))}")
+    return INDICATORS[name](**params)
+
+
+class IndicatorData:
+    """Wide input columns plus a cache of every smoothing and derived series computed from them
+
+    With seeds (from resume_point), the columns start at the row the seeds were
+    taken at, and each smoothing starts from its seed instead of the first value.
+    prior_periods counts the valid closes before that row. exact turns False when
+    a smoothing can't be resumed exactly: it has no seed, or its source has gaps.
+    """
+
+    def __init__(self, columns: Mapping[str, np.ndarray], seeds: Optional[Mapping[Smoothing, np.ndarray]] = None,
+                 prior_periods=0):
+        self.columns = dict(columns)
+        self.seeds = seeds
+        self.prior_periods = prior_periods
+        self.exact = True
+        self._series: Dict[str, np.ndarray] = {}
+        self._smoothed: Dict[Smoothing, np.ndarray] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.columns or name in self._series
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name] if name in self.columns else self._series[name]
+
+    @property
+    def periods(self) -> np.ndarray:
+        """Valid closes per symbol, including the ones before a resumed run"""
+        return self.prior_periods + np.sum(~np.isnan(self['close']), axis=0)
+
+    def resume_point(self, row: int) -> Optional[Tuple[Dict[Smoothing, np.ndarray], np.ndarray]]:
+        """(seeds, prior_periods) for resuming this run at row, or None when it can't be resumed there
+
+        Gaps in a smoothing's source at row would leave weight state the seed
+        doesn't carry, so those rows can't be resumed from.
+        """
+        seeds = {}
+        for key, smoothed in self._smoothed.items():
+            if np.isnan(self[key[0]][row]).any() or np.isnan(smoothed[row]).any():
+                return None
+            seeds[key] = smoothed[row].copy()
+        return seeds, self.prior_periods + np.sum(~np.isnan(self['close'][:row]), axis=0)
+
+    def derived(self, name: str, compute) -> np.ndarray:
+        """Get a derived series, computing it with compute() the first time"""
+        if name not in self._series:
+            self._series[name] = compute()
+        return self._series[name]
+
+    def ema(self, source: str, span: float) -> np.ndarray:
+        """EMA of a series, identical to Series.ewm(span=span, adjust=False).mean()"""
+        return self.smooth((source, 'span', span))
+
+    def wilder(self, source: str, period: int) -> np.ndarray:
+        """Wilder smoothing (an EMA with alpha = 1 / period), as used by RSI and ATR"""
+        return self.smooth((source, 'alpha', 1. / period))
+
+    def smooth(self, key: Smoothing) -> np.ndarray:
+        if key not in self._smoothed:
+            self.smooth_many([key])
+        return self._smoothed[key]
+
+    def smooth_many(self, keys: Sequence[Smoothing]):
+        """Compute every missing smoothing, wrapping each source matrix only once"""
+        by_source: Dict[str, List[Smoothing]] = {}
+        for key in dict.fromkeys(keys):
+            if key not in self._smoothed:
+                by_source.setdefault(key[0], []).append(key)
+
+        for source, source_keys in by_source.items():
+            frame = None
+            for key in source_keys:
+                _, kind, value = key
+                seed = None if self.seeds is None else self.seeds.get(key)
+                if self.seeds is not None and (seed is None or np.isnan(self[source][1:]).any()):
+                    self.exact = False
+
+                if seed is None:
+                    if frame is None:
+                        frame = pd.DataFrame(self[source], copy=False)
+                    source_frame = frame
+                else:
+                    # The seed stands in for the first row: ewm(adjust=False) starts from
+                    # it and continues the recurrence from the second row on
+                    values = np.array(self[source], dtype=np.float64)
+                    values[0] = seed
+                    source_frame = pd.DataFrame(values, copy=False)
+
+                if kind == 'span':
+                    ewm = source_frame.ewm(span=value, adjust=False)
+                else:
+                    ewm = source_frame.ewm(alpha=value, adjust=False)
+                self._smoothed[key] = ewm.mean().to_numpy()
+
+
+class Indicator(abc.ABC):
+    """Base class for vectorized indicators
+
+    Subclasses set name and columns, and implement lookback, compute and signal
+    (and smoothings when they use any). compute returns named output series
+    (wide arrays); signal maps the outputs to a last-candle reading in [-1, 1],
+    bearish to bullish. Apart from smoothings, compute may look back at most
+    lookback rows, so resumed runs over a trailing window stay exact.
+    """
+    name = ''
+    columns: Tuple[str, ...] = ('close',)
+    weight = 1.0
+
+    @property
+    @abc.abstractmethod
+    def lookback(self) -> int:
+        """Valid periods needed before the indicator's reading is meaningful"""
+
+    def smoothings(self) -> List[Smoothing]:
+        """Smoothings of input columns this indicator uses, computed up front and shared"""
+        return []
+
+    @abc.abstractmethod
+    def compute(self, data: IndicatorData) -> Dict[str, np.ndarray]:
+        """Named output series computed from the shared data"""
+
+    @abc.abstractmethod
+    def signal(self, outputs: Dict[str, np.ndarray], data: IndicatorData) -> np.ndarray:
+        """Last-candle reading per symbol in [-1, 1] from compute's outputs"""
+
+
+@register_indicator
+class EMACross(Indicator):
+    """Short EMA above (bullish) or below (bearish) the long EMA"""
+    name = 'ema_cross'
+
+    def __init__(self, short: int = 12, long: int = 21):
+        self.short = short
+        self.long = long
+
+    @property
+    def lookback(self) -> int:
+        return self.long
+
+    def smoothings(self) -> List[Smoothing]:
+        return [('close', 'span', self.short), ('close', 'span', self.long)]
+
+    def compute(self, data: IndicatorData) -> Dict[str, np.ndarray]:
+        return {f'ema_{self.short}': data.ema('close', self.short), f'ema_{self.long}': data.ema('close', self.long)}
+
+    def signal(self, outputs, data) -> np.ndarray:
+        return np.where(outputs[f'ema_{self.short}'][-1] > outputs[f'ema_{self.long}'][-1], 1.0, -1.0)
+
+
+@register_indicator
+class MACD(Indicator):
+    """MACD line against its signal line, scored half on the line's sign and half on the histogram's"""
+    name = 'macd'
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal_span: int = 9):
+        self.fast = fast
+        self.slow = slow
+        self.signal_span = signal_span
+
+    @property
+    def lookback(self) -> int:
+        return self.slow + self.signal_span
+
+    def smoothings(self) -> List[Smoothing]:
+        return [('close', 'span', self.fast), ('close', 'span', self.slow)]
+
+    def compute(self, data: IndicatorData) -> Dict[str, np.ndarray]:
+        line_name = f'macd_{self.fast}_{self.slow}'
+        line = data.derived(line_name, lambda: data.ema('close', self.fast) - data.ema('close', self.slow))
+        signal_line = data.ema(line_name, self.signal_span)
+        return {'macd': line, 'macd_signal': signal_line, 'macd_hist': line - signal_line}
+
+    def signal(self, outputs, data) -> np.ndarray:
+        return 0.5 * np.sign(outputs['macd'][-1]) + 0.5 * np.sign(outputs['macd_hist'][-1])
+
+
+@register_indicator
+class RSI(Indicator):
+    """Wilder's RSI, scored linearly from -1 at 30 to +1 at 70"""
+    name = 'rsi'
+
+    def __init__(self, period: int = 14):
+        self.period = period
+
+    @property
+    def lookback(self) -> int:
+        return self.period + 1
+
+    def smoothings(self) -> List[Smoothing]:
+        return [('gain', 'alpha', 1. / self.period), ('loss', 'alpha', 1. / self.period)]
+
+    def compute(self, data: IndicatorData) -> Dict[str, np.ndarray]:
+        change = data.derived('change', lambda: _diff(data['close']))
+        data.derived('gain', lambda: np.where(change > 0, change, np.where(np.isnan(change), np.nan, 0.0)))
+        data.derived('loss', lambda: np.where(change < 0, -change, np.where(np.isnan(change), np.nan, 0.0)))
+
+        gain = data.wilder('gain', self.period)
+        loss = data.wilder('loss', self.period)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rsi = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), 100 - 100 / (1 + gain / loss))
+        return {f'rsi_{self.period}': np.where(np.isnan(gain) | np.isnan(loss), np.nan, rsi)}
+
+    def signal(self, outputs, data) -> np.ndarray:
+        return np.clip((outputs[f'rsi_{self.period}'][-1] - 50) / 20, -1, 1)
+
+
+@register_indicator
+class ATR(Indicator):
+    """Wilder's ATR, scored by how many ATRs the close sits above or below the trend EMA"""
+    name = 'atr'
+    columns = ('high', 'low', 'close')
+
+    def __init__(self, period: int = 14, trend_span: int = 21):
+        self.period = period
+        self.trend_span = trend_span
+
+    @property
+    def lookback(self) -> int:
+        return max(self.period + 1, self.trend_span)
+
+    def smoothings(self) -> List[Smoothing]:
+        return [('true_range', 'alpha', 1. / self.period), ('close', 'span', self.trend_span)]
+
+    def compute(self, data: IndicatorData) -> Dict[str, np.ndarray]:
+        data.derived('true_range', lambda: _true_range(data['high'], data['low'], data['close']))
+        return {f'atr_{self.period}': data.wilder('true_range', self.period)}
+
+    def signal(self, outputs, data) -> np.ndarray:
+        atr = outputs[f'atr_{self.period}'][-1]
+        distance = data['close'][-1] - data.ema('close', self.trend_span)[-1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.clip(np.where(atr > 0, distance / (2 * atr), 0.0), -1, 1)
+
+
+def _diff(values: np.ndarray) -> np.ndarray:
+    change = np.full(values.shape, np.nan)
+    change[1:] = values[1:] - values[:-1]
+    return change
+
+
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    previous = np.full(close.shape, np.nan)
+    previous[1:] = close[:-1]
+    with np.errstate(invalid='ignore'):
+        gaps = np.fmax(np.abs(high - previous), np.abs(low - previous))
+    return np.fmax(high - low, gaps)
+
+
+def default_indicators(ema_short: int = 12, ema_long: int = 21) -> List[Indicator]:
+    """The dashboard's indicator set: EMA cross, MACD, RSI and ATR trend distance"""
+    return [EMACross(ema_short, ema_long), MACD(ema_short), RSI(), ATR(trend_span=ema_long)]
+
+
+class IndicatorPipeline:
+    """Runs a set of indicators over wide inputs with every EMA computed once"""
+
+    def __init__(self, indicators: Optional[Sequence[Indicator]] = None):
+        self.indicators = list(default_indicators() if indicators is None else indicators)
+
+    @property
+    def lookback(self) -> int:
+        return max((indicator.lookback for indicator in self.indicators), default=0)
+
+    def run(self, columns: Mapping[str, np.ndarray], seeds: Optional[Mapping[Smoothing, np.ndarray]] = None,
+            prior_periods=0) -> Tuple[IndicatorData, Dict[str, Dict[str, np.ndarray]]]:
+        """Compute every applicable indicator on (periods, symbols) input columns
+
+        Indicators whose input columns are missing are skipped. Returns the shared
+        IndicatorData (with its EMA cache) and {indicator name: outputs}. seeds and
+        prior_periods resume an earlier run (see IndicatorData.resume_point).
+        """
+        data = IndicatorData(columns, seeds, prior_periods)
+        applicable = [ind for ind in self.indicators if all(column in data for column in ind.columns)]
+
+        # Fuse: compute every declared smoothing of the raw inputs in one sweep per source
+        data.smooth_many([key for ind in applicable for key in ind.smoothings() if key[0] in data.columns])
+
+        return data, {ind.name: ind.compute(data) for ind in applicable}
+
+    def score(self, data: IndicatorData,
+              outputs: Dict[str, Dict[str, np.ndarray]]) -> Tuple[np.ndarray, Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+        """Weighted multi-signal trend score per symbol in [-1, 1] from run()'s results
+
+        Returns (score, {indicator: signal}, {output: last value}), each an array
+        over symbols. Signals of indicators without enough valid periods for a
+        symbol are NaN and left out of its score; the score is NaN when none apply.
+        """
+        periods = data.periods
+        symbols = data['close'].shape[1]
+        weighted = np.zeros(symbols)
+        weights = np.zeros(symbols)
+        signals: Dict[str, np.ndarray] = {}
+        values: Dict[str, np.ndarray] = {}
+
+        for indicator in self.indicators:
+            if indicator.name not in outputs:
+                continue
+            signal = np.where(periods >= indicator.lookback,
+                              indicator.signal(outputs[indicator.name], data), np.nan)
+            signals[indicator.name] = signal
+            values.update({name: series[-1] for name, series in outputs[indicator.name].items()})
+
+            usable = ~np.isnan(signal)
+            weighted += np.where(usable, signal * indicator.weight, 0.0)
+            weights += np.where(usable, indicator.weight, 0.0)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score = np.where(weights > 0, weighted / weights, np.nan)
+        return score, signals, values
+
+    @staticmethod
+    def summarize(score, signals, values, column: int) -> Dict[str, any]:
+        """The score fields of one symbol's analysis"""
+        def clean(value):
+            return None if np.isnan(value) else float(value)
+
+        return {
+            'score': clean(score[column]),
+            'signals': {name: clean(signal[column]) for name, signal in signals.items()},
+            'indicators': {name: clean(value[column]) for name, value in values.items()}
+        }
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from candles import Candles
+from candle_cache import GRANULARITY_MS, OHLC_GRANULARITY
+from coingecko_api import CoinGeckoAPI, TIMEFRAMES, TIMEFRAME_DAYS
+from live_candles import LiveCandleBuilder, bar_start
+from metrics import METRICS
+from trend_analyzer import MIN_PERIODS, TrendAnalyzer
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+SnapshotKey = Tuple[str, str]  # (coin_id, timeframe)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """Immutable view of resampled candles and trend analysis for every (coin, timeframe)
+
+    Candles and analysis dicts are shared between every reader; frames returned
+    by get() wrap the shared candles, so callers must copy a frame before
+    modifying it.
+    """
+    version: int
+    created_at: float
+    data: Mapping[SnapshotKey, Candles] = field(default_factory=lambda: MappingProxyType({}))
+    analysis: Mapping[SnapshotKey, Dict] = field(default_factory=lambda: MappingProxyType({}))
+    errors: Mapping[SnapshotKey, str] = field(default_factory=lambda: MappingProxyType({}))
+    # Snapshot version in which each key's candles, analysis or error last changed
+    versions: Mapping[SnapshotKey, int] = field(default_factory=lambda: MappingProxyType({}))
+
+    def get(self, coin_id: str, timeframe: str) -> Tuple[Optional[pd.DataFrame], Optional[Dict]]:
+        """Get the resampled frame and analysis for a coin and timeframe"""
+        key = (coin_id, timeframe)
+        candles = self.data.get(key)
+        return (candles.to_frame() if candles is not None else None), self.analysis.get(key)
+
+    def key_version(self, coin_id: str, timeframe: str) -> int:
+        """Version in which a coin and timeframe last changed; 0 if it has never been published"""
+        return self.versions.get((coin_id, timeframe), 0)
+
+
+EMPTY_SNAPSHOT = Snapshot(0, 0.0)
+
+
+class IngestionWorker:
+    """Process-wide background poller publishing snapshots for a fixed set of coins
+
+    A single daemon thread refreshes every configured coin and timeframe on a
+    schedule; viewers only read the latest snapshot, so upstream load depends on
+    the number of symbols rather than the number of sessions. A new snapshot
+    version is only published when the underlying data changed.
+
+    With history_days set, every timeframe is resampled from one hourly
+    /market_chart/range backfill of that many days instead of the /ohlc windows.
+
+    With live_interval set, one batched /simple/price request every
+    live_interval seconds is folded into the forming bar of every series, and
+    full history is only re-fetched when a bar closes (or on request_refresh).
+    interval then only paces retries while some series failed to load.
+
+    With idle_timeout set, the thread stops once latest() hasn't been called for
+    that many seconds; start() resumes it from the last published snapshot.
+    """
+
+    def __init__(self, api: CoinGeckoAPI, analyzer: TrendAnalyzer, coin_ids: Sequence[str],
+                 timeframes: Sequence[str] = TIMEFRAMES, interval: float = 60, vs_currency: str = 'usd',
+                 history_days: Optional[int] = None, live_interval: Optional[float] = None,
+                 idle_timeout: Optional[float] = None):
+        self.api = api
+        self.analyzer = analyzer
+        self.coin_ids = list(coin_ids)
+        self.timeframes = list(timeframes)
+        self.interval = interval
+        self.vs_currency = vs_currency
+        self.history_days = history_days
+        self.live_interval = live_interval
+        self.idle_timeout = idle_timeout
+        self._last_read = 0.0
+        self.live = LiveCandleBuilder(api, analyzer, vs_currency)
+        # Last bar label per series a close has already triggered a refresh for
+        self._closed_labels: Dict[SnapshotKey, int] = {}
+        # Source candle width per series resampled from close-labeled /ohlc candles
+        self._close_widths: Dict[SnapshotKey, int] = {}
+
+        self._snapshot = EMPTY_SNAPSHOT
+        self._fingerprint: Mapping[SnapshotKey, tuple] = {}
+        self._updated = threading.Condition()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Guards _thread so start() never races an idle thread that is exiting
+        self._lifecycle = threading.Lock()
+        self._listeners: List[Callable[[Snapshot], None]] = []
+
+    def start(self):
+        """Start the polling thread if it isn't already running"""
+        with self._lifecycle:
+            self._last_read = time.monotonic()
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='ingestion-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Stop the polling thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def request_refresh(self):
+        """Wake the worker to refresh immediately instead of at the next interval"""
+        self._wake.set()
+
+    def add_listener(self, listener: Callable[[Snapshot], None]):
+        """Call listener(snapshot) on the worker thread whenever a new snapshot is published"""
+        self._listeners.append(listener)
+
+    def latest(self) -> Snapshot:
+        """Get the most recently published snapshot"""
+        self._last_read = time.monotonic()
+        return self._snapshot
+
+    def wait_for_update(self, version: int, timeout: Optional[float] = None) -> Snapshot:
+        """Block until a snapshot newer than version is published or timeout expires"""
+        with self._updated:
+            self._updated.wait_for(lambda: self._snapshot.version > version, timeout=timeout)
+            return self._snapshot
+
+    def _run(self):
+        next_refresh = 0.0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if self.idle_timeout and now - self._last_read > self.idle_timeout:
+                with self._lifecycle:
+                    if now - self._last_read > self.idle_timeout:
+                        self._thread = None
+                        return
+            if now >= next_refresh or self._wake.is_set():
+                self._wake.clear()
+                next_refresh = now + self.interval
+                try:
+                    snapshot = self.refresh()
+                    # Live ticks keep complete series current until a bar closes
+                    if self.live_interval and snapshot.data and not snapshot.errors:
+                        next_refresh = float('inf')
+                except Exception as e:
+                    print(f"Error refreshing snapshot: {e}")
+            elif self.live_interval:
+                try:
+                    if self.tick():
+                        next_refresh = now
+                        continue
+                except Exception as e:
+                    print(f"Error updating live candles: {e}")
+
+            wait = next_refresh - time.monotonic()
+            if self.live_interval:
+                wait = min(wait, self.live_interval)
+            self._wake.wait(max(wait, 0))
+
+    def refresh(self) -> Snapshot:
+        """Refresh every coin and timeframe once and publish a snapshot if anything changed"""
+        with METRICS.timer('refresh'):
+            return self._refresh()
+
+    def _refresh(self) -> Snapshot:
+        data: Dict[SnapshotKey, Candles] = {}
+        analysis: Dict[SnapshotKey, Dict] = {}
+        errors: Dict[SnapshotKey, str] = {}
+
+        for timeframes, raw, close_width in self._fetch_groups():
+            for coin_id, candles in raw.items():
+                if candles.is_empty:
+                    for timeframe in timeframes:
+                        errors[(coin_id, timeframe)] = f"No historical data available for {coin_id}"
+                    continue
+
+                # Every timeframe sharing this fetch window comes from one pass over the candles
+                with METRICS.timer('resample'):
+                    all_resampled = self.api.resample_all(candles, timeframes)
+
+                for timeframe, resampled in all_resampled.items():
+                    key = (coin_id, timeframe)
+                    if resampled.is_empty:
+                        errors[key] = (f"No data available for {coin_id} at {timeframe} timeframe. "
+                                       "Try a different timeframe.")
+                        continue
+
+                    if len(resampled) < MIN_PERIODS:
+                        errors[key] = (f"Insufficient data for {coin_id} at {timeframe} timeframe "
+                                       f"({len(resampled)} periods). Need at least {MIN_PERIODS} "
+                                       "periods for reliable EMA analysis.")
+                        continue
+
+                    data[key] = resampled
+                    self._close_widths[key] = close_width
+                    with METRICS.timer('analyze', timeframe=timeframe):
+                        analysis[key] = self.analyzer.get_overall_trend(resampled, state_key=(self.vs_currency, *key))
+
+        return self._publish(data, analysis, errors)
+
+    def tick(self) -> bool:
+        """Fold one batched price poll into the latest snapshot's forming bars and publish it
+
+        Returns True when a bar closed; the source series of the closed timeframes,
+        in memory and in the shared cache if fetched before the new bar opened, are
+        then expired so the next refresh fetches the closed bar's history.
+        """
+        snapshot = self._snapshot
+        if not snapshot.data:
+            return False
+
+        with METRICS.timer('tick'):
+            prices = self.live.poll(self.coin_ids)
+            if not prices:
+                return False
+            updated, updated_analysis, closed = self.live.apply(snapshot.data, prices,
+                                                                close_widths=self._close_widths)
+
+        self._publish({**snapshot.data, **updated}, {**snapshot.analysis, **updated_analysis}, dict(snapshot.errors))
+
+        # Upstream history can lag the tick that opened a bar; only refresh once per new bar
+        closed = {key for key in closed if updated[key].timestamps[-1] > self._closed_labels.get(key, -1)}
+        for key in closed:
+            self._closed_labels[key] = int(updated[key].timestamps[-1])
+        # Only the source series of the closed timeframes are fetched again
+        opened_ms: Dict[int, int] = {}
+        for key in closed:
+            days = self.history_days or TIMEFRAME_DAYS[key[1]]
+            start = bar_start(self._closed_labels[key], key[1], self._close_widths.get(key, 0))
+            opened_ms[days] = max(opened_ms.get(days, start), start)
+        for days, start in opened_ms.items():
+            self.api.expire_store(before=start / 1000, source='range' if self.history_days else 'ohlc', days=days)
+        return bool(closed)
+
+    def _fetch_groups(self):
+        """Yield (timeframes, {coin_id: candles}, close_width) for each source series the timeframes share
+
+        close_width is the source candle width when timestamps mark candle closes
+        (/ohlc), and 0 for backfilled candles, which are labeled with their start.
+        """
+        if self.history_days:
+            candles = self.api.get_range_candles_many(self.coin_ids, vs_currency=self.vs_currency,
+                                                      days=self.history_days)
+            yield self.timeframes, dict(zip(self.coin_ids, candles)), 0
+            return
+
+        for days in sorted({TIMEFRAME_DAYS[tf] for tf in self.timeframes}):
+            candles = self.api.get_ohlc_candles_many(self.coin_ids, vs_currency=self.vs_currency, days=days)
+            close_width = GRANULARITY_MS[OHLC_GRANULARITY[self.api.get_api_days(days)]]
+            yield ([tf for tf in self.timeframes if TIMEFRAME_DAYS[tf] == days], dict(zip(self.coin_ids, candles)),
+                   close_width)
+
+    def _publish(self, data, analysis, errors) -> Snapshot:
+        fingerprint = {
+            key: (len(candles), candles.timestamps[-1], candles['close'][-1]) for key, candles in data.items()
+        }
+        fingerprint.update({key: ('error', message) for key, message in errors.items()})
+
+        with self._updated:
+            published = fingerprint != self._fingerprint
+            if published:
+                version = self._snapshot.version + 1
+                previous = self._snapshot.versions
+                versions = {
+                    key: previous.get(key, version) if self._fingerprint.get(key) == value else version
+                    for key, value in fingerprint.items()
+                }
+                self._fingerprint = fingerprint
+                self._snapshot = Snapshot(
+                    version, time.time(),
+                    MappingProxyType(data), MappingProxyType(analysis), MappingProxyType(errors),
+                    MappingProxyType(versions)
+                )
+                self._updated.notify_all()
+            snapshot = self._snapshot
+
+        if published:
+            for listener in self._listeners:
+                try:
+                    listener(snapshot)
+                except Exception as e:
+                    print(f"Error in snapshot listener: {e}")
+        return snapshot
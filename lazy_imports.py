@@ -0,0 +1,26 @@
+import importlib
+import sys
+from types import ModuleType
+
+
+class _LazyModule(ModuleType):
+    """Placeholder that imports the real module on first attribute access"""
+
+    def __getattr__(self, attr):
+        # import_module holds the per-module import lock, so threads racing on
+        # first use wait for a fully initialized module
+        module = importlib.import_module(self.__name__)
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Return a module that is only imported on first attribute access
+
+    Keeps heavy dependencies such as pandas and numpy off the import path of
+    modules that may never touch them, e.g. `cli.py --help` or cron jobs that
+    exit early.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return _LazyModule(name)
@@ -0,0 +1,129 @@
+"""Live forming bars built from /simple/price ticks between full history fetches.
+
+One batched get_market_data call prices the whole watchlist. Each tick is
+folded into the last (still forming) bar of every resampled timeframe:
+high and low stretch to include it and it becomes the close. A tick past
+the end of that bar opens a new one, which means the previous bar closed
+and the full OHLC history should be fetched again. Trend analysis is re-run
+through TrendAnalyzer's resumable indicator state, so a tick only reruns the
+indicators over their look-back and the forming bar.
+"""
+from __future__ import annotations
+
+import time
+from typing import TYPE_CHECKING, Dict, Mapping, Optional, Sequence, Set, Tuple
+
+from candles import Candles
+from lazy_imports import lazy_import
+from resampler import DAY_MS, TIMEFRAME_BUCKETS, WEEK_MS, bucket_labels
+
+if TYPE_CHECKING:
+    from coingecko_api import CoinGeckoAPI
+    from trend_analyzer import TrendAnalyzer
+
+np = lazy_import('numpy')
+
+SnapshotKey = Tuple[str, str]  # (coin_id, timeframe)
+
+
+def tick_label(last_label: int, timestamp_ms: int, timeframe: str, close_width: int = 0) -> int:
+    """Label of the bucket a tick falls into, on the same bucket grid as a series ending at last_label
+
+    close_width is the width of the source candles when their timestamps mark
+    each candle's close, as /ohlc does. The resampler buckets those by close time,
+    so a tick is bucketed with the source candle still forming around it, i.e.
+    by the next close at or after it.
+    """
+    if close_width:
+        timestamp_ms = -(-timestamp_ms // close_width) * close_width
+    width, anchor = TIMEFRAME_BUCKETS[timeframe]
+    if anchor == 'start_day':
+        # 2D/3D buckets are anchored at the series' first day, so step from its last bucket
+        return last_label + (timestamp_ms - last_label) // width * width
+    return int(bucket_labels(np.array([timestamp_ms], dtype=np.int64), timeframe)[0])
+
+
+def bar_start(label: int, timeframe: str, close_width: int = 0) -> int:
+    """Epoch ms a bar opens at; weekly bars are labeled with the Sunday that closes them
+
+    With close_width (see tick_label), the bar's first source candle closes at
+    the bucket start, so the bar opens one source candle earlier.
+    """
+    start = label - (WEEK_MS - DAY_MS) if TIMEFRAME_BUCKETS[timeframe][1] == 'monday' else label
+    return start - close_width
+
+
+def fold_tick(candles: Candles, timeframe: str, price: float, timestamp_ms: int,
+              close_width: int = 0) -> Tuple[Candles, bool]:
+    """Fold one price tick into a resampled series
+
+    Returns the updated candles and whether the tick opened a new bar (so the
+    previous one closed). Ticks older than the forming bar are ignored. A new
+    bar's volume is NaN (unknown); /simple/price has no per-bar volume.
+    close_width is as for tick_label.
+    """
+    last_label = int(candles.timestamps[-1])
+    label = tick_label(last_label, timestamp_ms, timeframe, close_width)
+    if label < last_label:
+        return candles, False
+
+    columns = candles.columns
+    if label == last_label:
+        values = candles.values.copy()
+        last = values[:, -1]
+        last[columns.index('high')] = np.fmax(last[columns.index('high')], price)
+        last[columns.index('low')] = np.fmin(last[columns.index('low')], price)
+        last[columns.index('close')] = price
+        return Candles(candles.timestamps, values, columns), False
+
+    bar = np.array([[np.nan if column == 'volume' else price] for column in columns])
+    return Candles.concat([candles, Candles(np.array([label], dtype=np.int64), bar, columns)], columns), True
+
+
+class LiveCandleBuilder:
+    """Polls prices for a watchlist and folds them into every (coin, timeframe) forming bar"""
+
+    def __init__(self, api: CoinGeckoAPI, analyzer: TrendAnalyzer, vs_currency: str = 'usd'):
+        self.api = api
+        self.analyzer = analyzer
+        self.vs_currency = vs_currency
+
+    def poll(self, coin_ids: Sequence[str]) -> Dict[str, float]:
+        """Latest price per coin from one batched /simple/price request; coins without a price are left out"""
+        data = self.api.get_market_data(list(coin_ids), vs_currency=self.vs_currency) or {}
+        prices = {}
+        for coin_id in coin_ids:
+            price = (data.get(coin_id) or {}).get(self.vs_currency)
+            if isinstance(price, (int, float)) and price > 0:
+                prices[coin_id] = float(price)
+        return prices
+
+    def apply(self, data: Mapping[SnapshotKey, Candles], prices: Mapping[str, float],
+              timestamp_ms: Optional[int] = None, close_widths: Optional[Mapping[SnapshotKey, int]] = None
+              ) -> Tuple[Dict[SnapshotKey, Candles], Dict[SnapshotKey, Dict], Set[SnapshotKey]]:
+        """Fold prices into every series and re-analyze the updated ones
+
+        close_widths gives, per series resampled from close-labeled candles, the
+        width of those candles (see tick_label). Returns (candles, analysis) for
+        the series that had a price, plus the keys whose forming bar closed. Analysis uses the same incremental state keys
+        as IngestionWorker, so each update costs the same whatever the history length.
+        """
+        timestamp_ms = int(time.time() * 1000) if timestamp_ms is None else timestamp_ms
+        close_widths = close_widths or {}
+        updated: Dict[SnapshotKey, Candles] = {}
+        analysis: Dict[SnapshotKey, Dict] = {}
+        closed: Set[SnapshotKey] = set()
+
+        for key, candles in data.items():
+            coin_id, timeframe = key
+            price = prices.get(coin_id)
+            if price is None or candles.is_empty:
+                continue
+
+            candles, new_bar = fold_tick(candles, timeframe, price, timestamp_ms, close_widths.get(key, 0))
+            if new_bar:
+                closed.add(key)
+            updated[key] = candles
+            analysis[key] = self.analyzer.get_overall_trend(candles, state_key=(self.vs_currency, *key))
+
+        return updated, analysis, closed
@@ -0,0 +1,209 @@
+"""Opt-in timing and counter metrics for the fetch, resample, analyze and render stages.
+
+    with METRICS.timer('resample', timeframe='4H'):
+        ...
+    METRICS.count('cache_requests_total', cache='memory', result='hit')
+
+Collection is off unless METRICS_ENABLED is set (or METRICS.enable() is
+called); while off, timer() hands back one shared no-op context manager and
+count()/observe() return after a single attribute check, so the hooks can
+stay in hot paths. Collected metrics are exported as Prometheus text or JSON,
+optionally served over HTTP with serve_metrics.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+PREFIX = 'crypto_dashboard'
+
+# Upper bounds in seconds of the stage duration histogram buckets
+DURATION_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class _NullTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    __slots__ = ('metrics', 'labels', 'start')
+
+    def __init__(self, metrics: Metrics, labels: Dict[str, str]):
+        self.metrics = metrics
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.observe('stage_seconds', time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Metrics:
+    """Thread-safe registry of labeled counters and duration histograms"""
+
+    def __init__(self, enabled: bool = False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._histograms: Dict[str, Dict[Labels, _Histogram]] = {}
+
+    def enable(self, enabled: bool = True):
+        self.enabled = enabled
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def timer(self, stage: str, **labels):
+        """Context manager recording the duration of a stage under stage_seconds"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, {'stage': stage, **labels})
+
+    def count(self, name: str, amount: float = 1, **labels):
+        """Add amount to a counter"""
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def observe(self, name: str, seconds: float, **labels):
+        """Record one duration in a histogram"""
+        if not self.enabled:
+            return
+        key = _labels(labels)
+        with self._lock:
+            histogram = self._histograms.setdefault(name, {}).get(key)
+            if histogram is None:
+                histogram = self._histograms[name][key] = _Histogram()
+            histogram.buckets[bisect_left(DURATION_BUCKETS, seconds)] += 1
+            histogram.count += 1
+            histogram.sum += seconds
+            histogram.max = max(histogram.max, seconds)
+
+    def to_dict(self) -> Dict[str, List[Dict]]:
+        """Every series as {'counters': [...], 'timings': [...]} with plain label dicts"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(key), 'value': value}
+                for name, series in sorted(self._counters.items()) for key, value in sorted(series.items())
+            ]
+            timings = [
+                {'name': name, 'labels': dict(key), 'count': h.count, 'sum': h.sum, 'max': h.max,
+                 'mean': h.sum / h.count if h.count else 0.0}
+                for name, series in sorted(self._histograms.items()) for key, h in sorted(series.items())
+            ]
+        return {'counters': counters, 'timings': timings}
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                lines.append(f'# TYPE {PREFIX}_{name} counter')
+                lines.extend(f'{PREFIX}_{name}{_format_labels(key)} {value:g}' for key, value in sorted(series.items()))
+
+            for name, series in sorted(self._histograms.items()):
+                lines.append(f'# TYPE {PREFIX}_{name} histogram')
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip((*DURATION_BUCKETS, '+Inf'), histogram.buckets):
+                        cumulative += count
+                        lines.append(f'{PREFIX}_{name}_bucket{_format_labels(key, le=bound)} {cumulative}')
+                    lines.append(f'{PREFIX}_{name}_sum{_format_labels(key)} {histogram.sum:.6f}')
+                    lines.append(f'{PREFIX}_{name}_count{_format_labels(key)} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, path: str):
+        """Write a dump to path: Prometheus text for .prom/.txt files, JSON otherwise"""
+        text = self.to_prometheus() if path.endswith(('.prom', '.txt')) else self.to_json()
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+def _labels(labels: Dict) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+
+def _format_labels(key: Labels, **extra) -> str:
+    pairs = [*key, *((name, str(value)) for name, value in extra.items())]
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def endpoint_label(url: str) -> str:
+    """Path template of a CoinGecko URL, e.g. /coins/{id}/ohlc, so labels don't grow per coin"""
+    parts = url.split('/api/v3', 1)[-1].strip('/').split('/')
+    if len(parts) > 2 and parts[0] == 'coins':
+        parts[1] = '{id}'
+    return '/' + '/'.join(parts)
+
+
+def serve_metrics(port: int, host: str = '0.0.0.0', metrics: Optional[Metrics] = None):
+    """Serve /metrics (Prometheus text) and /metrics.json from a daemon thread; returns the server"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    registry = metrics or METRICS
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split('?', 1)[0]
+            if path == '/metrics':
+                body, content_type = registry.to_prometheus(), 'text/plain; version=0.0.4'
+            elif path == '/metrics.json':
+                body, content_type = registry.to_json(), 'application/json'
+            else:
+                self.send_error(404)
+                return
+            payload = body.encode()
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+
+# Process-wide registry used by every hook
+METRICS = Metrics(enabled=os.getenv('METRICS_ENABLED', '').lower() in ('1', 'true', 'yes'))
@@ -0,0 +1,76 @@
+"""Quote currencies derived locally from base-currency series.
+
+Every coin is fetched once in the base currency (USD). Another quote's series
+is the base series divided, timestamp by timestamp, by the base price of one
+unit of the quote:
+
+- crypto quotes (btc, eth) use that coin's own base-currency closes
+- fiat quotes (eur, gbp) use bitcoin's base closes divided by its closes in
+  the fiat, so one extra reference series per fiat covers every coin
+
+So N coins in M quotes take about N + M fetches instead of N x M.
+
+convert_candles divides every column of a candle by the one rate at its
+timestamp, which for /ohlc candles is the candle's close. Open, high and low
+are therefore approximate: they are re-quoted at the close-time rate, not the
+rate when they traded, and a quote's true high or low can fall in a different
+candle when the rate moved within it.
+"""
+from __future__ import annotations
+
+import math
+
+from candles import Candles
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+# Quote currency -> display symbol
+QUOTE_CURRENCIES = {
+    'usd': '$',
+    'eur': '€',
+    'gbp': '£',
+    'btc': '₿',
+    'eth': 'Ξ'
+}
+
+# Crypto quotes: the coin whose base-currency price is the rate
+CRYPTO_QUOTES = {
+    'btc': 'bitcoin',
+    'eth': 'ethereum'
+}
+
+# Coin priced in both the base currency and a fiat quote to get their exchange rate
+FX_REFERENCE_COIN = 'bitcoin'
+
+
+def align_rates(timestamps, rate_timestamps, rates):
+    """Rate in effect at each timestamp: the latest one at or before it, or the first rate for earlier times"""
+    positions = np.searchsorted(rate_timestamps, timestamps, side='right') - 1
+    return rates[np.clip(positions, 0, len(rates) - 1)]
+
+
+def fx_rates(base: Candles, quoted: Candles):
+    """(timestamps, base per quote unit) from one coin's closes in the base currency and in the quote"""
+    if base.is_empty or quoted.is_empty:
+        # No rate at all; convert_candles then gives empty candles
+        return base.timestamps[:0], base['close'][:0]
+    quoted_close = align_rates(base.timestamps, quoted.timestamps, quoted['close'])
+    return base.timestamps, base['close'] / quoted_close
+
+
+def convert_candles(candles: Candles, rate_timestamps, rates) -> Candles:
+    """Re-quote base-currency candles by dividing every price and volume column by the aligned rate"""
+    if candles.is_empty or len(rates) == 0:
+        return Candles.empty(candles.columns)
+    aligned = align_rates(candles.timestamps, rate_timestamps, rates)
+    return Candles(candles.timestamps, candles.values / aligned, candles.columns)
+
+
+def format_price(value: float, quote: str = 'usd') -> str:
+    """Price with the quote's symbol and about four significant digits below 1000, e.g. ₿0.03512"""
+    symbol = QUOTE_CURRENCIES.get(quote, quote.upper() + ' ')
+    if value == 0 or not math.isfinite(value):
+        return f'{symbol}{value:.2f}'
+    decimals = max(2, 3 - math.floor(math.log10(abs(value))))
+    return f'{symbol}{value:,.{decimals}f}'
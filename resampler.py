@@ -0,0 +1,164 @@
+"""Bucketed NumPy OHLC resampler.
+
+Reproduces the bucket edges of `df.resample(rule).agg(first/max/min/last).dropna()`
+for the dashboard timeframes without going through pandas:
+
+- 4H, 6H, 12H and 1D buckets are aligned to the epoch (equivalent to pandas'
+  default 'start_day' origin, since they divide a day evenly)
+- 2D and 3D buckets start at midnight of the first candle's day
+- 1W buckets run Monday 00:00 to Sunday 23:59 and are labeled with the Sunday,
+  matching pandas' 'W-SUN' bins (closed and labeled right)
+
+Buckets nest (4H and 6H into 12H, 12H into 1D, 1D into 2D/3D/1W), and
+OHLC aggregation is associative, so resample_all derives coarse timeframes
+from already aggregated finer ones in a single pass over the source candles.
+"""
+from __future__ import annotations
+
+from typing import Dict, Iterable, Optional
+
+from candles import Candles
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+HOUR_MS = 60 * 60 * 1000
+DAY_MS = 24 * HOUR_MS
+WEEK_MS = 7 * DAY_MS
+
+# 1970-01-05, the first Monday after the epoch
+MONDAY_EPOCH_MS = 4 * DAY_MS
+
+# timeframe -> (bucket width in ms, anchor): 'epoch', 'start_day' or 'monday'
+TIMEFRAME_BUCKETS = {
+    '4H': (4 * HOUR_MS, 'epoch'),
+    '6H': (6 * HOUR_MS, 'epoch'),
+    '12H': (12 * HOUR_MS, 'epoch'),
+    '1D': (DAY_MS, 'epoch'),
+    '2D': (2 * DAY_MS, 'start_day'),
+    '3D': (3 * DAY_MS, 'start_day'),
+    '1W': (WEEK_MS, 'monday')
+}
+
+# Finer timeframe each one can be derived from; None means straight from the source
+TIMEFRAME_PARENTS = {
+    '4H': None,
+    '6H': None,
+    '12H': '6H',
+    '1D': '12H',
+    '2D': '1D',
+    '3D': '1D',
+    '1W': '1D'
+}
+
+
+def bucket_labels(timestamps, timeframe: str):
+    """Label of the bucket each epoch-ms timestamp falls into"""
+    width, anchor = TIMEFRAME_BUCKETS[timeframe]
+
+    if anchor == 'monday':
+        # Labeled with the Sunday that closes the Monday-anchored week
+        origin = MONDAY_EPOCH_MS
+        return (timestamps - origin) // width * width + origin + WEEK_MS - DAY_MS
+
+    origin = int(timestamps.min()) // DAY_MS * DAY_MS if anchor == 'start_day' else 0
+    return (timestamps - origin) // width * width + origin
+
+
+def resample_candles(candles: Candles, timeframe: str) -> Candles:
+    """Aggregate candles into timeframe buckets with segment reductions
+
+    Open and close come from each bucket's first and last candle, high and low
+    from np.maximum/np.minimum.reduceat, and volume (when present) is summed.
+    Like pandas, missing values are skipped per column and buckets left without
+    a price are dropped. A bucket with no volume at all keeps a missing volume
+    rather than 0 (pandas' sum(min_count=1)), so unknown volume never reads as none.
+    """
+    return _drop_unpriced(_aggregate(candles, timeframe))
+
+
+def _aggregate(candles: Candles, timeframe: str) -> Candles:
+    if candles.is_empty:
+        return candles
+
+    timestamps = candles.timestamps
+    values = candles.values
+
+    # Segment reductions need the rows in time order
+    if len(timestamps) > 1 and (np.diff(timestamps) < 0).any():
+        order = np.argsort(timestamps, kind='stable')
+        timestamps = timestamps[order]
+        values = values[:, order]
+
+    labels = bucket_labels(timestamps, timeframe)
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)] - 1
+
+    columns = candles.columns
+    out = np.empty((len(columns), len(starts)), dtype=np.float64)
+    for row, column in enumerate(columns):
+        out[row] = _reduce_column(values[row], column, starts, ends)
+
+    return Candles(labels[starts], out, columns)
+
+
+def _drop_unpriced(candles: Candles) -> Candles:
+    """dropna(): drop buckets where some price column had nothing but missing values"""
+    prices = [row for row, column in enumerate(candles.columns) if column != 'volume']
+    priced = ~np.isnan(candles.values[prices]).any(axis=0)
+    if priced.all():
+        return candles
+    return Candles(candles.timestamps[priced], np.ascontiguousarray(candles.values[:, priced]), candles.columns)
+
+
+def _reduce_column(series, column: str, starts, ends):
+    missing = np.isnan(series)
+    if not missing.any():
+        if column == 'open':
+            return series[starts]
+        if column == 'close':
+            return series[ends]
+        if column == 'high':
+            return np.maximum.reduceat(series, starts)
+        if column == 'low':
+            return np.minimum.reduceat(series, starts)
+        return np.add.reduceat(series, starts)
+
+    # Slow path: skip missing values the way pandas' first/last/max/min/sum do
+    if column in ('open', 'close'):
+        present = np.flatnonzero(~missing)
+        if len(present) == 0:
+            return np.full(len(starts), np.nan)
+        counts = np.add.reduceat(~missing, starts)
+        if column == 'open':
+            picks = present[np.minimum(np.searchsorted(present, starts), len(present) - 1)]
+        else:
+            picks = present[np.maximum(np.searchsorted(present, ends, side='right') - 1, 0)]
+        return np.where(counts > 0, series[picks], np.nan)
+    if column == 'high':
+        return np.fmax.reduceat(series, starts)
+    if column == 'low':
+        return np.fmin.reduceat(series, starts)
+    counts = np.add.reduceat(~missing, starts)
+    return np.where(counts > 0, np.add.reduceat(np.where(missing, 0.0, series), starts), np.nan)
+
+
+def resample_all(candles: Candles, timeframes: Optional[Iterable[str]] = None) -> Dict[str, Candles]:
+    """Resample into several timeframes in one pass over the source candles
+
+    Coarse timeframes are aggregated from the (much smaller) results of the
+    finer timeframes they nest into, rather than from the source again. The
+    intermediate levels keep partially missing buckets so nothing is lost
+    before the final dropna.
+    """
+    timeframes = list(TIMEFRAME_BUCKETS) if timeframes is None else list(timeframes)
+    levels: Dict[str, Candles] = {}
+
+    def build(timeframe: str) -> Candles:
+        if timeframe not in levels:
+            parent = TIMEFRAME_PARENTS[timeframe]
+            source = candles if parent is None else build(parent)
+            levels[timeframe] = _aggregate(source, timeframe)
+        return levels[timeframe]
+
+    return {timeframe: _drop_unpriced(build(timeframe)) for timeframe in timeframes}
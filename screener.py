@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+from typing import Dict, Optional, Sequence, Tuple
+
+from candles import Candles
+from coingecko_api import CoinGeckoAPI, TIMEFRAME_DAYS
+from lazy_imports import lazy_import
+from metrics import METRICS
+from trend_analyzer import MIN_PERIODS, TrendAnalyzer
+
+pd = lazy_import('pandas')
+
+
+def build_screener_table(api: CoinGeckoAPI, analyzer: TrendAnalyzer, limit: int,
+                         timeframes: Sequence[str], vs_currency: str = 'usd') -> pd.DataFrame:
+    """Rank the top coins by market cap with their EMA 12/21 trend on each timeframe
+
+    OHLC series are loaded through the shared store in concurrent, throttled
+    batches (one per distinct API days value), and each timeframe is analyzed for
+    every coin in a single vectorized pass.
+    """
+    coins = api.get_top_coins(limit, vs_currency=vs_currency)
+    if not coins:
+        return pd.DataFrame()
+
+    coin_ids = [coin['id'] for coin in coins]
+    table = pd.DataFrame({
+        'Rank': [coin.get('market_cap_rank') for coin in coins],
+        'Coin': [coin.get('name') for coin in coins],
+        'Symbol': [(coin.get('symbol') or '').upper() for coin in coins],
+        'Price': [coin.get('current_price') for coin in coins],
+        'Market Cap': [coin.get('market_cap') for coin in coins],
+        '24h %': [coin.get('price_change_percentage_24h') for coin in coins]
+    }, index=coin_ids)
+
+    series_by_timeframe = {timeframe: {} for timeframe in timeframes}
+    for days in sorted({TIMEFRAME_DAYS[tf] for tf in timeframes}):
+        days_timeframes = [tf for tf in timeframes if TIMEFRAME_DAYS[tf] == days]
+        with METRICS.timer('fetch', source='screener', days=days):
+            raw = api.get_ohlc_candles_many(coin_ids, vs_currency=vs_currency, days=days)
+
+        with METRICS.timer('resample', source='screener', days=days):
+            for coin_id, candles in zip(coin_ids, raw):
+                if candles.is_empty:
+                    continue
+                for timeframe, resampled in api.resample_all(candles, days_timeframes).items():
+                    if len(resampled) >= MIN_PERIODS:
+                        series_by_timeframe[timeframe][coin_id] = resampled
+
+    for timeframe in timeframes:
+        with METRICS.timer('analyze', source='screener', timeframe=timeframe):
+            results = _analyze_timeframe(analyzer, series_by_timeframe[timeframe])
+
+        table[f'{timeframe} Trend'] = [results[c]['trend'] if c in results else None for c in coin_ids]
+        table[f'{timeframe} Strength'] = [results[c]['strength'] if c in results else None for c in coin_ids]
+        table[f'{timeframe} Score'] = [results[c]['score'] if c in results else None for c in coin_ids]
+        table[f'{timeframe} Cross'] = [_cross_label(results.get(c)) for c in coin_ids]
+        table[f'{timeframe} Cross Ago'] = pd.array(
+            [results[c]['crossover_periods_ago'] if c in results else None for c in coin_ids], dtype='Int64'
+        )
+
+    return table.reset_index(drop=True)
+
+
+def _analyze_timeframe(analyzer: TrendAnalyzer, series: Dict[str, Candles]) -> Dict[str, Dict]:
+    """Run analyze_batch over wide close, high, low and (when every coin has it) volume matrices"""
+    if not series:
+        return {}
+
+    def wide(values):
+        return pd.concat(
+            {coin_id: pd.Series(values(candles), index=candles.index, copy=False) for coin_id, candles in series.items()},
+            axis=1, sort=True
+        )
+
+    closes = wide(lambda candles: candles['close'])
+    if not all('volume' in candles.columns for candles in series.values()):
+        return analyzer.analyze_batch(closes, highs=wide(lambda candles: candles['high']),
+                                      lows=wide(lambda candles: candles['low']))
+
+    return analyzer.analyze_batch(closes, volumes=wide(lambda candles: candles['volume']),
+                                  highs=wide(lambda candles: candles['high']),
+                                  lows=wide(lambda candles: candles['low']))
+
+
+def _cross_label(analysis: Optional[Dict]) -> Optional[str]:
+    if analysis is None:
+        return None
+    if analysis['recent_bullish_cross']:
+        return 'Bullish'
+    if analysis['recent_bearish_cross']:
+        return 'Bearish'
+    return 'None'
+
+
+def filter_screener(table: pd.DataFrame, trend_filters: Optional[Dict[str, str]] = None,
+                    cross_filter: Optional[Tuple[str, str, int]] = None) -> pd.DataFrame:
+    """Filter a screener table
+
+    trend_filters maps timeframes to the required trend, e.g.
+    {'4H': 'BEARISH', '1D': 'BEARISH'}. cross_filter is
+    (timeframe, 'Bullish' | 'Bearish', max_periods_ago), e.g. ('1D', 'Bullish', 2)
+    keeps coins with a bullish cross within the last 2 periods on 1D.
+    """
+    if table.empty:
+        return table
+
+    mask = pd.Series(True, index=table.index)
+
+    for timeframe, trend in (trend_filters or {}).items():
+        mask &= table[f'{timeframe} Trend'] == trend
+
+    if cross_filter is not None:
+        timeframe, direction, within = cross_filter
+        mask &= table[f'{timeframe} Cross'] == direction
+        mask &= (table[f'{timeframe} Cross Ago'] <= within).fillna(False)
+
+    return table[mask]
+
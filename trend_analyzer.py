@@ -1,45 +1,290 @@
-import pandas as pd
-import numpy as np
-from typing import Dict
+from __future__ import annotations
+
+import threading
+from typing import Dict, Hashable, Optional, Sequence, Tuple
+
+from indicators import Indicator, IndicatorPipeline, default_indicators
+from lazy_imports import lazy_import
+
+pd = lazy_import('pandas')
+np = lazy_import('numpy')
+
+# Number of trailing periods searched for a recent crossover
+CROSSOVER_LOOKBACK = 5
+
+# Minimum periods needed for a reliable EMA 12/21 reading
+MIN_PERIODS = 25
+
+# Rolling VWAP window, matching the long EMA
+VWAP_PERIOD = 21
+
+# A crossover is volume-confirmed when its candle trades at least
+# VOLUME_CONFIRMATION times the average volume of the VOLUME_LOOKBACK candles before it
+VOLUME_LOOKBACK = 20
+VOLUME_CONFIRMATION = 1.5
+
+# Trailing candles needed for the volume indicators
+VOLUME_TAIL = max(VWAP_PERIOD, CROSSOVER_LOOKBACK + 1 + VOLUME_LOOKBACK)
+
+
+def find_crossovers(ema_short, ema_long) -> Tuple[np.ndarray, np.ndarray]:
+    """Find every crossover of ema_short through ema_long in one vectorized pass
+
+    A bullish cross at position i means ema_short <= ema_long at i - 1 and
+    ema_short > ema_long at i; a bearish cross is the mirror image. Returns the
+    positional indices of the crossing candles and their directions (1 bullish,
+    -1 bearish), both in ascending order.
+    """
+    diff = np.asarray(ema_short, dtype=np.float64) - np.asarray(ema_long, dtype=np.float64)
+    previous, current = diff[:-1], diff[1:]
+
+    bullish = (previous <= 0) & (current > 0)
+    bearish = (previous >= 0) & (current < 0)
+
+    indices = np.flatnonzero(bullish | bearish)
+    directions = np.where(bullish[indices], 1, -1).astype(np.int8)
+    return indices + 1, directions
+
+
+def typical_price(df):
+    """(high + low + close) / 3 as an array, for a DataFrame or Candles"""
+    return (np.asarray(df['high'], dtype=np.float64) + np.asarray(df['low'], dtype=np.float64)
+            + np.asarray(df['close'], dtype=np.float64)) / 3
+
+
+def rolling_vwap(typical, volume, period: int = VWAP_PERIOD):
+    """Rolling volume-weighted average price over period candles, NaN without volume"""
+    typical = np.asarray(typical, dtype=np.float64)
+    volume = np.asarray(volume, dtype=np.float64)
+    weight = np.where(np.isnan(volume) | np.isnan(typical), 0.0, volume)
+
+    cum_volume = np.r_[0.0, np.cumsum(weight)]
+    cum_value = np.r_[0.0, np.cumsum(np.where(weight > 0, typical, 0.0) * weight)]
+    ends = np.arange(1, len(weight) + 1)
+    starts = np.maximum(ends - period, 0)
+
+    volume_sum = cum_volume[ends] - cum_volume[starts]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(volume_sum > 0, (cum_value[ends] - cum_value[starts]) / volume_sum, np.nan)
+
+
+def _volume_stats(typical, volume, periods_ago):
+    """VWAP at the last candle and the crossover candle's relative volume, per column
+
+    typical and volume are (periods, symbols) tails ending at the last candle and
+    periods_ago holds each column's crossover_periods_ago (0 for no crossover).
+    Sums are sequential cumulative sums, so one column analyzed alone gives the
+    same bits as the same column inside a batch.
+    """
+    periods, symbols = volume.shape
+    columns = np.arange(symbols)
+    weight = np.where(np.isnan(volume) | np.isnan(typical), 0.0, volume)
+    zeros = np.zeros((1, symbols))
+
+    cum_volume = np.vstack([zeros, np.cumsum(weight, axis=0)])
+    cum_value = np.vstack([zeros, np.cumsum(np.where(weight > 0, typical, 0.0) * weight, axis=0)])
+    start = max(periods - VWAP_PERIOD, 0)
+    volume_sum = cum_volume[periods] - cum_volume[start]
+
+    present = ~np.isnan(volume)
+    cum_present = np.vstack([zeros, np.cumsum(present, axis=0)])
+    cum_filled = np.vstack([zeros, np.cumsum(np.where(present, volume, 0.0), axis=0)])
+    crossed = periods_ago > 0
+    cross_row = np.clip(periods - np.where(crossed, periods_ago, 1), 0, periods - 1)
+    first_row = np.maximum(cross_row - VOLUME_LOOKBACK, 0)
+    prior_count = cum_present[cross_row, columns] - cum_present[first_row, columns]
+    prior_sum = cum_filled[cross_row, columns] - cum_filled[first_row, columns]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        vwap = np.where(volume_sum > 0, (cum_value[periods] - cum_value[start]) / volume_sum, np.nan)
+        prior_mean = prior_sum / prior_count
+        ratio = np.where(crossed & (prior_count > 0) & (prior_mean > 0),
+                         volume[cross_row, columns] / prior_mean, np.nan)
+
+    return vwap, ratio
+
+
+class EMAState:
+    """Resumable indicator pipeline state for one series, EMA 12/21 included
+
+    The state holds every smoothing's value at one candle (the seed), taken far
+    enough before the last closed candle that a still-forming final candle can
+    change freely between updates and the trailing look-back can be recomputed
+    from it. Smoothings are seeded at the first candle, so the state only
+    applies to series that still start at first_timestamp.
+    """
+    __slots__ = ('first_timestamp', 'timestamp', 'close', 'seeds', 'prior_periods')
+
+    def __init__(self, first_timestamp, timestamp, close: float, seeds: Dict, prior_periods):
+        self.first_timestamp = first_timestamp
+        self.timestamp = timestamp
+        self.close = close
+        self.seeds = seeds
+        self.prior_periods = prior_periods
+
 
 class TrendAnalyzer:
-    def __init__(self):
+    def __init__(self, indicators: Optional[Sequence[Indicator]] = None):
         self.ema_short_period = 12
         self.ema_long_period = 21
 
+        # Indicators behind the multi-signal score; their EMAs are shared with the crossover
+        self.indicator_pipeline = IndicatorPipeline(
+            default_indicators(self.ema_short_period, self.ema_long_period) if indicators is None else indicators
+        )
+
+        # Streaming EMA state per caller-chosen key, e.g. (coin, timeframe)
+        self._ema_states: Dict[Hashable, EMAState] = {}
+        self._ema_states_lock = threading.Lock()
+
     def calculate_ema(self, data: pd.Series, period: int) -> pd.Series:
-        """Calculate Exponential Moving Average"""
+        """Calculate Exponential Moving Average
+
+        A NumPy array (e.g. a Candles column) is wrapped without copying and the
+        result is returned as an array.
+        """
+        if isinstance(data, np.ndarray):
+            return pd.Series(data, copy=False).ewm(span=period, adjust=False).mean().to_numpy()
         return data.ewm(span=period, adjust=False).mean()
 
     def analyze_ema_crossover(self, df: pd.DataFrame) -> Dict[str, any]:
-        """Analyze EMA 12/21 crossover patterns"""
-        ema_12 = self.calculate_ema(df['close'], self.ema_short_period)
-        ema_21 = self.calculate_ema(df['close'], self.ema_long_period)
+        """Analyze EMA 12/21 crossover patterns and the multi-signal indicator score"""
+        data, outputs = self.indicator_pipeline.run(self._indicator_columns(df))
+        ema_12 = pd.Series(data.ema('close', self.ema_short_period)[:, 0], index=df.index, copy=False)
+        ema_21 = pd.Series(data.ema('close', self.ema_long_period)[:, 0], index=df.index, copy=False)
 
-        # Add EMAs to dataframe for visualization
+        # Add EMAs (and VWAP when there is volume) to dataframe for visualization
         df['EMA_12'] = ema_12
         df['EMA_21'] = ema_21
+        if 'volume' in df.columns:
+            df['VWAP'] = rolling_vwap(typical_price(df), df['volume'].to_numpy())
+
+        tail = CROSSOVER_LOOKBACK + 1
+        analysis = self._summarize_crossover(
+            ema_12.iloc[-tail:].to_numpy(),
+            ema_21.iloc[-tail:].to_numpy(),
+            df['close'].iloc[-1],
+            *self._volume_tail(df)
+        )
+        analysis.update(self.indicator_pipeline.summarize(*self.indicator_pipeline.score(data, outputs), 0))
+        return analysis
+
+    @staticmethod
+    def _indicator_columns(df) -> Dict[str, np.ndarray]:
+        """Price columns of a DataFrame or Candles as single-symbol (periods, 1) arrays"""
+        return {
+            column: np.asarray(df[column], dtype=np.float64)[:, None]
+            for column in ('open', 'high', 'low', 'close', 'volume') if column in df.columns
+        }
+
+    @staticmethod
+    def _volume_tail(df) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Trailing typical prices and volumes for the volume indicators, or Nones without volume"""
+        if 'volume' not in df.columns:
+            return None, None
+        tail = df.iloc[-VOLUME_TAIL:] if isinstance(df, pd.DataFrame) else df.slice(-VOLUME_TAIL)
+        return typical_price(tail), np.asarray(tail['volume'], dtype=np.float64)
+
+    def analyze_ema_crossover_incremental(self, key: Hashable, df: pd.DataFrame) -> Dict[str, any]:
+        """Analyze EMA 12/21 crossover patterns and the indicator score, resuming stored state for key
+
+        The indicator pipeline (EMAs included) is resumed from the seed stored for
+        key, so a refresh that adds or updates the final candle or two only runs
+        over the pipeline's look-back plus the new candles, whatever the series
+        length. When the series starts at a different candle (a sliding window
+        moved), the seed candle is missing from df or its close was revised, the
+        full series is recomputed. Results are identical to analyze_ema_crossover,
+        but the EMA columns are not added to df, which may also be Candles.
+        """
+        pipeline = self.indicator_pipeline
+        columns = self._indicator_columns(df)
+        closes = columns['close'][:, 0]
+        n = len(closes)
+        index = df.index
+
+        with self._ema_states_lock:
+            state = self._ema_states.get(key)
+
+        data = outputs = None
+        start = 0
+        if state is not None and n and index[0] == state.first_timestamp:
+            pos = index.searchsorted(state.timestamp)
+            if (pos < n - max(pipeline.lookback, CROSSOVER_LOOKBACK + 1) and index[pos] == state.timestamp
+                    and closes[pos] == state.close):
+                data, outputs = pipeline.run({column: values[pos:] for column, values in columns.items()},
+                                             state.seeds, state.prior_periods)
+                start = pos
+
+        tail = CROSSOVER_LOOKBACK + 1
+        if data is not None:
+            ema_short = data.ema('close', self.ema_short_period)[:, 0]
+            ema_long = data.ema('close', self.ema_long_period)[:, 0]
+            if not data.exact:
+                data = None
+
+        if data is None:
+            # Cold start, revised history or a smoothing that can't be resumed: run the full series
+            data, outputs = pipeline.run(columns)
+            ema_short = data.ema('close', self.ema_short_period)[:, 0]
+            ema_long = data.ema('close', self.ema_long_period)[:, 0]
+            start = 0
 
+        # Move the seed up to the look-back before the last closed candle. At the
+        # first row of a resumed run derived sources aren't complete, so a seed
+        # that hasn't moved is kept as is.
+        seed_row = n - 2 - max(pipeline.lookback, tail)
+        if seed_row > start:
+            resume = data.resume_point(seed_row - start)
+            with self._ema_states_lock:
+                if resume is None:
+                    self._ema_states.pop(key, None)
+                else:
+                    self._ema_states[key] = EMAState(index[0], index[seed_row], closes[seed_row], *resume)
+
+        analysis = self._summarize_crossover(
+            ema_short[-tail:],
+            ema_long[-tail:],
+            closes[-1],
+            *self._volume_tail(df)
+        )
+        analysis.update(pipeline.summarize(*pipeline.score(data, outputs), 0))
+        return analysis
+
+    def score_indicators(self, df) -> Dict[str, any]:
+        """Multi-signal score, per-indicator signals and latest indicator values for one series"""
+        pipeline = self.indicator_pipeline
+        return pipeline.summarize(*pipeline.score(*pipeline.run(self._indicator_columns(df))), 0)
+
+    def reset_ema_state(self, key: Optional[Hashable] = None):
+        """Forget streaming EMA state for key, or for every key when None"""
+        with self._ema_states_lock:
+            if key is None:
+                self._ema_states.clear()
+            else:
+                self._ema_states.pop(key, None)
+
+    def _summarize_crossover(self, ema_12: np.ndarray, ema_21: np.ndarray, last_close: float,
+                             typical: Optional[np.ndarray] = None,
+                             volume: Optional[np.ndarray] = None) -> Dict[str, any]:
+        """Build the crossover analysis from the trailing EMA values (most recent last)
+
+        With trailing typical prices and volumes, the VWAP is reported and a
+        crossover on heavy volume adds to the strength.
+        """
         # Check current positioning (EMA 12 above or below EMA 21)
-        current_bullish = ema_12.iloc[-1] > ema_21.iloc[-1]
+        current_bullish = ema_12[-1] > ema_21[-1]
 
         # Check for recent crossover (within last 5 periods)
         recent_cross_bull = False
         recent_cross_bear = False
         crossover_periods_ago = None
 
-        if len(ema_12) >= 2:
-            for i in range(1, min(6, len(ema_12))):
-                if (ema_12.iloc[-i-1] <= ema_21.iloc[-i-1] and
-                    ema_12.iloc[-i] > ema_21.iloc[-i]):
-                    recent_cross_bull = True
-                    crossover_periods_ago = i
-                    break
-                elif (ema_12.iloc[-i-1] >= ema_21.iloc[-i-1] and
-                      ema_12.iloc[-i] < ema_21.iloc[-i]):
-                    recent_cross_bear = True
-                    crossover_periods_ago = i
-                    break
+        indices, directions = find_crossovers(ema_12[-CROSSOVER_LOOKBACK - 1:], ema_21[-CROSSOVER_LOOKBACK - 1:])
+        if len(indices):
+            # Most recent crossover wins
+            crossover_periods_ago = min(CROSSOVER_LOOKBACK + 1, len(ema_12)) - int(indices[-1])
+            recent_cross_bull = bool(directions[-1] > 0)
+            recent_cross_bear = not recent_cross_bull
 
         # Determine trend based on EMA positioning
         if current_bullish:
@@ -53,19 +298,170 @@ class TrendAnalyzer:
         if crossover_periods_ago and crossover_periods_ago <= 2:
             trend_strength = min(1.0, trend_strength + 0.2)
 
+        vwap = cross_volume_ratio = None
+        volume_confirmed = False
+        if volume is not None:
+            vwaps, ratios = _volume_stats(typical[:, None], volume[:, None],
+                                          np.array([crossover_periods_ago or 0]))
+            vwap = None if np.isnan(vwaps[0]) else float(vwaps[0])
+            cross_volume_ratio = None if np.isnan(ratios[0]) else float(ratios[0])
+            volume_confirmed = cross_volume_ratio is not None and cross_volume_ratio >= VOLUME_CONFIRMATION
+
+        # Increase strength if the crossover in the trend's direction came on heavy volume
+        if volume_confirmed and (recent_cross_bull if current_bullish else recent_cross_bear):
+            trend_strength = round(min(1.0, trend_strength + 0.1), 2)
+
         return {
             'trend': trend,
             'strength': trend_strength,
-            'ema_12_value': ema_12.iloc[-1],
-            'ema_21_value': ema_21.iloc[-1],
+            'ema_12_value': ema_12[-1],
+            'ema_21_value': ema_21[-1],
             'ema_12_above_21': current_bullish,
             'recent_bullish_cross': recent_cross_bull,
             'recent_bearish_cross': recent_cross_bear,
             'crossover_periods_ago': crossover_periods_ago,
-            'price_above_ema12': df['close'].iloc[-1] > ema_12.iloc[-1],
-            'price_above_ema21': df['close'].iloc[-1] > ema_21.iloc[-1]
+            'price_above_ema12': last_close > ema_12[-1],
+            'price_above_ema21': last_close > ema_21[-1],
+            'vwap': vwap,
+            'price_above_vwap': None if vwap is None else bool(last_close > vwap),
+            'cross_volume_ratio': cross_volume_ratio,
+            'volume_confirmed': volume_confirmed
         }
 
-    def get_overall_trend(self, df: pd.DataFrame) -> Dict[str, any]:
-        """Get trend analysis based solely on EMA 12/21 crossover"""
-        return self.analyze_ema_crossover(df)
\ No newline at end of file
+    def analyze_batch(self, closes, symbols: Optional[Sequence[str]] = None, volumes=None, highs=None,
+                      lows=None) -> Dict[str, Dict[str, any]]:
+        """Analyze EMA 12/21 crossovers and indicator scores for many symbols in one vectorized pass
+
+        closes is a wide DataFrame (rows in time order, one column per symbol) or a
+        2-D array of shape (periods, symbols) with symbols naming the columns. Each
+        column is analyzed as if its missing values had been dropped, so series of
+        different lengths or with gaps can share one matrix. Optional volumes,
+        highs and lows of the same shape add the volume indicators and the
+        indicators that need a candle's range (VWAP falls back to closes as price
+        without highs and lows). Returns {symbol: analysis} with the same fields as
+        analyze_ema_crossover; symbols without any data are omitted.
+        """
+        if isinstance(closes, pd.DataFrame):
+            symbols = list(closes.columns) if symbols is None else list(symbols)
+        else:
+            symbols = None if symbols is None else list(symbols)
+
+        values = self._wide(closes)
+        if symbols is None:
+            symbols = list(range(values.shape[1]))
+
+        if values.size == 0:
+            return {}
+
+        inputs = {'close': values}
+        for column, matrix in (('high', highs), ('low', lows), ('volume', volumes)):
+            if matrix is not None:
+                inputs[column] = self._wide(matrix)
+
+        # Move each column's missing values to the top, keeping the valid values in
+        # order at the bottom, so every series ends on the final row without gaps
+        missing = np.isnan(values)
+        if missing.any():
+            order = np.argsort(~missing, axis=0, kind='stable')
+            inputs = {column: np.take_along_axis(matrix, order, axis=0) for column, matrix in inputs.items()}
+            values = inputs['close']
+
+        # One fused pass: the crossover EMAs come out of the indicator pipeline's shared cache
+        data, outputs = self.indicator_pipeline.run(inputs)
+        ema_short = data.ema('close', self.ema_short_period)
+        ema_long = data.ema('close', self.ema_long_period)
+        score = self.indicator_pipeline.score(data, outputs)
+
+        last_short, last_long, last_close = ema_short[-1], ema_long[-1], values[-1]
+        current_bullish = last_short > last_long
+
+        # Crossovers within the look-back window, most recent first
+        diff = (ema_short - ema_long)[-CROSSOVER_LOOKBACK - 1:][::-1]
+        current, previous = diff[:-1], diff[1:]
+        bullish = (previous <= 0) & (current > 0)
+        bearish = (previous >= 0) & (current < 0)
+        crossed = bullish | bearish
+
+        has_cross = crossed.any(axis=0)
+        first = crossed.argmax(axis=0)
+        columns = np.arange(values.shape[1])
+        recent_bull = has_cross & bullish[first, columns]
+        recent_bear = has_cross & bearish[first, columns]
+        periods_ago = np.where(has_cross, first + 1, 0)
+
+        strength = np.where(np.where(current_bullish, recent_bull, recent_bear), 0.8, 0.6)
+        strength = np.where(has_cross & (periods_ago <= 2), np.minimum(1.0, strength + 0.2), strength)
+
+        vwap = ratio = np.full(values.shape[1], np.nan)
+        if 'volume' in inputs:
+            if 'high' in inputs and 'low' in inputs:
+                typical = (inputs['high'][-VOLUME_TAIL:] + inputs['low'][-VOLUME_TAIL:] + values[-VOLUME_TAIL:]) / 3
+            else:
+                typical = values[-VOLUME_TAIL:]
+            vwap, ratio = _volume_stats(typical, inputs['volume'][-VOLUME_TAIL:], periods_ago)
+            with np.errstate(invalid='ignore'):
+                confirmed = ratio >= VOLUME_CONFIRMATION
+            in_direction = np.where(current_bullish, recent_bull, recent_bear)
+            strength = np.where(confirmed & in_direction, np.round(np.minimum(1.0, strength + 0.1), 2), strength)
+
+        results = {}
+        for column, symbol in enumerate(symbols):
+            if np.isnan(last_close[column]):
+                continue
+            results[symbol] = {
+                'trend': 'BULLISH' if current_bullish[column] else 'BEARISH',
+                'strength': float(strength[column]),
+                'ema_12_value': last_short[column],
+                'ema_21_value': last_long[column],
+                'ema_12_above_21': bool(current_bullish[column]),
+                'recent_bullish_cross': bool(recent_bull[column]),
+                'recent_bearish_cross': bool(recent_bear[column]),
+                'crossover_periods_ago': int(periods_ago[column]) if has_cross[column] else None,
+                'price_above_ema12': bool(last_close[column] > last_short[column]),
+                'price_above_ema21': bool(last_close[column] > last_long[column]),
+                'vwap': None if np.isnan(vwap[column]) else float(vwap[column]),
+                'price_above_vwap': None if np.isnan(vwap[column]) else bool(last_close[column] > vwap[column]),
+                'cross_volume_ratio': None if np.isnan(ratio[column]) else float(ratio[column]),
+                'volume_confirmed': bool(ratio[column] >= VOLUME_CONFIRMATION),
+                **self.indicator_pipeline.summarize(*score, column)
+            }
+
+        return results
+
+    @staticmethod
+    def _wide(matrix) -> np.ndarray:
+        """A wide DataFrame or array as a 2-D (periods, symbols) float array"""
+        if isinstance(matrix, pd.DataFrame):
+            return matrix.to_numpy(dtype=np.float64)
+        values = np.asarray(matrix, dtype=np.float64)
+        return values[:, None] if values.ndim == 1 else values
+
+    def analyze_timeframes(self, closes_by_timeframe: Dict[str, pd.DataFrame]) -> Dict[str, Dict[str, Dict[str, any]]]:
+        """Run analyze_batch for each timeframe's wide close matrix
+
+        Returns {symbol: {timeframe: analysis}}, the input expected by
+        ChartVisualizer.create_trend_heatmap.
+        """
+        trend_data: Dict[str, Dict[str, Dict[str, any]]] = {}
+        for timeframe, closes in closes_by_timeframe.items():
+            for symbol, analysis in self.analyze_batch(closes).items():
+                trend_data.setdefault(symbol, {})[timeframe] = analysis
+        return trend_data
+
+    def add_ema_columns(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Add EMA_12/EMA_21 columns, and VWAP when df has volume, for visualization"""
+        df['EMA_12'] = self.calculate_ema(df['close'], self.ema_short_period)
+        df['EMA_21'] = self.calculate_ema(df['close'], self.ema_long_period)
+        if 'volume' in df.columns:
+            df['VWAP'] = rolling_vwap(typical_price(df), df['volume'].to_numpy())
+        return df
+
+    def get_overall_trend(self, df: pd.DataFrame, state_key: Optional[Hashable] = None) -> Dict[str, any]:
+        """Get trend analysis based solely on EMA 12/21 crossover
+
+        With a state_key the EMAs and indicators are resumed from the previous call
+        for that key instead of being recomputed over the whole series.
+        """
+        if state_key is not None:
+            return self.analyze_ema_crossover_incremental(state_key, df)
+        return self.analyze_ema_crossover(df)